@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Implements batch mode ('--batch'), which runs newline-delimited CLI commands from a file or stdin.
+All commands run against a single monitor enumeration with OS handles kept open, and results are streamed as JSON lines.
+"""
+
+import sys
+import json
+import shlex
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from app.util import CFG
+from app.util.init import args
+from app.util.mixins import LoggableMixin
+
+from .commands.base import CliCommand
+
+class CliBatch(LoggableMixin):
+    """
+    Runs batches of CLI commands.
+
+    Each line holds one or more commands in the same syntax as the command line (e.g. '-s primary input hdmi1'). Empty
+    lines and lines starting with '#' are ignored. For every command, a JSON object is written to the output with keys
+    'line', 'command', 'ok', and either 'result' or 'error'.
+    """
+
+    def __init__(self, out : Optional[TextIO] = None, ignore_errors : Optional[bool] = None, text : bool = False):
+        """
+        Args:
+            out: Where to write the JSON lines. Defaults to sys.stdout.
+            ignore_errors: Whether to carry on after a failed command. Defaults to 'app.cli.ignore_errors'.
+            text: If True, records also include the command's console output under key 'text'.
+        """
+        super().__init__()
+        self.out = out
+        self.ignore_errors = ignore_errors
+        self.text = text
+
+    def _ignore_errors(self) -> bool:
+        if self.ignore_errors is not None:
+            return self.ignore_errors
+        return CFG.snapshot().app.cli.ignore_errors
+
+
+    # Execution
+    def execute_file(self, path : str) -> bool:
+        """
+        Run the commands in a file.
+
+        Args:
+            path: Path of the batch file, or '-' for stdin.
+
+        Returns:
+            bool: True if all commands succeeded.
+        """
+        if path == '-':
+            return self.execute(sys.stdin)
+
+        with open(path, 'r') as file:
+            return self.execute(file)
+
+    def execute(self, lines : Iterable[str]) -> bool:
+        """
+        Run commands from an iterable of lines. Lines are consumed (and results written) one by one.
+
+        Args:
+            lines: The command lines.
+
+        Returns:
+            bool: True if all commands succeeded.
+
+        Raises:
+            RuntimeError: If a command fails and errors are not ignored. Its error record is written first.
+        """
+        success = True
+
+        for record in self.records(lines):
+            self._write(record)
+
+            if not record['ok']:
+                success = False
+                if not self._ignore_errors():
+                    raise RuntimeError(f"Error executing batch line {record['line']} '{record['command']}': {record['error']}")
+
+        return success
+
+    def records(self, lines : Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Run commands from an iterable of lines, yielding a result record per command.
+        Stops after the first failed command unless errors are ignored.
+
+        Args:
+            lines: The command lines.
+
+        Returns:
+            Iterator[dict]: The result records.
+        """
+        def parse(line : str) -> List[Dict]:
+            return args.parse_commands(shlex.split(line))
+
+        def numbered():
+            for i, line in enumerate(lines, 1):
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield i, line
+
+        return self._records(numbered(), parse)
+
+    def command_records(self, commands : Iterable[Dict]) -> Iterator[Dict[str, Any]]:
+        """
+        Run already parsed commands (in the same format as 'app.cli.commands'), yielding a result record per command.
+        Records use the command index as 'line'. Stops after the first failed command unless errors are ignored.
+
+        Args:
+            commands: The parsed commands.
+
+        Returns:
+            Iterator[dict]: The result records.
+        """
+        return self._records(((i, command) for i, command in enumerate(commands, 1)), lambda command: [command])
+
+    def _records(self, items : Iterable, parse : Callable[[Any], List[Dict]]) -> Iterator[Dict[str, Any]]:
+        from app.ddcci.os import OS_MONITORS
+
+        ignore_errors = self._ignore_errors()
+
+        with OS_MONITORS.batch():
+            for i, item in items:
+                for record in self._execute(i, item, parse):
+                    yield record
+
+                    if not record['ok'] and not ignore_errors:
+                        return
+
+    def _execute(self, i : int, item : Any, parse : Callable[[Any], List[Dict]]) -> Iterator[Dict[str, Any]]:
+        label = item if isinstance(item, str) else ' '.join([item.get('type', '?'), *map(str, item.get('others', []))])
+
+        try:
+            commands = [CliCommand.from_argparse(command) for command in parse(item)]
+        except Exception as e:
+            self.log.debug(f"Invalid batch command {i} '{label}'", exc_info=True)
+            yield {'line': i, 'command': label, 'ok': False, 'error': repr(e)}
+            return
+
+        for cmd in commands:
+            record : Dict[str, Any] = {'line': i, 'command': label}
+
+            try:
+                result = cmd.run()
+                record['result'] = cmd.serialize(result)
+                if self.text:
+                    record['text'] = cmd.format(result)
+                record['ok'] = True
+            except Exception as e:
+                self.log.debug(f"Error executing batch command {i} '{label}'", exc_info=True)
+                record['ok'] = False
+                record['error'] = repr(e)
+
+            yield record
+
+            # Do not run the rest of a line after a failure
+            if not record['ok']:
+                return
+
+    def _write(self, record : Dict[str, Any]) -> None:
+        out = self.out if self.out is not None else sys.stdout
+        out.write(json.dumps(record) + '\n')
+        out.flush()
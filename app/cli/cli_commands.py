@@ -3,9 +3,14 @@
 
 """
 Implements the CliCommands container for managing and executing CLI command objects.
-Provides methods to populate from argparse and to execute all commands in sequence.
+Provides methods to populate from argparse and to execute all commands, in parallel across monitors where possible.
 """
 
+import threading
+
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Tuple
+
 from app.util import CFG
 from app.util.mixins import LoggableMixin
 from app.util.namespace import NamespaceList
@@ -15,19 +20,122 @@ from .commands.base import CliCommand
 class CliCommands(NamespaceList, LoggableMixin):
     """
     Container for CLI command objects. Handles execution and population from argparse.
+
+    Commands targeting the same monitor always run in order, but commands targeting different monitors (e.g. '-s left
+    brightness 50 -s right brightness 50') run in parallel, on up to 'cli.jobs' threads. Results are always printed in
+    command line order.
     """
     def execute(self):
         """
         Execute all CLI commands in the container, handling errors as configured.
         """
+        jobs = CFG.snapshot().cli.jobs
+        if jobs is None or jobs <= 1 or len(self) < 2:
+            return self._execute_sequential()
+
+        from app.ddcci.os import OS_MONITORS
+
+        # Enumerate once, so that all commands (and threads) resolve their monitors against the same snapshot
+        with OS_MONITORS.batch():
+            groups = self.group_by_monitor()
+            if len(groups) < 2:
+                return self._execute_sequential()
+
+            self._execute_parallel(groups, min(jobs, len(groups)))
+
+    def _execute_sequential(self):
         for cmd in self:
             try:
                 cmd.execute()
             except Exception as e:
-                if CFG.app.cli.ignore_errors:
-                    self.log.error(f"Error executing command '{cmd}': {repr(e)}.")
-                else:
-                    raise RuntimeError(f"Error executing command '{cmd}'") from e
+                self._error(cmd, e)
+
+    def _ignore_errors(self) -> bool:
+        return CFG.snapshot().app.cli.ignore_errors
+
+    def _error(self, cmd : CliCommand, e : Exception):
+        if self._ignore_errors():
+            self.log.error(f"Error executing command '{cmd}': {repr(e)}.")
+        else:
+            raise RuntimeError(f"Error executing command '{cmd}'") from e
+
+
+    # Parallel execution
+    @staticmethod
+    def _monitor_key(cmd : CliCommand) -> Hashable:
+        """
+        Args:
+            cmd: The command.
+
+        Returns:
+            Hashable: The OS monitor the command targets. Commands without a monitor share the key None, and commands
+                whose monitor cannot be found are their own key (they will fail when run).
+        """
+        monitor = getattr(cmd, 'monitor', None)
+        if monitor is None:
+            return None
+
+        try:
+            return monitor.get_os_monitor()
+        except Exception:
+            return cmd
+
+    def group_by_monitor(self) -> List[List[Tuple[int, CliCommand]]]:
+        """
+        Group the commands by the monitor they target. This is the dependency graph of the commands: each group must run
+        in order, while different groups are independent.
+
+        Returns:
+            list: The groups, in order of their first command. Each group is a list of (index, command) tuples, in order.
+        """
+        groups : Dict[Any, List[Tuple[int, CliCommand]]] = {}
+
+        for i, cmd in enumerate(self):
+            groups.setdefault(self._monitor_key(cmd), []).append((i, cmd))
+
+        return list(groups.values())
+
+    def _execute_parallel(self, groups : List[List[Tuple[int, CliCommand]]], jobs : int):
+        ignore_errors = self._ignore_errors()
+
+        # Set after the first failure, unless errors are ignored, so that no further commands are started
+        stop = threading.Event()
+        futures : List[Future] = [Future() for _ in self]
+
+        def run_group(group : List[Tuple[int, CliCommand]]):
+            for i, cmd in group:
+                future = futures[i]
+
+                if stop.is_set():
+                    future.cancel()
+                    continue
+
+                future.set_running_or_notify_cancel()
+                try:
+                    future.set_result(cmd.run())
+                except Exception as e:
+                    if not ignore_errors:
+                        stop.set()
+                    future.set_exception(e)
+
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='CliCommands') as pool:
+            for group in groups:
+                pool.submit(run_group, group)
+
+            # Report results in order, as they become available
+            for cmd, future in zip(self, futures):
+                try:
+                    result = future.result()
+                except CancelledError:
+                    # Skipped after a failure, which will be reported
+                    continue
+                except Exception as e:
+                    self._error(cmd, e)
+                    continue
+
+                text = cmd.format(result)
+                if text is not None:
+                    print(text)
 
     def from_argparse(self, argparse_commands=None):
         """
@@ -47,4 +155,4 @@ class CliCommands(NamespaceList, LoggableMixin):
                 if CFG.app.cli.ignore_errors:
                     self.log.error(f"Invalid command: {str(e)}.")
                 else:
-                    raise RuntimeError(f"Invalid command '{argparse_command}'") from e
\ No newline at end of file
+                    raise RuntimeError(f"Invalid command '{argparse_command}'") from e
@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Implements dump mode ('--dump'), which reads every VCP code advertised by one or more monitors and streams the results as
+JSON lines. Monitors are read in parallel.
+"""
+
+import sys
+import json
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Iterable, List, Optional, TextIO, Tuple
+
+from app.util import CFG
+from app.util.mixins import LoggableMixin
+
+class CliDump(LoggableMixin):
+    """
+    Dumps the state of monitors.
+
+    For every code, a JSON object is written to the output as soon as it has been read, with the keys of Monitor.dump()
+    plus 'monitor' (the filter as given). Lines of different monitors may be interleaved. Monitors that cannot be found
+    produce a single line with keys 'monitor' and 'error'.
+    """
+
+    def __init__(self, out : Optional[TextIO] = None, jobs : Optional[int] = None):
+        """
+        Args:
+            out: Where to write the JSON lines. Defaults to sys.stdout.
+            jobs: Maximum number of monitors read in parallel. Defaults to 'cli.jobs'.
+        """
+        super().__init__()
+        self.out  = out
+        self.jobs = jobs
+        self._write_lock = threading.Lock()
+
+    def execute(self, filters : Iterable[str]) -> bool:
+        """
+        Dump the monitors selected by the given filters.
+
+        Args:
+            filters: The monitor filters, e.g. ['primary'].
+
+        Returns:
+            bool: True if all monitors were found. Codes that fail to read (e.g. write-only codes) are reported in their
+                records, but are not failures.
+        """
+        from app.ddcci.os import OS_MONITORS
+        from app.ddcci.monitor_registry import MONITOR_REGISTRY
+
+        jobs = self.jobs if self.jobs is not None else CFG.snapshot().cli.jobs
+        jobs = max(jobs or 1, 1)
+
+        with OS_MONITORS.batch():
+            # Filters selecting the same monitor (i.e. resolving to the same OS monitor) are only dumped once
+            monitors : Dict[Hashable, Tuple[Any, str]] = {}
+            for filter in filters:
+                monitor = MONITOR_REGISTRY.get(filter)
+                monitors.setdefault(self._monitor_key(monitor), (monitor, filter))
+
+            with ThreadPoolExecutor(max_workers=min(jobs, len(monitors)) or 1, thread_name_prefix='CliDump') as pool:
+                results : List = [pool.submit(self._dump, monitor, filter) for monitor, filter in monitors.values()]
+                return all(result.result() for result in results)
+
+    @staticmethod
+    def _monitor_key(monitor) -> Hashable:
+        """
+        Args:
+            monitor: The monitor a filter resolved to.
+
+        Returns:
+            Hashable: The OS monitor dumped. Monitors that cannot be found are their own key (they will fail when dumped).
+        """
+        try:
+            return monitor.get_os_monitor()
+        except Exception:
+            return monitor
+
+    def _dump(self, monitor, filter : str) -> bool:
+        try:
+            for record in monitor.dump():
+                self._write({'monitor': filter, **record})
+        except Exception as e:
+            self.log.debug(f"Error dumping monitor '{filter}'", exc_info=True)
+            self._write({'monitor': filter, 'error': repr(e)})
+            return False
+
+        return True
+
+    def _write(self, record : Dict[str, Any]) -> None:
+        line = json.dumps(record) + '\n'
+        with self._write_lock:
+            out = self.out if self.out is not None else sys.stdout
+            out.write(line)
+            out.flush()
@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Implements plan mode ('--plan'), a dry run of the CLI commands that prints the DDC/CI operations they would issue and how
+long they are estimated to take, without sending anything to the monitors.
+"""
+
+import sys
+
+from typing import Any, Dict, Iterable, List, Optional, Mapping, TextIO, Tuple
+
+from app.util import CFG
+from app.util.mixins import LoggableMixin
+
+from .commands.base import CliCommand
+
+class CliPlan(LoggableMixin):
+    """
+    Plans CLI commands, see RecordingBackend.
+
+    The plan lists every operation in order, with the command that issues it, and marks avoidable operations (e.g. writes
+    of a value the code already has). It ends with the estimated total duration, both sequentially and running commands
+    for different monitors in parallel (see CliCommands).
+    """
+
+    def __init__(self, out : Optional[TextIO] = None, jobs : Optional[int] = None, costs : Optional[Mapping[str, float]] = None):
+        """
+        Args:
+            out: Where to write the plan. Defaults to sys.stdout.
+            jobs: Maximum number of monitors commands run on in parallel. Defaults to 'cli.jobs'.
+            costs: Estimated duration of each kind of operation, see RecordingBackend. Defaults to 'monitors.costs'.
+        """
+        super().__init__()
+        self.out   = out
+        self.jobs  = jobs
+        self.costs = costs
+
+        # The recording of the last execute()
+        self.recording = None
+
+    @staticmethod
+    def label(argparse_command : Dict[str, Any]) -> str:
+        """
+        Args:
+            argparse_command: A command as parsed by argparse, see CliCommand.from_argparse.
+
+        Returns:
+            str: The command as given on the command line, e.g. 'set primary input hdmi1'.
+        """
+        return ' '.join([argparse_command['type'], *argparse_command['others']])
+
+    def execute(self, argparse_commands : Iterable[Dict[str, Any]]) -> bool:
+        """
+        Plan the given commands and write the plan.
+
+        Args:
+            argparse_commands: The commands, as parsed by argparse (i.e. 'app.cli.commands').
+
+        Returns:
+            bool: True if every command could be planned.
+        """
+        from app.ddcci.os import OS_MONITORS
+        from app.ddcci.os.recording import RecordingBackend
+        from app.ddcci.monitor_registry import MONITOR_REGISTRY
+
+        errors : List[Tuple[str, Exception]] = []
+        recording = RecordingBackend(self.costs)
+
+        try:
+            with OS_MONITORS.batch(), recording:
+                for argparse_command in argparse_commands:
+                    recording.label = self.label(argparse_command)
+                    try:
+                        CliCommand.from_argparse(argparse_command).run()
+                    except Exception as e:
+                        self.log.debug(f"Error planning command '{recording.label}'", exc_info=True)
+                        errors.append((recording.label, e))
+        finally:
+            # Monitors built while recording may hold code tables derived from simulated capabilities
+            MONITOR_REGISTRY.clear()
+
+        self.recording = recording
+        self._write(self._format(recording, errors))
+        return not errors
+
+    def estimate(self, jobs : Optional[int] = None) -> float:
+        """
+        Estimate how long the last planned commands take when run in parallel, i.e. the operations of each monitor run
+        sequentially, and monitors are distributed over 'jobs' threads.
+
+        Args:
+            jobs: Maximum number of monitors run in parallel. Defaults to the value given to the constructor.
+
+        Returns:
+            float: The estimated duration, in seconds.
+        """
+        if jobs is None:
+            jobs = self.jobs if self.jobs is not None else CFG.snapshot().cli.jobs
+        jobs = max(jobs or 1, 1)
+
+        per_monitor : Dict[Any, float] = {}
+        for operation in self.recording.operations:
+            per_monitor[operation.monitor] = per_monitor.get(operation.monitor, 0.0) + operation.cost
+
+        # Longest monitors first, each to the least busy thread
+        threads = [0.0] * jobs
+        for cost in sorted(per_monitor.values(), reverse=True):
+            threads[threads.index(min(threads))] += cost
+
+        return max(threads)
+
+    def _format(self, recording, errors : List[Tuple[str, Exception]]) -> str:
+        rows = [('#', 'Command', 'Monitor', 'Operation', 'Code', 'Value', 'Estimate', '')]
+        for op in recording.operations:
+            rows.append((
+                str(op.index),
+                op.label or '',
+                op.monitor.instance_name,
+                op.op,
+                f"0x{op.code:02X}" if op.code is not None else '',
+                f"0x{op.value:X}" if op.value is not None else '',
+                f"{op.cost * 1000:.0f}ms",
+                f"avoidable: {op.avoidable}" if op.avoidable else '',
+            ))
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows]
+
+        monitors = len({op.monitor for op in recording.operations})
+        summary = f"{len(recording.operations)} operation(s) on {monitors} monitor(s), estimated {recording.total:.2f}s"
+        parallel = self.estimate()
+        if parallel < recording.total:
+            summary += f" ({parallel:.2f}s running monitors in parallel)"
+        lines.append(summary)
+
+        avoidable = [op for op in recording.operations if op.avoidable]
+        if avoidable:
+            lines.append(f"{len(avoidable)} avoidable operation(s), estimated {recording.avoidable:.2f}s")
+
+        for label, e in errors:
+            lines.append(f"Error planning command '{label}': {repr(e)}")
+
+        return '\n'.join(lines)
+
+    def _write(self, text : str) -> None:
+        out = self.out if self.out is not None else sys.stdout
+        out.write(text + '\n')
+        out.flush()
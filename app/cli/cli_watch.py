@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Implements watch mode ('--watch'), which keeps watching VCP codes of one or more monitors and streams their changes as JSON
+lines. Every monitor is watched on its own thread, as each has its own bus. Watches of the same monitor (possibly through
+different filters) share a single schedule, so that its bus timing constraints hold.
+"""
+
+import sys
+import json
+import threading
+
+from typing import Any, Dict, Hashable, List, Optional, Sequence, TextIO, Tuple
+
+from app.util.mixins import LoggableMixin
+
+class CliWatch(LoggableMixin):
+    """
+    Watches monitors, see Monitor.watch().
+
+    For every change (and initially for every code), a JSON object is written to the output with keys 'monitor' (the
+    filter as given), 'code', 'name', 'value' and 'value_name'. If watching a monitor fails, a line with keys 'monitor'
+    and 'error' is written instead.
+    """
+
+    def __init__(self, out : Optional[TextIO] = None, stop : Optional[threading.Event] = None):
+        """
+        Args:
+            out: Where to write the JSON lines. Defaults to sys.stdout.
+            stop: Event that stops watching once set. Watching also stops on KeyboardInterrupt.
+        """
+        super().__init__()
+        self.out  = out
+        self.stop = stop if stop is not None else threading.Event()
+        self._write_lock = threading.Lock()
+
+    def execute(self, watches : Sequence[Sequence[str]]) -> bool:
+        """
+        Watch monitors until stopped.
+
+        Args:
+            watches: For every monitor to watch, its filter followed by the codes to watch, e.g. [['primary', 'input']].
+
+        Returns:
+            bool: True if no monitor failed.
+
+        Raises:
+            ValueError: If a watch has no codes, or a code is not valid for its monitor.
+        """
+        from app.ddcci.monitor_registry import MONITOR_REGISTRY
+
+        # Resolve everything up front, so that invalid arguments fail before anything is watched. Watches are grouped by
+        # the OS monitor they resolve to, and for every code the filters watching it are kept
+        groups : Dict[Hashable, Tuple[Any, Dict[int, Tuple[Any, List[str]]]]] = {}
+        for watch in watches:
+            if len(watch) < 2:
+                raise ValueError(f"Invalid watch '{' '.join(watch)}': expected a filter and at least one code")
+
+            filter, *codes = watch
+            monitor = MONITOR_REGISTRY.get(filter)
+
+            try:
+                codes = [monitor.codes[code] for code in codes]
+            except KeyError as e:
+                raise ValueError(f"Invalid code {e} for monitor '{monitor.instance_name}'") from e
+
+            _, group = groups.setdefault(self._monitor_key(monitor, filter), (monitor, {}))
+            for code in codes:
+                filters = group.setdefault(code.code, (code, []))[1]
+                if filter not in filters:
+                    filters.append(filter)
+
+        results : List[bool] = []
+        threads = [threading.Thread(target=lambda group=group: results.append(self._watch(*group)), name=f"CliWatch-{group[0].instance_name}", daemon=True) for group in groups.values()]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        return all(results)
+
+    @staticmethod
+    def _monitor_key(monitor, filter : str) -> Hashable:
+        """
+        Args:
+            monitor: The monitor a watch resolved to.
+            filter: The watch's filter.
+
+        Returns:
+            Hashable: The OS monitor watched. Watches whose monitor cannot be found are keyed by their filter (they will
+                fail when watched).
+        """
+        try:
+            return monitor.get_os_monitor()
+        except Exception:
+            return filter
+
+    def _watch(self, monitor, codes : Dict[int, Tuple[Any, List[str]]]) -> bool:
+        """
+        Watch codes of a single monitor.
+
+        Args:
+            monitor: The monitor.
+            codes: For every code number, the code and the filters (as given) watching it.
+
+        Returns:
+            bool: True unless watching failed.
+        """
+        try:
+            for code, value in monitor.watch([code for code, _ in codes.values()], stop=self.stop):
+                for filter in codes[code.code][1]:
+                    self._write({
+                        'monitor'   : filter,
+                        'code'      : code.code,
+                        'name'      : code.name,
+                        'value'     : value.value,
+                        'value_name': value.name if value.has_name else None,
+                    })
+        except Exception as e:
+            self.log.debug(f"Error watching monitor '{monitor.instance_name}'", exc_info=True)
+            filters = {filter: None for _, filters in codes.values() for filter in filters}
+            for filter in filters:
+                self._write({'monitor': filter, 'error': repr(e)})
+            return False
+
+        return True
+
+    def _write(self, record : Dict[str, Any]) -> None:
+        line = json.dumps(record) + '\n'
+        with self._write_lock:
+            out = self.out if self.out is not None else sys.stdout
+            out.write(line)
+            out.flush()
@@ -2,10 +2,17 @@
 # Copyright © 2020 pyddcci Rui Pinheiro
 
 from .base import CliCommand
-from .filter import FilterCliCommandMixin
-from .code import CodeCliCommandMixin
-from .value import ValueCliCommandMixin, ValuesCliCommandMixin
-from .get import GetCliCommand
-from .set import SetCliCommand
-from .multi_set import MultiSetCliCommand
-from .toggle import ToggleCliCommand
\ No newline at end of file
+
+# Everything else pulls in monitor, filter and VCP code, so it is only imported on first access (or when a command of
+# that type is created, see CliCommand.CLI_COMMAND_TYPES)
+from app.util.lazy import LazyGlobals, lazy_import
+__getattr__ = LazyGlobals(globals(),
+    FilterCliCommandMixin = lazy_import('.filter'   , 'FilterCliCommandMixin', __name__),
+    CodeCliCommandMixin   = lazy_import('.code'     , 'CodeCliCommandMixin'  , __name__),
+    ValueCliCommandMixin  = lazy_import('.value'    , 'ValueCliCommandMixin' , __name__),
+    ValuesCliCommandMixin = lazy_import('.value'    , 'ValuesCliCommandMixin', __name__),
+    GetCliCommand         = lazy_import('.get'      , 'GetCliCommand'        , __name__),
+    SetCliCommand         = lazy_import('.set'      , 'SetCliCommand'        , __name__),
+    MultiSetCliCommand    = lazy_import('.multi_set', 'MultiSetCliCommand'   , __name__),
+    ToggleCliCommand      = lazy_import('.toggle'   , 'ToggleCliCommand'     , __name__),
+)
@@ -6,6 +6,8 @@ Base class for CLI commands and command factory logic.
 Defines the interface for CLI commands and provides factory methods for instantiation from argparse.
 """
 
+import importlib
+
 from typing import Dict, Any
 from abc import ABCMeta, abstractmethod
 
@@ -16,7 +18,33 @@ class CliCommand(LoggableMixin, metaclass=ABCMeta):
     Abstract base class for CLI commands.
     Provides factory methods and interface for execution, to be implemented by command subclasses.
     """
-    CLI_COMMAND_TYPES = {}
+    # Command type to command class. Entries initially hold the name of the module implementing the command type
+    # (relative to this package), which is only imported when a command of that type is first created. Importing the
+    # module registers the command class, replacing its entry.
+    CLI_COMMAND_TYPES : Dict[str, type['CliCommand'] | str] = {
+        'get'      : '.get',
+        'set'      : '.set',
+        'multi-set': '.multi_set',
+        'toggle'   : '.toggle',
+    }
+
+    @classmethod
+    def get_command_type(cls, typ : str) -> type['CliCommand'] | None:
+        """
+        Get the class implementing a command type, importing its module if necessary.
+
+        Args:
+            typ: The command type, e.g. 'get'.
+
+        Returns:
+            type or None: The command class, or None if the command type is invalid.
+        """
+        _cls = cls.CLI_COMMAND_TYPES.get(typ, None)
+        if isinstance(_cls, str):
+            importlib.import_module(_cls, __package__)
+            _cls = cls.CLI_COMMAND_TYPES[typ]
+            assert not isinstance(_cls, str), f"Module for command type '{typ}' did not register it"
+        return _cls
 
     @classmethod
     def constructor_args_from_argparse(cls) -> Dict[str, Any]:
@@ -52,7 +80,7 @@ class CliCommand(LoggableMixin, metaclass=ABCMeta):
         command = dict(command)
         typ = command.pop('type')
 
-        _cls = cls.CLI_COMMAND_TYPES.get(typ, None)
+        _cls = cls.get_command_type(typ)
         if _cls is None:
             raise ValueError(f"Invalid command type '{typ}'")
 
@@ -60,8 +88,43 @@ class CliCommand(LoggableMixin, metaclass=ABCMeta):
         return _cls(**construct_args)
 
     @abstractmethod
+    def run(self) -> Any:
+        """
+        Run the CLI command. Must be implemented by subclasses.
+
+        Returns:
+            Any: The command result, passed to format() and serialize().
+        """
+        pass
+
+    def format(self, result : Any) -> str | None:
+        """
+        Format a result of run() for console output.
+
+        Args:
+            result: The command result.
+
+        Returns:
+            str or None: The text to print, or None to print nothing.
+        """
+        return None
+
+    def serialize(self, result : Any) -> Any:
+        """
+        Convert a result of run() into a JSON-serializable object, for machine-readable output.
+
+        Args:
+            result: The command result.
+
+        Returns:
+            Any: The serialized result.
+        """
+        return None
+
     def execute(self) -> None:
         """
-        Execute the CLI command. Must be implemented by subclasses.
+        Execute the CLI command, printing its formatted result.
         """
-        pass
\ No newline at end of file
+        text = self.format(self.run())
+        if text is not None:
+            print(text)
\ No newline at end of file
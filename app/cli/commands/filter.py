@@ -1,25 +1,29 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from abc import ABCMeta
 
 from app.ddcci.monitor import Monitor
-from app.ddcci.monitor_filter import BaseMonitorFilter, create_monitor_filter_from
+from app.ddcci.monitor_filter import BaseMonitorFilter
 
 class FilterCliCommandMixin(metaclass=ABCMeta):
     """
     Mixin for CLI commands that operate on a monitor filter.
-    Resolves and validates the filter argument for the command, and creates a Monitor instance.
+    Resolves and validates the filter argument for the command, and looks up its shared Monitor instance.
     """
-    def __init__(self, filter : BaseMonitorFilter, *args, **kwargs):
+
+    def __init__(self, filter : BaseMonitorFilter, *args, monitor : Optional[Monitor] = None, **kwargs):
         """
-        Initialize the mixin and create a Monitor instance for the filter.
+        Initialize the mixin and look up the shared Monitor instance for the filter.
         Args:
             filter: The monitor filter to use.
+            monitor: Existing Monitor instance for the filter, if any.
         """
+        from app.ddcci.monitor_registry import MONITOR_REGISTRY
+
         self.filter  = filter
-        self.monitor = Monitor(filter)
+        self.monitor = monitor if monitor is not None else MONITOR_REGISTRY.get(filter)
 
         super().__init__(*args, **kwargs)
 
@@ -33,9 +37,14 @@ class FilterCliCommandMixin(metaclass=ABCMeta):
         Returns:
             dict: Constructor arguments.
         """
+        from app.ddcci.monitor_registry import MONITOR_REGISTRY
+
         d = super(FilterCliCommandMixin, cls).constructor_args_from_argparse(*args, **kwargs)
 
-        filter = create_monitor_filter_from(filter)
-        d['filter']  = filter
+        # Commands using equivalent filters share the same Monitor, so each monitor's codes are only loaded once
+        monitor = MONITOR_REGISTRY.get(filter)
+
+        d['filter']  = monitor.filter
+        d['monitor'] = monitor
 
         return d
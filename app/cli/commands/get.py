@@ -7,6 +7,7 @@
 from typing import Dict, Any
 
 from . import CliCommand, FilterCliCommandMixin, CodeCliCommandMixin
+from ...ddcci.vcp.value import VcpValue
 
 class GetCliCommand(FilterCliCommandMixin, CodeCliCommandMixin, CliCommand):
     """
@@ -40,15 +41,21 @@ class GetCliCommand(FilterCliCommandMixin, CodeCliCommandMixin, CliCommand):
 
 
     # Execute
-    def execute(self) -> None:
+    def run(self) -> VcpValue:
         """
-        Execute the get command: read and print the VCP value from the monitor.
+        Execute the get command: read the VCP value from the monitor.
+        Returns:
+            VcpValue: The value read.
         """
-        value = self.monitor.vcp_read(self.code)
+        return self.monitor.vcp_read(self.code)
 
+    def format(self, result : VcpValue) -> str:
         if self.raw:
-            print(value.value)
+            return str(result.value)
         else:
-            print(value)
+            return str(result)
+
+    def serialize(self, result : VcpValue) -> Dict[str, Any]:
+        return {'value': result.value, 'name': result.name if result.has_name else None}
 
 CliCommand.CLI_COMMAND_TYPES['get'] = GetCliCommand
\ No newline at end of file
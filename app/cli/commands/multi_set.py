@@ -40,7 +40,7 @@ class MultiSetCliCommand(FilterCliCommandMixin, CodeCliCommandMixin, ValuesCliCo
 
 
     # Execute
-    def execute(self) -> None:
+    def run(self) -> None:
         """
         Execute the multi-set command: write each VCP value in sequence to the monitor.
         """
@@ -40,7 +40,7 @@ class SetCliCommand(FilterCliCommandMixin, CodeCliCommandMixin, ValueCliCommandM
 
 
     # Execute
-    def execute(self) -> None:
+    def run(self) -> None:
         """
         Execute the set command: write the VCP value to the monitor.
         """
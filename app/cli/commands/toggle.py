@@ -40,7 +40,7 @@ class ToggleCliCommand(FilterCliCommandMixin, CodeCliCommandMixin, ValuesCliComm
 
 
     # Execute
-    def execute(self) -> None:
+    def run(self) -> None:
         """
         Execute the toggle command: cycle the VCP value on the monitor.
         """
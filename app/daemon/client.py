@@ -0,0 +1,238 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Thin client for the pyddcci daemon, used by the CLI to forward commands to a running daemon.
+"""
+
+import sys
+import json
+import socket
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from app.util import CFG
+from app.util.mixins import LoggableMixin
+
+from . import endpoint
+
+
+class DaemonClient(LoggableMixin):
+    """
+    Connection to a running daemon. See app.daemon.server for the protocol.
+    """
+
+    def __init__(self, sock : socket.socket, token : str):
+        """
+        Args:
+            sock: Socket connected to the daemon.
+            token: The daemon's token.
+        """
+        super().__init__()
+
+        self.sock  = sock
+        self.file  = sock.makefile('rwb')
+        self.token = token
+
+        # Number of replies received so far, i.e. whether the daemon may already have done (and output) something
+        self.replies = 0
+
+    @classmethod
+    def connect(cls, directory : Optional[str] = None, timeout : Optional[float] = None) -> Optional['DaemonClient']:
+        """
+        Connect to the running daemon, if there is one.
+
+        Args:
+            directory: The data directory. Defaults to 'app.dirs.data'.
+            timeout: Socket timeout in seconds. Defaults to 'daemon.timeout'.
+
+        Returns:
+            DaemonClient or None: The client, or None if no daemon is reachable.
+        """
+        info = endpoint.read_endpoint(directory)
+        if info is None:
+            return None
+
+        try:
+            sock = endpoint.connect(info, timeout=timeout if timeout is not None else CFG.daemon.timeout)
+        except (OSError, KeyError, TypeError, ValueError):
+            # Stale endpoint file, e.g. the daemon was killed
+            return None
+
+        return cls(sock, info.get('token', ''))
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, typ, value, traceback) -> None:
+        self.close()
+
+
+    # Requests
+    def request(self, op : str, **kwargs : Any) -> Iterator[Dict[str, Any]]:
+        """
+        Send a request to the daemon.
+
+        Args:
+            op: The operation.
+            kwargs: Additional request fields.
+
+        Returns:
+            Iterator[dict]: The replies, up to and including the final one (with key 'done').
+
+        Raises:
+            ConnectionError: If the daemon closes the connection early.
+            OSError: If the daemon cannot be reached, or does not reply in time (socket.timeout).
+            ValueError: If the reply is not a JSON object, e.g. the endpoint is now used by another process.
+        """
+        self.file.write(json.dumps({'token': self.token, 'op': op, **kwargs}).encode('utf-8') + b'\n')
+        self.file.flush()
+
+        while True:
+            line = self.file.readline()
+            if not line:
+                raise ConnectionError("Daemon closed the connection")
+
+            reply = json.loads(line)
+            if not isinstance(reply, dict):
+                raise ValueError(f"Invalid daemon reply: {line!r}")
+
+            self.replies += 1
+            yield reply
+
+            if reply.get('done', False):
+                return
+
+    def ping(self) -> bool:
+        return all(reply['ok'] for reply in self.request('ping'))
+
+    def shutdown(self) -> bool:
+        return all(reply['ok'] for reply in self.request('shutdown'))
+
+    def execute_commands(self, commands : List[Dict], ignore_errors : bool = False) -> bool:
+        """
+        Run parsed CLI commands (as in 'app.cli.commands') in the daemon, printing their output like CliCommands does.
+
+        Args:
+            commands: The parsed commands.
+            ignore_errors: Whether to carry on after a failed command.
+
+        Returns:
+            bool: True if all commands succeeded.
+        """
+        ok = True
+
+        for reply in self.request('commands', commands=commands, ignore_errors=ignore_errors):
+            if reply.get('done', False):
+                if 'error' in reply:
+                    self.log.error(f"Daemon error: {reply['error']}")
+                return ok and reply['ok']
+
+            if reply['ok']:
+                if reply.get('text', None) is not None:
+                    print(reply['text'])
+            else:
+                ok = False
+                self.log.error(f"Error executing command '{reply['command']}': {reply['error']}.")
+
+        return ok
+
+    def execute_batch(self, lines : Iterable[str], out : Optional[TextIO] = None, ignore_errors : bool = False) -> bool:
+        """
+        Run batch command lines in the daemon, writing the result records as JSON lines like CliBatch does.
+
+        Args:
+            lines: The command lines.
+            out: Where to write the JSON lines. Defaults to sys.stdout.
+            ignore_errors: Whether to carry on after a failed command.
+
+        Returns:
+            bool: True if all commands succeeded.
+        """
+        out = out if out is not None else sys.stdout
+
+        for reply in self.request('batch', lines=list(lines), ignore_errors=ignore_errors):
+            if reply.get('done', False):
+                if 'error' in reply:
+                    self.log.error(f"Daemon error: {reply['error']}")
+                return reply['ok']
+
+            out.write(json.dumps(reply) + '\n')
+            out.flush()
+
+        return False
+
+
+def forward_cli() -> Optional[bool]:
+    """
+    Forward the CLI commands (and batch) given on the command line to a running daemon.
+
+    If the daemon fails before replying (e.g. a stale endpoint whose port was reused, or a hung daemon), the commands run
+    locally instead. Once it has replied, commands may already have run and output been written, so they are not retried.
+
+    Returns:
+        bool or None: None if there is no daemon to forward to (the commands should run locally), otherwise whether all
+            commands succeeded.
+    """
+    cli = CFG.app.cli
+    # Other modes (e.g. '--dump') are not supported by the daemon, so the whole command line runs locally
+    if cli.get('daemon', False) or cli.get('no_daemon', False) or cli.get('list_monitors', False) or not CFG.daemon.forward \
+            or cli.get('dump', None) is not None or cli.get('watch', None) is not None or cli.get('plan', False):
+        return None
+
+    commands = cli.get('commands', None) or []
+    batch = cli.get('batch', None)
+    if not commands and batch is None:
+        return None
+
+    client = DaemonClient.connect()
+    if client is None:
+        return None
+
+    with client:
+        ignore_errors = bool(cli.ignore_errors)
+
+        try:
+            ok = client.execute_commands(commands, ignore_errors=ignore_errors) if commands else True
+        except (OSError, ValueError) as e:
+            return _daemon_failed(client, e)
+        if not ok and not ignore_errors:
+            return False
+
+        if batch is not None:
+            if batch == '-':
+                lines = sys.stdin.readlines()
+            else:
+                with open(batch, 'r') as file:
+                    lines = file.readlines()
+
+            try:
+                ok = client.execute_batch(lines, ignore_errors=ignore_errors) and ok
+            except (OSError, ValueError) as e:
+                # The batch cannot be read from stdin again when running locally
+                return _daemon_failed(client, e, local=(batch != '-'))
+
+    return ok
+
+def _daemon_failed(client : DaemonClient, e : Exception, local : bool = True) -> Optional[bool]:
+    """
+    Handle a failed request to the daemon while forwarding the CLI.
+
+    Args:
+        client: The client.
+        e: The exception raised by the request.
+        local: Whether the commands can still run locally.
+
+    Returns:
+        bool or None: None if the commands should run locally, False otherwise.
+    """
+    if local and client.replies == 0:
+        client.log.warning(f"Daemon did not reply, running commands locally: {repr(e)}")
+        return None
+
+    client.log.error(f"Error communicating with the daemon: {repr(e)}")
+    return False
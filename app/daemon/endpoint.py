@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Daemon endpoint description, shared by the daemon and its clients.
+
+A running daemon describes how to reach it in an endpoint file in the data directory: the socket family and address,
+and a random token clients must present. The file is only readable by its owner.
+"""
+
+import os
+import json
+import socket
+
+from typing import Any, Dict, Optional
+
+from app.util import CFG
+from app.util.atomic_write import atomic_write
+
+
+# File names, relative to the data directory
+ENDPOINT_FILE = 'pyddcci.daemon'
+SOCKET_FILE   = 'pyddcci.sock'
+
+# Whether this platform supports Unix domain sockets
+HAS_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
+
+
+def get_directory(directory : Optional[str] = None) -> str:
+    return directory if directory is not None else CFG.app.dirs.data
+
+def get_family(family : Optional[str] = None) -> str:
+    """
+    Args:
+        family: 'unix', 'tcp' or 'auto'. Defaults to 'daemon.family'.
+
+    Returns:
+        str: The socket family to use, 'unix' or 'tcp'.
+    """
+    if family is None:
+        family = CFG.daemon.family
+
+    if family == 'auto':
+        return 'unix' if HAS_UNIX_SOCKETS else 'tcp'
+    if family == 'unix' and not HAS_UNIX_SOCKETS:
+        raise ValueError("Unix domain sockets are not supported on this platform")
+    if family not in ('unix', 'tcp'):
+        raise ValueError(f"Invalid daemon socket family '{family}'")
+    return family
+
+
+def read_endpoint(directory : Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Args:
+        directory: The data directory. Defaults to 'app.dirs.data'.
+
+    Returns:
+        dict or None: The endpoint of the running daemon, or None if there is none.
+    """
+    try:
+        with open(os.path.join(get_directory(directory), ENDPOINT_FILE), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def write_endpoint(endpoint : Dict[str, Any], directory : Optional[str] = None) -> None:
+    atomic_write(os.path.join(get_directory(directory), ENDPOINT_FILE), json.dumps(endpoint))
+
+def remove_endpoint(directory : Optional[str] = None) -> None:
+    try:
+        os.unlink(os.path.join(get_directory(directory), ENDPOINT_FILE))
+    except FileNotFoundError:
+        pass
+
+
+def connect(endpoint : Dict[str, Any], timeout : Optional[float] = None) -> socket.socket:
+    """
+    Connect to a daemon endpoint.
+
+    Args:
+        endpoint: The endpoint, see read_endpoint().
+        timeout: Socket timeout in seconds.
+
+    Returns:
+        socket.socket: The connected socket.
+
+    Raises:
+        OSError: If the daemon cannot be reached.
+    """
+    if endpoint['family'] == 'unix':
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = endpoint['address']
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = tuple(endpoint['address'])
+
+    try:
+        sock.settimeout(timeout)
+        sock.connect(address)
+    except BaseException:
+        sock.close()
+        raise
+
+    return sock
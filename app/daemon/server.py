@@ -0,0 +1,207 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Resident pyddcci daemon ('--daemon').
+
+Keeps the monitor list, open OS handles, Monitor instances (with their codes and capabilities) and the monitor
+configuration in memory, and runs CLI commands on behalf of clients over a local socket.
+
+Protocol: clients send one JSON object per line, e.g. {"token": ..., "op": "commands", "commands": [...]}, and receive
+one JSON object per line in return: a result record per command (see CliBatch), followed by {"done": true, "ok": ...}.
+Supported operations are 'ping', 'commands' (parsed commands, as in 'app.cli.commands'), 'batch' (command lines) and
+'shutdown'.
+"""
+
+import os
+import hmac
+import json
+import socket
+import secrets
+import threading
+import socketserver
+
+from typing import Any, Dict, Iterator, Optional
+
+from app.util import CFG
+from app.util.mixins import LoggableMixin
+
+from . import endpoint
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles a client connection, which may send several requests.
+
+    Requests are handled one at a time, so the connection is closed if the client does not send its next request (or
+    read our replies) within the daemon's idle timeout.
+    """
+    def setup(self) -> None:
+        self.timeout = self.server.daemon.idle_timeout # type: ignore - set by DaemonServer
+        super().setup()
+
+    def handle(self) -> None:
+        try:
+            self._handle()
+        except socket.timeout:
+            self.server.daemon.log.info("Closing idle client connection") # type: ignore - set by DaemonServer
+
+    def _handle(self) -> None:
+        daemon : DaemonServer = self.server.daemon # type: ignore - set by DaemonServer
+
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                self._reply({'done': True, 'ok': False, 'error': f"Invalid request: {e}"})
+                return
+
+            if not hmac.compare_digest(str(request.get('token', '')), daemon.token):
+                self._reply({'done': True, 'ok': False, 'error': "Invalid token"})
+                return
+
+            for reply in daemon.handle(request):
+                self._reply(reply)
+
+    def _reply(self, reply : Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+class _TcpServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class DaemonServer(LoggableMixin):
+    """
+    The daemon. Requests are handled one at a time, as DDC/CI access to monitors is serial anyway.
+    """
+
+    def __init__(self, directory : Optional[str] = None, family : Optional[str] = None, port : Optional[int] = None, idle_timeout : Optional[float] = None):
+        """
+        Args:
+            directory: Directory for the endpoint file and Unix socket. Defaults to 'app.dirs.data'.
+            family: 'unix', 'tcp' or 'auto'. Defaults to 'daemon.family'.
+            port: TCP port. Defaults to 'daemon.port'.
+            idle_timeout: Seconds to wait for a client's next request. Defaults to 'daemon.idle_timeout'.
+        """
+        super().__init__()
+
+        self.directory    = endpoint.get_directory(directory)
+        self.family       = endpoint.get_family(family)
+        self.port         = port if port is not None else CFG.daemon.port
+        self.idle_timeout = idle_timeout if idle_timeout is not None else CFG.daemon.idle_timeout
+        self.token        = secrets.token_hex(16)
+
+        self.server : Optional[socketserver.BaseServer] = None
+        self.socket_path : Optional[str] = None
+
+
+    # Lifecycle
+    def start(self) -> None:
+        """
+        Bind the socket and publish the endpoint file. Call serve_forever() afterwards.
+        """
+        if self.family == 'unix':
+            self.socket_path = os.path.join(self.directory, endpoint.SOCKET_FILE)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+            self.server = socketserver.UnixStreamServer(self.socket_path, DaemonRequestHandler)
+            os.chmod(self.socket_path, 0o600)
+            address = self.socket_path
+        else:
+            self.server = _TcpServer(('127.0.0.1', self.port), DaemonRequestHandler)
+            address = list(self.server.server_address)
+
+        self.server.daemon = self # type: ignore - used by DaemonRequestHandler
+
+        endpoint.write_endpoint({'family': self.family, 'address': address, 'token': self.token, 'pid': os.getpid()}, self.directory)
+        self.log.info(f"Listening on {self.family} socket {address}")
+
+    def serve_forever(self) -> None:
+        """
+        Serve requests until shutdown() is called (or a 'shutdown' request is received), then clean up.
+        """
+        from app.ddcci.os import OS_MONITORS
+
+        if self.server is None:
+            self.start()
+
+        OS_MONITORS.hold_handles(True)
+        try:
+            self.server.serve_forever()
+        finally:
+            OS_MONITORS.hold_handles(False)
+            self.close()
+
+    def shutdown(self) -> None:
+        """
+        Stop serve_forever(). Must be called from a different thread.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+
+    def close(self) -> None:
+        """
+        Close the socket and remove the endpoint file.
+        """
+        if self.server is None:
+            return
+
+        self.server.server_close()
+        self.server = None
+
+        # Only remove the endpoint if it is still ours
+        current = endpoint.read_endpoint(self.directory)
+        if current is not None and current.get('token', None) == self.token:
+            endpoint.remove_endpoint(self.directory)
+
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+    # Requests
+    def handle(self, request : Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Handle a request.
+        Args:
+            request: The decoded request.
+        Returns:
+            Iterator[dict]: The replies.
+        """
+        from app.cli.cli_batch import CliBatch
+
+        op = request.get('op', None)
+        ignore_errors = bool(request.get('ignore_errors', False))
+
+        if op == 'ping':
+            yield {'done': True, 'ok': True, 'pid': os.getpid()}
+            return
+
+        if op == 'shutdown':
+            yield {'done': True, 'ok': True}
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return
+
+        if op == 'commands':
+            records = CliBatch(ignore_errors=ignore_errors, text=True).command_records(request.get('commands', []))
+        elif op == 'batch':
+            records = CliBatch(ignore_errors=ignore_errors, text=bool(request.get('text', False))).records(request.get('lines', []))
+        else:
+            yield {'done': True, 'ok': False, 'error': f"Invalid operation '{op}'"}
+            return
+
+        ok = True
+        try:
+            for record in records:
+                ok = ok and record['ok']
+                yield record
+        except Exception as e:
+            self.log.error(f"Error handling '{op}' request: {repr(e)}")
+            yield {'done': True, 'ok': False, 'error': repr(e)}
+            return
+
+        yield {'done': True, 'ok': ok}
@@ -1,9 +1,15 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
-from typing import Union, Dict
+import copy
+import time
+import heapq
+import threading
 
-from .os import OS_MONITORS, OsMonitor
+from typing import Union, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from .os import BaseOsMonitor
+from .os.monitor import VcpError
 from .vcp.code import VcpCode
 from .vcp.value import VcpValue
 from .vcp.reply import VcpReply
@@ -47,7 +53,7 @@ class Monitor(Namespace, LoggableMixin, HierarchicalMixin, NamedMixin):
 
 
     # Os Monitor
-    def get_os_monitor(self, enumerate=True) -> OsMonitor:
+    def get_os_monitor(self, enumerate=True) -> BaseOsMonitor:
         """
         Return the OS monitor object matching this monitor's filter.
         Args:
@@ -57,6 +63,8 @@ class Monitor(Namespace, LoggableMixin, HierarchicalMixin, NamedMixin):
         Raises:
             RuntimeError: If no monitor matches the filter.
         """
+        from .os import OS_MONITORS
+
         if enumerate:
             OS_MONITORS.enumerate()
 
@@ -84,14 +92,14 @@ class Monitor(Namespace, LoggableMixin, HierarchicalMixin, NamedMixin):
         if self._codes is None:
             try:
                 imported_codes = False
-                if CFG.monitors.codes.automatic_import:
+                if CFG.snapshot().monitors.codes.automatic_import:
                     imported_codes = self.import_codes()
 
                 if not imported_codes:
                     self._codes = VcpCodeStorage(instance_parent=self)
                     self._codes.copy_storage(vcp_spec.VCP_SPEC)
 
-                    if CFG.monitors.capabilities.automatic:
+                    if CFG.snapshot().monitors.capabilities.automatic:
                         self.load_capabilities()
             except AttributeError as e:
                 raise RuntimeError() from e
@@ -106,9 +114,16 @@ class Monitor(Namespace, LoggableMixin, HierarchicalMixin, NamedMixin):
         Export the current VCP code configuration to the monitor config file.
         """
         from .monitor_config import MONITOR_CONFIG
-        cfg = MONITOR_CONFIG.get(self.filter, add=True)
-        cfg['codes'] = self._export_codes()
-        MONITOR_CONFIG.save()
+        codes = self._export_codes()
+
+        # Serialization results are cached until the codes change, so an unchanged table is usually the very same object
+        cfg = MONITOR_CONFIG.get(self.filter, add=False)
+        if cfg is not None and cfg.get('codes', None) == codes:
+            return
+
+        # Store a copy, so that changes to the config entry (e.g. merging the file on disk) do not change the cache
+        with MONITOR_CONFIG.edit(self.filter) as cfg:
+            cfg['codes'] = copy.deepcopy(codes)
 
     def _import_codes(self, data : Dict) -> None:
         self._codes = VcpCodeStorage.deserialize_construct(data, diff=vcp_spec.VCP_SPEC, instance_parent=self)
@@ -234,6 +249,118 @@ class Monitor(Namespace, LoggableMixin, HierarchicalMixin, NamedMixin):
         self.vcp_write_raw(code.code, value.value, *args, **kwargs)
 
 
+    # Dump
+    def dump(self, codes : Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Read many VCP codes, by default every code the monitor advertises in its capabilities. The monitors are enumerated
+        once and the OS handle is kept open throughout (see OsMonitorList.batch).
+        Args:
+            codes: The raw VCP codes to read. Defaults to the codes in the monitor's capabilities, in ascending order.
+        Returns:
+            Iterator[dict]: A record per code, as soon as it has been read, with keys 'code', 'names', 'type', 'current',
+                'maximum' and 'error'. Failed reads have an 'error' message and None for the reply fields.
+        """
+        from .os import OS_MONITORS
+
+        with OS_MONITORS.batch():
+            os_monitor = self.get_os_monitor()
+            if codes is None:
+                codes = sorted((os_monitor.capabilities.get_vcp_codes() or {}).keys())
+
+            table = self._get_read_only_codes()
+
+            for code_i in codes:
+                try:
+                    names = list(table.get(code_i, add=False).names)
+                except KeyError:
+                    names = []
+
+                record : Dict[str, Any] = {'code': code_i, 'names': names, 'type': None, 'current': None, 'maximum': None, 'error': None}
+
+                try:
+                    reply = os_monitor.vcp_query(code_i)
+                    record.update(type=reply.type.name, current=reply.current, maximum=reply.maximum)
+                except VcpError as e:
+                    record['error'] = f"{e}: {e.__cause__}" if e.__cause__ is not None else str(e)
+
+                yield record
+
+
+    # Watch
+    def watch(self, codes : Iterable[T_VcpCodeIdentifier], interval : Optional[float] = None, backoff : Optional[float] = None,
+              max_interval : Optional[float] = None, bus_gap : Optional[float] = None,
+              stop : Optional[threading.Event] = None) -> Iterator[Tuple[VcpCode, VcpValue]]:
+        """
+        Watch VCP codes for changes, yielding only when a value changes (and once initially for every code).
+
+        Each code is read on its own schedule. Every read that finds a code unchanged backs off its next read by 'backoff',
+        up to 'max_interval', so codes that rarely change put little load on the bus, while a change resets the code's
+        interval to 'interval'. Reads are spaced at least 'bus_gap' seconds apart. The monitors are enumerated once and
+        the OS handle is kept open throughout (see OsMonitorList.batch).
+
+        Args:
+            codes: The VCP codes to watch.
+            interval: Seconds between reads of a code that changes. Defaults to 'monitors.watch.interval'.
+            backoff: Factor applied to a code's interval after every unchanged read. Defaults to 'monitors.watch.backoff'.
+            max_interval: Maximum seconds between reads of a code. Defaults to 'monitors.watch.max_interval'.
+            bus_gap: Minimum seconds between reads. Defaults to 'monitors.watch.bus_gap'.
+            stop: If given, watching stops once this event is set. Otherwise, it stops when the generator is closed.
+
+        Returns:
+            Iterator[tuple]: (VcpCode, VcpValue) for every change.
+        """
+        from .os import OS_MONITORS
+
+        config = CFG.snapshot().monitors.watch
+        interval     = interval     if interval     is not None else config.interval
+        backoff      = backoff      if backoff      is not None else config.backoff
+        max_interval = max_interval if max_interval is not None else config.max_interval
+        bus_gap      = bus_gap      if bus_gap      is not None else config.bus_gap
+        stop         = stop         if stop         is not None else threading.Event()
+
+        codes = [self._to_vcp_code(code_id) for code_id in codes]
+
+        # Per code: current interval and last value read
+        intervals : Dict[int, float] = {code.code: interval for code in codes}
+        values    : Dict[int, Optional[int]] = {code.code: None for code in codes}
+
+        # (due time, position, code), so that codes due at the same time are read in the given order
+        schedule = [(0.0, i, code) for i, code in enumerate(codes)]
+        heapq.heapify(schedule)
+
+        with OS_MONITORS.batch():
+            os_monitor = self.get_os_monitor()
+            last_read = None
+
+            while schedule and not stop.is_set():
+                due, i, code = schedule[0]
+
+                now = time.monotonic()
+                if last_read is not None:
+                    due = max(due, last_read + bus_gap)
+                if due > now:
+                    stop.wait(due - now)
+                    continue
+
+                heapq.heappop(schedule)
+                last_read = time.monotonic()
+
+                try:
+                    value = os_monitor.vcp_read(code.code)
+                except VcpError as e:
+                    self.log.debug(f"Failed to read 0x{code.code:X} while watching: {e}")
+                    value = None
+
+                if value is not None and value != values[code.code]:
+                    values[code.code] = value
+                    intervals[code.code] = interval
+                    yield code, code[value]
+                else:
+                    intervals[code.code] = min(intervals[code.code] * backoff, max_interval)
+
+                heapq.heappush(schedule, (last_read + intervals[code.code], i, code))
+
+
     # Magic methods (wrap VCP read/write)
     def __getitem__(self, code_id: T_VcpCodeIdentifier) -> VcpValue:
         """
@@ -2,15 +2,21 @@
 # Copyright © 2020 pyddcci Rui Pinheiro
 
 import os
-import oyaml as yaml
+import atexit
+import threading
+import contextlib
 
-from typing import List, Dict, Union, Optional
+from typing import Iterator, List, Dict, Set, Union, Optional, Tuple
 from collections import OrderedDict
 
 from app.util import CFG, NamespaceSet, NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMixin
+from app.util.atomic_write import atomic_write
+from app.util.yaml_cache import load_yaml
+from app.util.file_lock import file_lock
+from app.util.lazy import LazyGlobals
 
 from .monitor_filter import MonitorInfoMonitorFilter, OsMonitorMonitorFilter, BaseMonitorFilter
-from .os import OS_MONITORS, OsMonitor
+from .os import BaseOsMonitor
 
 
 
@@ -26,10 +32,72 @@ class MonitorConfigEntry(NamespaceMap, LoggableMixin, HierarchicalMixin):
     def __init__(self, filter : Union[Dict, BaseMonitorFilter], instance_parent=None, **kwargs):
         super().__init__(instance_parent=instance_parent)
 
+        # Cached YAML fragment for this entry, None if it needs to be re-serialized
+        self._yaml : Optional[str] = None
+
+        # Keys modified by this process since the entry was last loaded from or written to disk, see MonitorConfig.write()
+        self._dirty : Set[str] = set()
+        # Whether this entry was created by this process, rather than loaded from disk
+        self._new = True
+
         self.merge(kwargs)
         self.filter = filter
 
 
+    # Modification tracking
+    def _modified(self, key) -> None:
+        self._yaml = None
+        # Filter changes are tracked by the filter setter
+        if key != 'filter':
+            self._dirty.add(key)
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        if key[0] != '_':
+            self._modified(key)
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        if key[0] != '_':
+            self._modified(key)
+
+    def __setattr__(self, key, value) -> None:
+        super().__setattr__(key, value)
+        if key[0] != '_':
+            self._modified(key)
+
+    def __delattr__(self, key) -> None:
+        super().__delattr__(key)
+        if key[0] != '_':
+            self._modified(key)
+
+    def _mark_clean(self) -> None:
+        """
+        Mark this entry as being in sync with the file on disk.
+        """
+        self._dirty = set()
+        self._new = False
+
+    def _merge_from_disk(self, other : 'MonitorConfigEntry') -> None:
+        """
+        Merge the on-disk version of this entry into it.
+        Keys modified by this process keep their local value (or stay deleted), all other keys take the on-disk value.
+        Args:
+            other: The entry as loaded from disk.
+        """
+        dirty = self._dirty
+
+        for k in list(self.keys()):
+            if k not in dirty and k not in other:
+                super().__delitem__(k)
+                self._yaml = None
+
+        for k, v in other.items():
+            if k not in dirty and (k not in self or self[k] != v):
+                super().__setitem__(k, v)
+                self._yaml = None
+
+
     # Filter
     @property
     def filter(self) -> BaseMonitorFilter:
@@ -48,7 +116,20 @@ class MonitorConfigEntry(NamespaceMap, LoggableMixin, HierarchicalMixin):
         """
         if isinstance(new_filter, Dict):
             new_filter = BaseMonitorFilter.deserialize(new_filter, instance_parent=self)
+
+        reindex = hasattr(self, '_filter')
+        old_filter = self._filter if reindex else None
         self._filter : BaseMonitorFilter = new_filter
+        self._yaml = None
+
+        if reindex and isinstance(self.instance_parent, MonitorConfig):
+            # Keep the parent's lookup index in sync
+            self.instance_parent._rebuild_index()
+
+            # On disk, this is equivalent to removing the old entry and adding a new one
+            self.instance_parent._removed.append(old_filter)
+            self._new = True
+            self._dirty.update(self.keys())
 
 
     def get_os_monitor(self, enumerate=True):
@@ -59,6 +140,8 @@ class MonitorConfigEntry(NamespaceMap, LoggableMixin, HierarchicalMixin):
         Returns:
             OsMonitor: The matched OS monitor object.
         """
+        from .os import OS_MONITORS
+
         if enumerate:
             OS_MONITORS.enumerate()
 
@@ -116,6 +199,18 @@ class MonitorConfigEntry(NamespaceMap, LoggableMixin, HierarchicalMixin):
 
         return cls(**data, instance_parent=instance_parent)
 
+    def yaml_str(self) -> str:
+        """
+        Get the YAML representation of this entry, as an item of the monitor configuration list.
+        The result is cached until the entry is modified.
+        Returns:
+            str: The YAML string.
+        """
+        if self._yaml is None:
+            import oyaml as yaml
+            self._yaml = yaml.dump([self.serialize()])
+        return self._yaml
+
 
 
 class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
@@ -131,11 +226,86 @@ class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
     def __init__(self, file_path=os.path.join(CFG.app.dirs.data, 'monitors.yaml'), instance_name=None, instance_parent=None):
         super().__init__(instance_name=instance_name, instance_parent=instance_parent)
 
+        self._index : Dict[Tuple, MonitorConfigEntry] = {}
+
+        # Filters of entries removed by this process, and (modification time, size) of the file when we last synced with
+        # it, see write()
+        self._removed   : List[BaseMonitorFilter] = []
+        self._file_stat : Optional[Tuple[int, int]] = None
+
+        # Write-behind state, see save(). The lock also guards adding and removing entries, as monitors may be used from
+        # several threads (e.g. by parallel CLI commands)
+        self._save_lock    = threading.RLock()
+        self._save_timer   : Optional[threading.Timer] = None
+        self._save_pending = False
+
         self.file_path = file_path
         self.load()
 
+        # Make sure pending saves are written before exiting
+        if file_path is not None:
+            atexit.register(self.flush)
+
+
+    # Index
+    @staticmethod
+    def _identity(obj : Union[BaseMonitorFilter, BaseOsMonitor]) -> Optional[Tuple]:
+        """
+        Get the index key for a filter or OS monitor.
+        Args:
+            obj: The filter or OS monitor.
+        Returns:
+            tuple or None: The identity tuple, or None if 'obj' cannot be indexed (e.g. regex filters).
+        """
+        if isinstance(obj, BaseOsMonitor):
+            return MonitorInfoMonitorFilter.identity_of(obj)
+        if isinstance(obj, (MonitorInfoMonitorFilter, OsMonitorMonitorFilter)):
+            return obj.identity()
+        return None
+
+    def _index_entry(self, entry : MonitorConfigEntry) -> None:
+        identity = self._identity(entry.filter)
+        if identity is not None:
+            # The first matching entry wins, same as a linear scan would
+            self._index.setdefault(identity, entry)
+
+    def _rebuild_index(self) -> None:
+        self._index = {}
+        for entry in self:
+            self._index_entry(entry)
+
+    def _add_entry(self, entry : MonitorConfigEntry) -> None:
+        super().add(entry)
+        self._index_entry(entry)
+
+    def discard(self, entry : MonitorConfigEntry) -> None:
+        """
+        Remove a config entry.
+        Args:
+            entry: The entry to remove.
+        """
+        with self._save_lock:
+            # Make sure the removal is not undone when merging with the file on disk
+            if not entry._new:
+                self._removed.append(entry.filter)
+
+            self._discard_entry(entry)
+
+    def _discard_entry(self, entry : MonitorConfigEntry) -> None:
+        super().discard(entry)
+
+        identity = self._identity(entry.filter)
+        if identity is not None and self._index.get(identity, None) is entry:
+            del self._index[identity]
+
+            # Another entry with the same identity may now become visible
+            for other in self:
+                if self._identity(other.filter) == identity:
+                    self._index[identity] = other
+                    break
+
     # Add
-    def add(self, obj : Union[BaseMonitorFilter, OsMonitor]) -> None:
+    def add(self, obj : Union[BaseMonitorFilter, BaseOsMonitor]) -> None:
         """
         Add a monitor filter or OS monitor to the config.
         Args:
@@ -143,15 +313,16 @@ class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
         """
         filter = obj
 
-        if isinstance(obj, OsMonitor):
+        if isinstance(obj, BaseOsMonitor):
             filter = OsMonitorMonitorFilter(obj)
         if isinstance(filter, OsMonitorMonitorFilter):
             filter = filter.to_monitor_info_filter()
 
-        entry = MonitorConfigEntry(filter, instance_parent=self)
-        super().add(entry)
+        with self._save_lock:
+            entry = MonitorConfigEntry(filter, instance_parent=self)
+            self._add_entry(entry)
 
-    def get(self, obj : Union[BaseMonitorFilter, OsMonitor], add : bool = True) -> Optional[MonitorConfigEntry]:
+    def get(self, obj : Union[BaseMonitorFilter, BaseOsMonitor], add : bool = True) -> Optional[MonitorConfigEntry]:
         """
         Get the config entry for a given filter or OS monitor.
         Args:
@@ -160,26 +331,43 @@ class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
         Returns:
             MonitorConfigEntry or None: The found entry, or None if not found and add is False.
         """
-        if isinstance(obj, OsMonitor):
-            for entry in self:
-                if isinstance(entry.filter, (OsMonitorMonitorFilter, MonitorInfoMonitorFilter)) and entry.match(obj):
-                    return entry
-        else:
-            if isinstance(obj, OsMonitorMonitorFilter):
-                obj = obj.to_monitor_info_filter()
-
-            for entry in self:
-                if entry.filter == obj:
+        with self._save_lock:
+            # Filters identifying a single monitor (and monitors themselves) are looked up in the index, other filters
+            # can only be compared one by one
+            identity = self._identity(obj)
+            if identity is not None:
+                entry = self._index.get(identity, None)
+                if entry is not None:
                     return entry
+            else:
+                for entry in self:
+                    if entry.filter == obj:
+                        return entry
+
+            if add:
+                self.add(obj)
+                entry = self.get(obj, add=False)
+                if entry is None:
+                    raise RuntimeError("'entry' should never be None")
+                return entry
+
+            return None
+
+    @contextlib.contextmanager
+    def edit(self, obj : Union[BaseMonitorFilter, BaseOsMonitor]) -> Iterator[MonitorConfigEntry]:
+        """
+        Context manager for modifying the config entry of a given filter or OS monitor, which is added if not found.
 
-        if add:
-            self.add(obj)
-            entry = self.get(obj, add=False)
-            if entry is None:
-                raise RuntimeError("'entry' should never be None")
-            return entry
-
-        return None
+        Pending saves are written from a timer thread (see save()), so entries must only be modified within this context,
+        which holds the save lock until the changes are complete and then saves them.
+        Args:
+            obj: The filter or OS monitor to look up.
+        Returns:
+            MonitorConfigEntry: The entry to modify.
+        """
+        with self._save_lock:
+            yield self.get(obj, add=True)
+            self.save()
 
 
     # Loading
@@ -193,7 +381,9 @@ class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
             raise ValueError(f"'lst' must be a list")
 
         for d in lst:
-            super().add(MonitorConfigEntry.deserialize(d, instance_parent=self))
+            entry = MonitorConfigEntry.deserialize(d, instance_parent=self)
+            entry._mark_clean()
+            self._add_entry(entry)
 
 
     def load(self) -> None:
@@ -203,13 +393,58 @@ class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
         if self.file_path is None or not os.path.exists(self.file_path):
             return
 
-        with open(self.file_path, 'r') as file:
-            yaml_l = yaml.load(file, Loader=yaml.FullLoader)
+        with file_lock(self.file_path, shared=True):
+            yaml_l = load_yaml(self.file_path, write_cache=not CFG.app.test)
+            self._file_stat = self._stat()
 
         if yaml_l is not None:
             self.load_from_list(yaml_l)
 
 
+    # Merging
+    def merge_from_list(self, lst : List) -> None:
+        """
+        Merge config entries written to disk by other processes into this config.
+
+        Entries and keys modified (or removed) by this process since they were last loaded or written keep their local
+        state, everything else takes the state from 'lst', i.e. entries and keys added, modified or removed by other
+        processes are picked up.
+        Args:
+            lst: List of dictionaries, as loaded from the YAML file.
+        """
+        if not isinstance(lst, list):
+            raise ValueError(f"'lst' must be a list")
+
+        seen = set()
+
+        for d in lst:
+            other = MonitorConfigEntry.deserialize(d, instance_parent=self)
+            entry = self.get(other.filter, add=False)
+
+            if entry is not None:
+                entry._merge_from_disk(other)
+            elif any(removed == other.filter for removed in self._removed):
+                continue
+            else:
+                other._mark_clean()
+                self._add_entry(other)
+                entry = other
+
+            seen.add(id(entry))
+
+        # Entries we did not create nor find on disk were removed by another process
+        for entry in list(self):
+            if id(entry) not in seen and not entry._new:
+                self._discard_entry(entry)
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+
     # Saving
     def serialize(self) -> List:
         """
@@ -228,27 +463,84 @@ class MonitorConfig(NamespaceSet, LoggableMixin, HierarchicalMixin, NamedMixin):
     def yaml_str(self) -> str:
         """
         Get the YAML string representation of the config.
+        Only entries modified since the last call are re-serialized.
         Returns:
             str: The YAML string.
         """
-        return yaml.dump(self.serialize())
+        if len(self) == 0:
+            import oyaml as yaml
+            return yaml.dump([])
+
+        return ''.join(entry.yaml_str() for entry in self)
 
 
-    def save(self):
+    def save(self, immediate : bool = False) -> None:
         """
         Save the monitor configuration to the YAML file.
+
+        Saves are written behind: all saves requested within 'monitors.save_delay' seconds of the first are coalesced into
+        a single write. Pending saves are also written at exit.
+        Args:
+            immediate: If True, write now instead of waiting.
+        """
+        if self.file_path is None:
+            return
+
+        config = CFG.snapshot()
+        assert not config.app.test
+
+        delay = config.monitors.save_delay
+        with self._save_lock:
+            self._save_pending = True
+
+            if immediate or not delay:
+                self.flush()
+
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(delay, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self) -> None:
+        """
+        Write any pending save to the YAML file.
+        """
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+            if not self._save_pending:
+                return
+            self._save_pending = False
+
+            self.write()
+
+    def write(self) -> None:
+        """
+        Write the monitor configuration to the YAML file now.
+
+        The file is locked while writing. If another process modified it since we last loaded or wrote it, its changes are
+        merged first (see merge_from_list), so concurrent processes do not overwrite each other's cached data.
         """
         if self.file_path is None:
             return
 
-        assert not CFG.app.test
+        with self._save_lock, file_lock(self.file_path):
+            stat = self._stat()
+            if stat is not None and stat != self._file_stat:
+                self.log.debug("Merging monitor configuration modified by another process...")
+                self.merge_from_list(load_yaml(self.file_path, write_cache=False) or [])
+
+            self.log.debug("Saving monitor configuration...")
+            atomic_write(self.file_path, self.yaml_str())
+            self._file_stat = self._stat()
 
-        self.log.debug("Saving monitor configuration...")
-        with open(self.file_path, 'w') as file:
-            yaml_str = self.yaml_str()
-            file.write(yaml_str)
+            for entry in self:
+                entry._mark_clean()
+            self._removed = []
 
 
 ###########
-# Global config instance
-MONITOR_CONFIG = MonitorConfig()
\ No newline at end of file
+# Global config instance, loaded on first access
+__getattr__ = LazyGlobals(globals(), MONITOR_CONFIG=MonitorConfig)
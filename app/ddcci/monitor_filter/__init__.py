@@ -10,19 +10,25 @@ from .primary import PrimaryMonitorFilter
 from .regex import RegexMonitorFilter
 from .info import MonitorInfoMonitorFilter
 from .os_monitor import OsMonitorMonitorFilter
+from .field import FieldMonitorFilter
+from .logic import AndMonitorFilter, OrMonitorFilter, NotMonitorFilter
+from .expression import is_filter_expression, parse_filter_expression
 
-from ..os import OsMonitor
+from ..os import BaseOsMonitor
 
 # Factory
-def create_monitor_filter_from(filter : Union[str, re.Pattern, List[Union[str, re.Pattern]], BaseMonitorFilter, OsMonitor], instance_parent=None):
+def create_monitor_filter_from(filter : Union[str, re.Pattern, List[Union[str, re.Pattern]], BaseMonitorFilter, BaseOsMonitor], instance_parent=None):
     if isinstance(filter, BaseMonitorFilter):
         assert instance_parent is None or filter.instance_parent == instance_parent
         return filter
 
-    if isinstance(filter, OsMonitor):
+    if isinstance(filter, BaseOsMonitor):
         return OsMonitorMonitorFilter(filter, instance_parent=instance_parent)
 
     if isinstance(filter, str) and filter.strip().lower() == 'primary':
         return PrimaryMonitorFilter(instance_parent=instance_parent)
 
+    if isinstance(filter, str) and is_filter_expression(filter):
+        return parse_filter_expression(filter, instance_parent=instance_parent)
+
     return RegexMonitorFilter(filter, instance_parent=instance_parent)
\ No newline at end of file
@@ -1,10 +1,10 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Hashable, Sequence, Tuple
 from abc import ABCMeta, abstractmethod
 
-from ..os import OsMonitor, OsMonitorList
+from ..os import BaseOsMonitor, BaseOsMonitorList
 
 from app.util import NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMixin
 
@@ -20,10 +20,19 @@ class BaseMonitorFilter(NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMix
     """
     FILTER_TYPES = {}
 
+    """ Relative cost of match(), used to match cheaper filters first when combining filters """
+    MATCH_COST = 1
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Result of the last find(): the list searched, its generation, and the matching monitors
+        self._found : Optional[Tuple[BaseOsMonitorList, int, Tuple[BaseOsMonitor, ...]]] = None
+
 
     # Filtering
     @abstractmethod
-    def match(self, os_monitor : OsMonitor) -> bool:
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
         """
         Determine if the given OS monitor matches this filter.
 
@@ -35,25 +44,57 @@ class BaseMonitorFilter(NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMix
         """
         pass
 
-    def find(self, os_monitor_list : OsMonitorList) -> List[OsMonitor]:
+    def match_cost(self) -> int:
+        """
+        Returns:
+            int: Relative cost of match(), see MATCH_COST.
+        """
+        return self.__class__.MATCH_COST
+
+    def candidates(self, os_monitor_list : BaseOsMonitorList) -> Optional[Sequence[BaseOsMonitor]]:
+        """
+        Narrow down which OS monitors may match this filter, without matching every monitor, e.g. using an index.
+
+        Args:
+            os_monitor_list: List of OS monitors to search.
+
+        Returns:
+            Sequence or None: The monitors that may match (a superset of the matches), in list order, or None if every
+                monitor must be matched.
+        """
+        return None
+
+    def find(self, os_monitor_list : BaseOsMonitorList) -> List[BaseOsMonitor]:
         """
         Find all OS monitors in the list that match this filter.
 
+        The result is cached until the list's generation changes, i.e. until monitors are connected, disconnected or
+        their information changes (see BaseOsMonitorList.generation).
+
         Args:
             os_monitor_list: List of OS monitors to search.
 
         Returns:
             list: All matching OS monitors.
         """
-        match = []
+        return list(self._find(os_monitor_list))
+
+    def _find(self, os_monitor_list : BaseOsMonitorList) -> Tuple[BaseOsMonitor, ...]:
+        generation = os_monitor_list.generation
+
+        cached = self._found
+        if cached is not None and cached[0] is os_monitor_list and cached[1] == generation:
+            return cached[2]
 
-        for os_monitor in os_monitor_list:
-            if self.match(os_monitor):
-                match.append(os_monitor)
+        candidates = self.candidates(os_monitor_list)
+        if candidates is None:
+            candidates = os_monitor_list
 
+        match = tuple(os_monitor for os_monitor in candidates if self.match(os_monitor))
+        self._found = (os_monitor_list, generation, match)
         return match
 
-    def find_one(self, os_monitor_list : OsMonitorList) -> Optional[OsMonitor]:
+    def find_one(self, os_monitor_list : BaseOsMonitorList) -> Optional[BaseOsMonitor]:
         """
         Find a single OS monitor in the list that matches this filter.
 
@@ -63,7 +104,7 @@ class BaseMonitorFilter(NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMix
         Returns:
             OsMonitor or None: The matching monitor, or None if not found or ambiguous.
         """
-        match = self.find(os_monitor_list)
+        match = self._find(os_monitor_list)
         len_match = len(match)
 
         if len_match == 0:
@@ -76,6 +117,18 @@ class BaseMonitorFilter(NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMix
         return match[0]
 
 
+    # Identity
+    def key(self) -> Optional[Hashable]:
+        """
+        Get a normalized identity for this filter, equal for filters that always select the same monitors (e.g. two
+        regex filters built from the same pattern strings). Used to share Monitor instances, see MONITOR_REGISTRY.
+
+        Returns:
+            Hashable or None: The key, or None if this filter cannot be shared.
+        """
+        return None
+
+
     # Naming
     @abstractmethod
     def get_monitor_name(self, prefix='<', suffix='>') -> str:
@@ -0,0 +1,142 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Parser for filter expressions, which combine monitor filters with '&' (and), '|' (or), '!' (not) and parentheses, e.g.
+'manufacturer_id=DEL & adapter.device.number=2 & !serial=ABC123'.
+
+Operands are 'primary', field predicates ('<field>=<value>' or '<field>~<regex>', see FieldMonitorFilter) or regexes
+searched in every field (see RegexMonitorFilter). Operands cannot contain the operator characters '&|!()'.
+"""
+
+import re
+
+from typing import List
+
+from .base import BaseMonitorFilter
+from .primary import PrimaryMonitorFilter
+from .regex import RegexMonitorFilter
+from .field import FieldMonitorFilter
+from .logic import AndMonitorFilter, OrMonitorFilter, NotMonitorFilter
+
+
+TOKEN_RE     = re.compile(r'\s*(?:([&|!()])|([^&|!()]+))')
+PREDICATE_RE = re.compile(r'^([A-Za-z_][\w.]*)\s*([=~])\s*(.*)$')
+FIELD_RE     = re.compile(r'(?:^|[&|!(])\s*([A-Za-z_][\w.]*)\s*[=~]')
+
+
+def is_filter_expression(text : str) -> bool:
+    """
+    Check whether a filter string is an expression, i.e. contains at least one predicate on a valid field. Other strings
+    (even ones containing operator characters, e.g. 'DELL|LG') are regexes.
+
+    Args:
+        text: The filter string.
+
+    Returns:
+        bool: True if the string is an expression.
+    """
+    for match in FIELD_RE.finditer(text):
+        try:
+            FieldMonitorFilter.normalize_field(match.group(1))
+            return True
+        except ValueError:
+            pass
+    return False
+
+
+def parse_filter_expression(text : str, instance_parent=None) -> BaseMonitorFilter:
+    """
+    Parse a filter expression.
+
+    Args:
+        text: The expression.
+        instance_parent: Optional parent for the resulting filter.
+
+    Returns:
+        BaseMonitorFilter: The filter.
+
+    Raises:
+        ValueError: If the expression is invalid.
+    """
+    tokens : List[str] = []
+    for match in TOKEN_RE.finditer(text):
+        token = (match.group(1) or match.group(2)).strip()
+        if token:
+            tokens.append(token)
+
+    parser = _ExpressionParser(text, tokens)
+    filter = parser.parse_or()
+    if parser.pos != len(tokens):
+        raise ValueError(f"Invalid filter expression '{text}': unexpected '{tokens[parser.pos]}'")
+
+    if instance_parent is not None:
+        filter.instance_parent = instance_parent
+    return filter
+
+
+class _ExpressionParser:
+    """
+    Recursive descent parser, in order of increasing precedence: '|', '&', '!'.
+    """
+    def __init__(self, text : str, tokens : List[str]):
+        self.text   = text
+        self.tokens = tokens
+        self.pos    = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Invalid filter expression '{self.text}': unexpected end")
+        self.pos += 1
+        return token
+
+    def parse_or(self) -> BaseMonitorFilter:
+        filters = [self.parse_and()]
+        while self._peek() == '|':
+            self.pos += 1
+            filters.append(self.parse_and())
+        return filters[0] if len(filters) == 1 else OrMonitorFilter(filters)
+
+    def parse_and(self) -> BaseMonitorFilter:
+        filters = [self.parse_not()]
+        while self._peek() == '&':
+            self.pos += 1
+            filters.append(self.parse_not())
+        return filters[0] if len(filters) == 1 else AndMonitorFilter(filters)
+
+    def parse_not(self) -> BaseMonitorFilter:
+        token = self._next()
+
+        if token == '!':
+            return NotMonitorFilter(self.parse_not())
+
+        if token == '(':
+            filter = self.parse_or()
+            if self._next() != ')':
+                raise ValueError(f"Invalid filter expression '{self.text}': expected ')'")
+            return filter
+
+        if token in ('&', '|', ')'):
+            raise ValueError(f"Invalid filter expression '{self.text}': unexpected '{token}'")
+
+        return self.parse_operand(token)
+
+    @staticmethod
+    def parse_operand(token : str) -> BaseMonitorFilter:
+        if token.lower() == 'primary':
+            return PrimaryMonitorFilter()
+
+        match = PREDICATE_RE.match(token)
+        if match is not None:
+            field, operator, value = match.groups()
+            try:
+                return FieldMonitorFilter(field, value.strip(), operator=operator)
+            except ValueError:
+                # Not a field, e.g. a regex containing '='
+                pass
+
+        return RegexMonitorFilter(token)
@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import re
+import typing
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+
+from . import BaseMonitorFilter
+from ..os import BaseOsMonitor, BaseOsMonitorList
+from ..os.monitor_info import BaseOsMonitorInfo
+
+
+class FieldMonitorFilter(BaseMonitorFilter):
+    """
+    Monitor filter that matches a single field of the monitor information, e.g. 'serial' or 'adapter.device.number'.
+    Used for precise selection of monitors, without searching every field like RegexMonitorFilter.
+
+    Field paths are relative to BaseOsMonitorInfo. Paths without a '.' refer to a field of 'monitor', except 'primary',
+    which refers to 'adapter.primary'.
+
+    With operator '=', the field must equal the value, compared as case-insensitive strings (see
+    BaseOsMonitorInfo.field_key), as values given on the command line are strings. Indexed fields are looked up in the
+    monitor list instead of matching every monitor (see BaseOsMonitorList.lookup). With operator '~', the value is a
+    regular expression (case-insensitive) that must match the field's string representation.
+    """
+    OPERATORS = ('=', '~')
+
+    """ Fields of BaseOsMonitorInfo that can be filtered on, and their dataclass """
+    ROOTS = {'adapter': BaseOsMonitorInfo.Adapter, 'monitor': BaseOsMonitorInfo.Monitor}
+
+    def __init__(self, field : str, value : Any, operator : str = '=', instance_parent=None):
+        super().__init__(instance_parent=instance_parent)
+
+        if operator not in self.__class__.OPERATORS:
+            raise ValueError(f"Invalid field filter operator '{operator}'")
+
+        self.field    = self.__class__.normalize_field(field)
+        self.operator = operator
+        self.value    = value
+
+        self._path  = tuple(self.field.split('.'))
+        self._regex = re.compile(str(value), re.I) if operator == '~' else None
+        self._key   = BaseOsMonitorInfo.field_key(value)
+
+        self.instance_name = self.get_monitor_name()
+        self.freeze_map()
+
+    @classmethod
+    def normalize_field(cls, field : str) -> str:
+        """
+        Resolve and validate a field path.
+
+        Args:
+            field: The field path, e.g. 'serial' or 'adapter.device.number'.
+
+        Returns:
+            str: The full field path, e.g. 'monitor.serial'.
+
+        Raises:
+            ValueError: If the field does not exist.
+        """
+        path = field.strip().lower()
+        if '.' not in path:
+            path = 'adapter.primary' if path == 'primary' else f"monitor.{path}"
+
+        root, *parts = path.split('.')
+        typ = cls.ROOTS.get(root, None)
+
+        for part in parts:
+            if typ is None or not is_dataclass(typ) or part not in {f.name for f in fields(typ)}:
+                raise ValueError(f"Invalid monitor information field '{field}'")
+            typ = typing.get_type_hints(typ).get(part, None)
+
+        if typ is None or is_dataclass(typ):
+            raise ValueError(f"Invalid monitor information field '{field}'")
+
+        return path
+
+    def value_of(self, os_monitor : BaseOsMonitor) -> Any:
+        """
+        Args:
+            os_monitor: The OS monitor.
+
+        Returns:
+            Any: The value of the field for the given monitor.
+        """
+        return os_monitor.info.get_field(self._path)
+
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
+        return self.match_value(self.value_of(os_monitor))
+
+    def match_value(self, value : Any) -> bool:
+        """
+        Args:
+            value: A value of the field.
+
+        Returns:
+            bool: Whether a monitor with the given field value matches this filter.
+        """
+        if value is None:
+            return False
+
+        if self._regex is not None:
+            return self._regex.search(str(value)) is not None
+
+        return BaseOsMonitorInfo.field_key(value) == self._key
+
+    def candidates(self, os_monitor_list : BaseOsMonitorList) -> Optional[Sequence[BaseOsMonitor]]:
+        if self._regex is not None:
+            return None
+        return os_monitor_list.lookup(self.field, self.value)
+
+
+    # Identity
+    def key(self) -> Tuple:
+        return ('field', self.field, self.operator, self.value)
+
+
+    # Utilities / Logging
+    def get_monitor_name(self, prefix='', suffix='') -> str:
+        return f"{prefix}{self.field}{self.operator}{self.value}{suffix}"
+
+
+    # Serialization
+    def serialize(self) -> Dict:
+        return OrderedDict(type='field', field=self.field, operator=self.operator, value=self.value)
+
+    @classmethod
+    def deserialize(cls, data : Dict, instance_parent=None) -> 'FieldMonitorFilter':
+        if 'type' in data:
+            typ = data.pop('type')
+            assert typ == 'field'
+        return cls(**data, instance_parent=instance_parent)
+
+
+BaseMonitorFilter.FILTER_TYPES['field'] = FieldMonitorFilter
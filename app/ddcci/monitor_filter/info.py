@@ -1,18 +1,21 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 from collections import OrderedDict
 
 from . import BaseMonitorFilter
 
-from ..os import OsMonitor
+from ..os import BaseOsMonitor, BaseOsMonitorList
 
 class MonitorInfoMonitorFilter(BaseMonitorFilter):
     """
     Monitor filter that matches monitors by model, serial, UID, manufacturer ID, and product ID.
     Used for precise selection of monitors based on OS-reported information.
     """
+    """ Fields that together identify a monitor, see identity() """
+    IDENTITY_FIELDS = ('model', 'serial', 'uid', 'manufacturer_id', 'product_id')
+
     def __init__(self, model, serial, uid, manufacturer_id, product_id, instance_parent=None):
         super().__init__(instance_parent=instance_parent)
 
@@ -25,23 +28,53 @@ class MonitorInfoMonitorFilter(BaseMonitorFilter):
         self.instance_name = self.get_monitor_name()
         self.freeze_map()
 
-    def match(self, os_monitor : OsMonitor):
-        m = os_monitor.info.monitor
+    def match(self, os_monitor : BaseOsMonitor):
+        return self.identity() == self.__class__.identity_of(os_monitor)
+
+    def candidates(self, os_monitor_list : BaseOsMonitorList) -> Optional[Sequence[BaseOsMonitor]]:
+        # Look up by the most selective field that is known
+        for attr in ('serial', 'uid', 'model', 'product_id', 'manufacturer_id'):
+            value = self[attr]
+            if value is not None:
+                return os_monitor_list.lookup(f"monitor.{attr}", value)
+        return None
+
+
+    # Identity
+    def identity(self) -> Tuple:
+        """
+        Get the identity of the monitor selected by this filter, usable as a hash key.
 
-        for attr, v in self.items():
-            if v != getattr(m, attr):
-                return False
+        Returns:
+            tuple: The values of IDENTITY_FIELDS.
+        """
+        return tuple(self[attr] for attr in self.__class__.IDENTITY_FIELDS)
+
+    @classmethod
+    def identity_of(cls, os_monitor : BaseOsMonitor) -> Tuple:
+        """
+        Get the identity of an OS monitor, i.e. the identity() of a filter that would match it.
+
+        Args:
+            os_monitor: The OS monitor.
+
+        Returns:
+            tuple: The values of IDENTITY_FIELDS.
+        """
+        m = os_monitor.info.monitor
+        return tuple(getattr(m, attr) for attr in cls.IDENTITY_FIELDS)
 
-        return True
+    def key(self) -> Tuple:
+        return ('info', *self.identity())
 
 
     # Equality
     def __eq__(self, other):
         from . import OsMonitorMonitorFilter
-        if isinstance(other, OsMonitorMonitorFilter):
-            return self == other.to_monitor_info_filter()
+        if isinstance(other, (self.__class__, OsMonitorMonitorFilter)):
+            return self.identity() == other.identity()
 
-        return isinstance(other, self.__class__) and self.__dict__ == other.__dict__
+        return False
 
     def __hash__(self):
         return super().__hash__()
@@ -0,0 +1,151 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from collections import OrderedDict
+
+from . import BaseMonitorFilter
+from ..os import BaseOsMonitor, BaseOsMonitorList
+
+
+#############
+# Base class
+class LogicMonitorFilter(BaseMonitorFilter):
+    """
+    Base class for monitor filters that combine other filters.
+    """
+    """ Filter type, used for serialization """
+    TYPE = None
+
+    def __init__(self, filters : Iterable, instance_parent=None):
+        super().__init__(instance_parent=instance_parent)
+
+        from . import create_monitor_filter_from
+        filters = [create_monitor_filter_from(x) for x in filters]
+        if not filters:
+            raise ValueError("'filters' must not be empty")
+
+        # Cheaper filters first, so that expensive ones are only matched when the result is not decided yet
+        self.filters = sorted(filters, key=lambda x: x.match_cost())
+
+        self.instance_name = self.get_monitor_name()
+        self.freeze_map()
+
+    def match_cost(self) -> int:
+        return sum(x.match_cost() for x in self.filters)
+
+
+    # Identity
+    def key(self) -> Optional[Tuple]:
+        keys = [x.key() for x in self.filters]
+        if any(x is None for x in keys):
+            return None
+        return (self.__class__.TYPE, *keys)
+
+
+    # Serialization
+    def serialize(self) -> Dict:
+        return OrderedDict(type=self.__class__.TYPE, filters=[x.serialize() for x in self.filters])
+
+    @classmethod
+    def deserialize(cls, data : Dict, instance_parent=None) -> 'LogicMonitorFilter':
+        if 'type' in data:
+            typ = data.pop('type')
+            assert typ == cls.TYPE
+
+        filters = data.pop('filters')
+        if len(data) > 0:
+            raise ValueError(f"Invalid '{cls.TYPE}' filter keys: {data}")
+
+        return cls([BaseMonitorFilter.deserialize(x) for x in filters], instance_parent=instance_parent)
+
+
+#############
+# And
+class AndMonitorFilter(LogicMonitorFilter):
+    """
+    Monitor filter that matches monitors matched by all of its filters.
+    """
+    TYPE = 'and'
+
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
+        return all(x.match(os_monitor) for x in self.filters)
+
+    def candidates(self, os_monitor_list : BaseOsMonitorList) -> Optional[Sequence[BaseOsMonitor]]:
+        # Any filter's candidates are candidates of the whole, so use the fewest
+        result = None
+        for x in self.filters:
+            candidates = x.candidates(os_monitor_list)
+            if candidates is not None and (result is None or len(candidates) < len(result)):
+                result = candidates
+        return result
+
+    def get_monitor_name(self, prefix='', suffix='') -> str:
+        return f"{prefix}{{{' && '.join(x.get_monitor_name(prefix='<', suffix='>') for x in self.filters)}}}{suffix}"
+
+
+#############
+# Or
+class OrMonitorFilter(LogicMonitorFilter):
+    """
+    Monitor filter that matches monitors matched by any of its filters.
+    """
+    TYPE = 'or'
+
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
+        return any(x.match(os_monitor) for x in self.filters)
+
+    def candidates(self, os_monitor_list : BaseOsMonitorList) -> Optional[Sequence[BaseOsMonitor]]:
+        # Only narrows down the monitors if every filter does
+        union = set()
+        for x in self.filters:
+            candidates = x.candidates(os_monitor_list)
+            if candidates is None:
+                return None
+            union.update(candidates)
+        return [os_monitor for os_monitor in os_monitor_list if os_monitor in union]
+
+    def get_monitor_name(self, prefix='', suffix='') -> str:
+        return f"{prefix}{{{' || '.join(x.get_monitor_name(prefix='<', suffix='>') for x in self.filters)}}}{suffix}"
+
+
+#############
+# Not
+class NotMonitorFilter(LogicMonitorFilter):
+    """
+    Monitor filter that matches monitors not matched by its filter.
+    """
+    TYPE = 'not'
+
+    def __init__(self, filter, instance_parent=None):
+        super().__init__([filter], instance_parent=instance_parent)
+
+    @property
+    def filter(self) -> BaseMonitorFilter:
+        return self.filters[0]
+
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
+        return not self.filter.match(os_monitor)
+
+    def get_monitor_name(self, prefix='', suffix='') -> str:
+        return f"{prefix}!{self.filter.get_monitor_name(prefix='<', suffix='>')}{suffix}"
+
+    def serialize(self) -> Dict:
+        return OrderedDict(type=self.__class__.TYPE, filter=self.filter.serialize())
+
+    @classmethod
+    def deserialize(cls, data : Dict, instance_parent=None) -> 'NotMonitorFilter':
+        if 'type' in data:
+            typ = data.pop('type')
+            assert typ == cls.TYPE
+
+        filter = data.pop('filter')
+        if len(data) > 0:
+            raise ValueError(f"Invalid '{cls.TYPE}' filter keys: {data}")
+
+        return cls(BaseMonitorFilter.deserialize(filter), instance_parent=instance_parent)
+
+
+BaseMonitorFilter.FILTER_TYPES['and'] = AndMonitorFilter
+BaseMonitorFilter.FILTER_TYPES['or' ] = OrMonitorFilter
+BaseMonitorFilter.FILTER_TYPES['not'] = NotMonitorFilter
@@ -1,12 +1,12 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
-from typing import List, Dict
+from typing import Dict, Tuple
 
 from . import BaseMonitorFilter
 from . import MonitorInfoMonitorFilter
 
-from ..os import OsMonitor
+from ..os import BaseOsMonitor
 
 
 class OsMonitorMonitorFilter(BaseMonitorFilter):
@@ -14,7 +14,7 @@ class OsMonitorMonitorFilter(BaseMonitorFilter):
     Monitor filter that matches a specific OsMonitor instance.
     Used for direct selection of a known monitor object.
     """
-    def __init__(self, os_monitor : OsMonitor, instance_parent=None):
+    def __init__(self, os_monitor : BaseOsMonitor, instance_parent=None):
         super().__init__(instance_parent=instance_parent)
 
         self.os_monitor = os_monitor
@@ -22,15 +22,29 @@ class OsMonitorMonitorFilter(BaseMonitorFilter):
         self.instance_name = self.get_monitor_name()
         self.freeze_map()
 
-    def match(self, os_monitor : OsMonitor) -> bool:
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
         return os_monitor is self.os_monitor
 
     # Custom implementation to avoid an expensive search when we already know which monitor we want
-    def find(self, os_monitor_list) -> List[OsMonitor]:
+    def _find(self, os_monitor_list) -> Tuple[BaseOsMonitor, ...]:
         if not self.os_monitor.connected:
-            return []
+            return ()
 
-        return [self.os_monitor]
+        return (self.os_monitor,)
+
+    # Identity
+    def identity(self) -> Tuple:
+        """
+        Get the identity of the monitor selected by this filter, without creating a MonitorInfoMonitorFilter.
+
+        Returns:
+            tuple: See MonitorInfoMonitorFilter.identity().
+        """
+        return MonitorInfoMonitorFilter.identity_of(self.os_monitor)
+
+    def key(self) -> Tuple:
+        # Same as the equivalent MonitorInfoMonitorFilter
+        return ('info', *self.identity())
 
     # It is possible to convert this to a regex filter
     def to_monitor_info_filter(self) -> MonitorInfoMonitorFilter:
@@ -47,7 +61,7 @@ class OsMonitorMonitorFilter(BaseMonitorFilter):
     # Equality
     def __eq__(self, other):
         if isinstance(other, MonitorInfoMonitorFilter):
-            return self.to_monitor_info_filter() == other
+            return self.identity() == other.identity()
 
         return isinstance(other, self.__class__) and self.os_monitor == other.os_monitor
 
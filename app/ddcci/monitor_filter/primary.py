@@ -1,11 +1,11 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 from collections import OrderedDict
 
 from . import BaseMonitorFilter
-from ..os import OsMonitor
+from ..os import BaseOsMonitor, BaseOsMonitorList
 
 
 class PrimaryMonitorFilter(BaseMonitorFilter):
@@ -19,9 +19,12 @@ class PrimaryMonitorFilter(BaseMonitorFilter):
         self.instance_name = self.get_monitor_name()
         self.freeze_map()
 
-    def match(self, os_monitor : OsMonitor) -> bool:
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
         return os_monitor.info.adapter.primary
 
+    def candidates(self, os_monitor_list : BaseOsMonitorList) -> Optional[Sequence[BaseOsMonitor]]:
+        return os_monitor_list.lookup('adapter.primary', True)
+
 
     # Utilities / Logging
     def get_monitor_name(self, prefix='', suffix='') -> str:
@@ -35,6 +38,9 @@ class PrimaryMonitorFilter(BaseMonitorFilter):
     def __hash__(self):
         return hash(self.__class__)
 
+    def key(self) -> Tuple:
+        return ('primary',)
+
 
     # Serialization
     def serialize(self) -> Dict:
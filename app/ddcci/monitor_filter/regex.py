@@ -3,18 +3,25 @@
 
 import re
 
-from typing import List, Union, Any, Dict
+from typing import List, Union, Dict, Tuple
 from collections import OrderedDict
 
 from . import BaseMonitorFilter
-from ..os import OsMonitor
+from ..os import BaseOsMonitor
 
 
 class RegexMonitorFilter(BaseMonitorFilter):
     """
     Monitor filter that matches monitors using regular expressions on monitor information.
     Used for flexible selection of monitors by pattern matching.
+
+    Every pattern must match at least one string of the monitor's BaseOsMonitorInfo.searchable.
     """
+    MATCH_COST = 10
+
+    # Maximum number of memoized match results
+    MAX_MATCHES = 256
+
     def __init__(self, filters : Union[str, re.Pattern, List[Union[str, re.Pattern]]], instance_parent=None):
         if isinstance(filters, str):
             filters = [filters]
@@ -30,39 +37,30 @@ class RegexMonitorFilter(BaseMonitorFilter):
 
         self.filters = filters
 
+        self._matches : Dict[Tuple[str, ...], bool] = {}
+
         self.instance_name = self.get_monitor_name()
         self.freeze_map()
 
-    def _match_single(self, filter : re.Pattern, key : str, value : Any) -> bool:
-        if value is None:
-            return False
-
-        if callable(getattr(value, 'items', None)):
-            for sub_key, sub_value in value.items():
-                if self._match_single(filter, sub_key, sub_value):
-                    return True
-
-        if callable(getattr(value, 'items', None)):
-            for sub_key, sub_value in value.items():
-                if self._match_single(filter, sub_key, sub_value):
-                    return True
-
-            return False
+    def match(self, os_monitor : BaseOsMonitor) -> bool:
+        searchable = os_monitor.info.searchable
 
-        if key == 'primary':
-            return value and filter.search(str(key))
+        # Monitor information only changes on enumeration, and several monitors may share the same information, so results
+        # are memoized by the information itself
+        matched = self._matches.get(searchable, None)
+        if matched is None:
+            matched = all(any(filter.search(s) for s in searchable) for filter in self.filters)
 
-        return filter.search(str(value)) is not None
+            if len(self._matches) >= self.MAX_MATCHES:
+                self._matches.clear()
+            self._matches[searchable] = matched
 
-    def match(self, os_monitor : OsMonitor) -> bool:
-        info = os_monitor.info
+        return matched
 
-        # Iterate through the monitor information to see if we find a match
-        for filter in self.filters:
-            if not self._match_single(filter, 'info', info):
-                return False
 
-        return True
+    # Identity
+    def key(self) -> Tuple:
+        return ('regex', *((x.pattern, x.flags) for x in self.filters))
 
 
     # Utilities / Logging
@@ -75,17 +73,18 @@ class RegexMonitorFilter(BaseMonitorFilter):
 
     # Serialization
     def serialize(self) -> Dict:
-        d = OrderedDict(typ='regex')
+        d = OrderedDict(type='regex')
 
         regexes = []
         for regex in self.filters:
-            regexes.append(str(regex))
+            regexes.append(regex.pattern)
 
         d['regexes'] = regexes
 
         return d
 
-    def deserialize(self, data : Dict, instance_parent=None) -> 'RegexMonitorFilter':
+    @classmethod
+    def deserialize(cls, data : Dict, instance_parent=None) -> 'RegexMonitorFilter':
         if 'type' in data:
             typ = data.pop('type')
             assert typ == 'regex'
@@ -94,7 +93,7 @@ class RegexMonitorFilter(BaseMonitorFilter):
         if len(data) > 0:
             raise ValueError(f"Invalid 'regex' filter keys: {data}")
 
-        return RegexMonitorFilter(regexes, instance_parent=instance_parent)
+        return cls(regexes, instance_parent=instance_parent)
 
 
 BaseMonitorFilter.FILTER_TYPES['regex'] = RegexMonitorFilter
@@ -0,0 +1,83 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import threading
+
+from typing import Dict, Hashable, Optional
+
+from app.util import LoggableMixin
+from app.util.lazy import LazyGlobals
+
+from .monitor import Monitor
+from .monitor_filter import create_monitor_filter_from
+
+
+class MonitorRegistry(LoggableMixin):
+    """
+    Registry of Monitor instances, shared by everything that selects monitors with equivalent filters (e.g. CLI commands),
+    so that each monitor's VCP code table is built (and its capabilities parsed) only once.
+
+    Monitors are keyed by their filter's key(). They are only valid for the OS monitor list generation they were created
+    in: once monitors are connected or disconnected, a filter such as 'primary' may select a different monitor, so all
+    registered monitors are dropped.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        self._lock       = threading.RLock()
+        self._monitors   : Dict[Hashable, Monitor] = {}
+        self._generation : Optional[int] = None
+
+    def get(self, filter, enumerate : bool = True) -> Monitor:
+        """
+        Get the shared Monitor for a filter, creating it if necessary.
+
+        Args:
+            filter: Monitor selector or filter object, as accepted by Monitor.
+            enumerate: If True, enumerate the OS monitors first (a no-op within OS_MONITORS.batch()), so that changes to the
+                connected monitors are noticed.
+
+        Returns:
+            Monitor: The shared monitor, or a new unshared one if the filter has no key.
+        """
+        from .os import OS_MONITORS
+
+        filter = create_monitor_filter_from(filter)
+
+        key = filter.key()
+        if key is None:
+            return Monitor(filter)
+
+        with self._lock:
+            if enumerate:
+                OS_MONITORS.enumerate()
+
+            generation = OS_MONITORS.generation
+            if generation != self._generation:
+                if self._monitors:
+                    self.log.debug(f"Monitors changed, dropping {len(self._monitors)} registered monitor(s)")
+                self._monitors = {}
+                self._generation = generation
+
+            monitor = self._monitors.get(key, None)
+            if monitor is None:
+                monitor = Monitor(filter)
+                self._monitors[key] = monitor
+
+            return monitor
+
+    def clear(self) -> None:
+        """
+        Drop all registered monitors.
+        """
+        with self._lock:
+            self._monitors = {}
+
+    def __len__(self) -> int:
+        return len(self._monitors)
+
+
+###########
+# Global registry instance, constructed on first access
+__getattr__ = LazyGlobals(globals(), MONITOR_REGISTRY=MonitorRegistry)
@@ -6,11 +6,14 @@ from .monitor_info   import BaseOsMonitorInfo
 from .monitor        import BaseOsMonitor
 from .monitor_list   import BaseOsMonitorList
 
-# Now import OS-specific specializations
-from .windows.monitor_info import WindowsOsMonitorInfo as OsMonitorInfo
-from .windows.monitor      import WindowsOsMonitor     as OsMonitor
-from .windows.monitor_list import WindowsOsMonitorList as OsMonitorList
 
-
-# Global list of OsMonitors
-OS_MONITORS = OsMonitorList('Monitors')
\ No newline at end of file
+# OS-specific specializations are only imported on first access, as loading the OS backend is comparatively slow.
+# Code that only needs isinstance checks or type annotations should use the base classes above instead.
+# The global list of OsMonitors is likewise constructed (and enumerated) on first access.
+from app.util.lazy import LazyGlobals, lazy_import
+__getattr__ = LazyGlobals(globals(),
+    OsMonitorInfo = lazy_import('.windows.monitor_info', 'WindowsOsMonitorInfo', __name__),
+    OsMonitor     = lazy_import('.windows.monitor'     , 'WindowsOsMonitor'    , __name__),
+    OsMonitorList = lazy_import('.windows.monitor_list', 'WindowsOsMonitorList', __name__),
+    OS_MONITORS   = lambda: __getattr__('OsMonitorList')('Monitors'),
+)
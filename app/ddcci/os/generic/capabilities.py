@@ -1,127 +1,239 @@
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
+from typing import Union, Dict, List, Any, Optional
+
 from .. import BaseOsMonitor
 
 from app.util.namespace import NamespaceMap
 from app.util.mixins import LoggableMixin, HierarchicalMixin, NamedMixin
 
 
-class OsMonitorCapabilities(NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMixin):
-    def __init__(self, capability_string : str, instance_parent : BaseOsMonitor):
-        super().__init__(instance_name="Capabilities", instance_parent=instance_parent)
+T_CapabilitiesInput = Union[str, bytes, bytearray, memoryview]
 
-        self._parse(capability_string)
 
+##########
+# Capability string parser
+class CapabilitiesParser:
+    """
+    Single-pass, incremental parser for MCCS capability strings.
 
-    # VCP Codes
-    def iter_vcp_codes(self):
-        vcp = self.get('vcp', None)
-        if vcp is None:
-            return
+    Input can be fed in chunks of str, bytes or memoryview. Tokens are processed as they are found, building the nested
+    structure and the integer VCP code table directly, without intermediate token lists.
 
-        return vcp.items()
+    Common malformations are tolerated: a missing outer pair of parentheses, unbalanced or stray parentheses, whitespace
+    before '(', NUL terminators, hex bytes glued together without spaces (e.g. '14(0508)') and invalid hex tokens (ignored).
+    """
 
-    def get_vcp_codes(self):
-        return self.get('vcp', None)
+    # Two-digit hex lookup table, faster than int(x, 16)
+    _HEX = {f'{i:02{c}}': i for i in range(256) for c in 'Xx'}
 
+    # Group kinds
+    _GENERIC    = 0  # named group, e.g. 'prot(...)'
+    _VCP        = 1  # 'vcp(...)' group
+    _VCP_VALUES = 2  # values of a VCP code inside 'vcp(...)', e.g. '14(05 08)'
 
-    # Parsing
-    def _parse_parentheses(self, text):
-        text = text.strip()
-        if text.startswith('('):
-            text = text[1:]
-        if text.endswith(')'):
-            text = text[:-1]
-
-        split = []
-        accum = ''
-        depth = 0
-
-        # Split parentheses into
-        for ch in text:
-            if ch == '(':
-                split.append((depth, accum.strip()))
-                depth += 1
-                accum = ''
-                continue
+    def __init__(self):
+        self._root  : List = []
+        self._vcp   : Dict[int, Any] | None = None
+        self._stack : List = [(self._GENERIC, self._root)]
+        self._last_code = None
+        self._tail = ''
+        self._result = None
 
-            elif ch == ')':
-                split.append((depth, accum.strip()))
-                accum = ''
-                depth -= 1
-                continue
+    def feed(self, data : T_CapabilitiesInput) -> None:
+        """
+        Parse a chunk of the capability string.
 
-            elif ch == ' ':
-                split.append((depth, accum.strip()))
-                accum = ''
-                continue
+        Args:
+            data: The next chunk, as a str, bytes or memoryview. MCCS capability strings are ASCII.
+        """
+        if self._result is not None:
+            raise RuntimeError("Parser already closed")
 
-            accum += ch
+        if not isinstance(data, str):
+            data = str(data, 'latin-1')
 
-        if depth != 0:
-            raise ValueError("Unbalanced parentheses")
+        text = self._tail + data if self._tail else data
 
-        # Collect into list of lists
-        stack = []
-        result_list = []
-        cur = result_list
+        # Anything after the last parenthesis might continue in the next chunk (including a group name), so keep it
+        # until either more data or close() arrives
+        last = max(text.rfind('('), text.rfind(')')) + 1
+        self._tail = text[last:]
+        if last > 0:
+            self._process(text[:last])
 
-        split_len = len(split)
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing.
 
-        for i in range(0, split_len):
-            depth, accum  = split[i]
-            next_depth, _ = split[i+1] if i < split_len-1 else (0, None)
+        Returns:
+            dict: Mapping of each top-level group name to its contents. 'vcp' maps each VCP code (int) to a list of
+                supported values (ints), or None if the code does not advertise any.
+        """
+        if self._result is not None:
+            return self._result
 
-            if next_depth > depth:
-                arr = []
-                cur.append((accum, arr))
-                stack.append((depth, cur))
-                cur = arr
+        if self._tail:
+            self._process(self._tail)
+            self._tail = ''
+
+        result = {}
+        for item in self._root:
+            # Bare top-level tokens have no group name, ignore them
+            if not isinstance(item, tuple):
                 continue
 
-            if len(accum) > 0:
-                cur.append(accum)
+            k, lst = item
+            if isinstance(lst, list) and len(lst) == 1:
+                lst = lst[0]
+            result[k] = lst
+
+        self._result = result
+        return result
+
+    def parse(self, data : T_CapabilitiesInput) -> Dict[str, Any]:
+        """
+        Parse a whole capability string.
+
+        Args:
+            data: The capability string, as a str, bytes or memoryview.
+
+        Returns:
+            dict: See close().
+        """
+        self.feed(data)
+        return self.close()
+
+
+    # Token handling
+    @staticmethod
+    def _hex(token : str) -> List[int]:
+        # Hex bytes are sometimes glued together, e.g. '0508', or written with a single digit. Other odd-length tokens,
+        # e.g. '123', cannot be split unambiguously, and are ignored like any other invalid token
+        try:
+            if len(token) > 2:
+                if len(token) % 2 != 0:
+                    return []
+                return [int(token[i:i+2], 16) for i in range(0, len(token), 2)]
+            return [int(token, 16)]
+        except ValueError:
+            return []
+
+    def _process(self, text : str) -> None:
+        GENERIC, VCP, VCP_VALUES = self._GENERIC, self._VCP, self._VCP_VALUES
+        HEX   = self._HEX
+        root  = self._root
+        stack = self._stack
+        kind, items = stack[-1]
+        last_code = self._last_code
+        named = False  # whether the previous token was an item, i.e. a potential group name
+
+        # str.split is considerably faster than a regular expression or a per-character loop
+        for token in text.replace('(', ' ( ').replace(')', ' ) ').replace('\x00', ' ').split():
+            # Group start
+            if token == '(':
+                # Unnamed group (e.g. the outer parentheses), contents belong to the enclosing group
+                if not named:
+                    pass
+
+                # Values of the preceding VCP code. Values of an invalid code are collected into a throw-away list, so
+                # that they are not mistaken for codes
+                elif kind == VCP:
+                    kind, items = VCP_VALUES, []
+                    if last_code is not None:
+                        self._vcp[last_code] = items
+
+                # Nested groups inside VCP values are not valid, merge their contents
+                elif kind == VCP_VALUES:
+                    pass
+
+                # The VCP table is only expected at the top level
+                elif items is root and items[-1].lower() == 'vcp':
+                    items.pop()
+                    if self._vcp is None:
+                        self._vcp = {}
+                        items.append(('vcp', self._vcp))
+                    kind, items = VCP, self._vcp
+
+                else:
+                    lst = []
+                    items.append((items.pop(), lst))
+                    kind, items = GENERIC, lst
+
+                stack.append((kind, items))
+                named = False
+
+            # Group end, tolerating stray closing parentheses
+            elif token == ')':
+                if len(stack) > 1:
+                    stack.pop()
+                    kind, items = stack[-1]
+                named = False
+
+            # VCP code
+            elif kind == VCP:
+                last_code = HEX.get(token)
+                if last_code is not None:
+                    if last_code not in items:
+                        items[last_code] = None
+                else:
+                    codes = self._hex(token)
+                    for code in codes:
+                        if code not in items:
+                            items[code] = None
+                    last_code = codes[-1] if codes else None
+                named = True
+
+            # VCP value
+            elif kind == VCP_VALUES:
+                value = HEX.get(token)
+                if value is not None:
+                    items.append(value)
+                else:
+                    items.extend(self._hex(token))
+                named = True
 
-            while next_depth < depth:
-                depth, cur = stack.pop()
+            else:
+                items.append(token)
+                named = True
 
-        # Copy to self
-        for k, lst in result_list:
-            if len(lst) == 1:
-                lst = lst[0]
-            self[k] = lst
+        self._last_code = last_code
 
 
-    def _process_vcp_codes(self):
-        vcp = self.get('vcp', None)
-        if vcp is None:
-            return
 
-        vcp_out = {}
+##########
+# Capabilities
+class OsMonitorCapabilities(NamespaceMap, LoggableMixin, HierarchicalMixin, NamedMixin):
+    def __init__(self, capability_string : T_CapabilitiesInput, instance_parent : BaseOsMonitor, parser : Optional[CapabilitiesParser] = None):
+        super().__init__(instance_name="Capabilities", instance_parent=instance_parent)
 
-        for code in self.vcp:
-            if isinstance(code, tuple):
-                values = []
-                for val in code[1]:
-                    values.append(int(val, 16))
+        self._parse(capability_string, parser)
 
-                vcp_out[int(code[0], 16)] = values
 
-            else:
-                vcp_out[int(code, 16)] = None
+    # VCP Codes
+    def iter_vcp_codes(self):
+        vcp = self.get('vcp', None)
+        if vcp is None:
+            return
 
-        self.vcp = vcp_out
+        return vcp.items()
 
+    def get_vcp_codes(self):
+        return self.get('vcp', None)
 
-    def _parse(self, capability_string):
+
+    # Parsing
+    def _parse(self, capability_string : T_CapabilitiesInput, parser : Optional[CapabilitiesParser] = None):
         if capability_string is None:
             raise ValueError(f"'capability_string' must not be None")
 
-        self.raw = capability_string
+        if not isinstance(capability_string, str):
+            capability_string = str(capability_string, 'latin-1')
 
-        # Split by parentheses
-        self._parse_parentheses(capability_string)
+        self.raw = capability_string
 
-        # Post-process VCP codes
-        self._process_vcp_codes()
\ No newline at end of file
+        # Reuse the parser if the string was already fed into it while being read
+        result = parser.close() if parser is not None else CapabilitiesParser().parse(capability_string)
+        for k, v in result.items():
+            self[k] = v
@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+from typing import Optional
+
+from .. import BaseOsMonitor
+from ..monitor import VcpError
+from .capabilities import CapabilitiesParser
+
+from app.util import LoggableHierarchicalNamedMixin
+
+
+##########
+# Capabilities reader
+class CapabilitiesReader(LoggableHierarchicalNamedMixin):
+    """
+    Backend-agnostic reader for the MCCS capabilities string.
+
+    Requests the capabilities string fragment by fragment, retrying only the fragment that failed, and feeds each fragment
+    into a CapabilitiesParser as it arrives. Progress is kept in 'partial' so that an interrupted read can be resumed later.
+
+    Backends that cannot read individual fragments (i.e. BaseOsMonitor._get_capabilities_fragment raises
+    NotImplementedError) fall back to reading the whole string at once, discarding any partial string.
+    """
+
+    def __init__(self, monitor : BaseOsMonitor, partial : Optional[str] = None, retries : int = 3):
+        """
+        Args:
+            monitor: The monitor to read the capabilities string from.
+            partial: Previously read start of the capabilities string, to resume from.
+            retries: How many times a failed fragment is retried before giving up.
+        """
+        super().__init__(instance_name="CapabilitiesReader", instance_parent=monitor)
+
+        self.monitor = monitor
+        self.retries = retries
+        self.parser  = CapabilitiesParser()
+
+        self._buffer = bytearray(partial.encode('latin-1') if partial else b'')
+        if self._buffer:
+            self.parser.feed(memoryview(self._buffer))
+
+    @property
+    def partial(self) -> str:
+        """
+        Returns:
+            str: The part of the capabilities string read so far.
+        """
+        return str(self._buffer, 'latin-1')
+
+    def _read_fragment(self, offset : int) -> bytes:
+        error = None
+
+        for attempt in range(self.retries + 1):
+            try:
+                return self.monitor._get_capabilities_fragment(offset)
+            except NotImplementedError:
+                raise
+            except Exception as e:
+                self.log.debug(f"Reading capabilities fragment at offset {offset} failed (attempt {attempt+1}/{self.retries+1}): {e}")
+                error = e
+
+        raise VcpError(f"Failed to read capabilities fragment at offset {offset}") from error
+
+    def read(self) -> str:
+        """
+        Read the remainder of the capabilities string.
+
+        Returns:
+            str: The complete capabilities string. The parsed result is available through 'parser'.
+
+        Raises:
+            VcpError: If a fragment could not be read. Anything read so far is kept in 'partial'.
+        """
+        buffer = self._buffer
+
+        while True:
+            try:
+                fragment = self._read_fragment(len(buffer))
+            except NotImplementedError:
+                if buffer:
+                    self.log.debug("Capabilities fragments are not supported, discarding the partial capabilities string")
+                return self._read_whole()
+
+            # An empty fragment marks the end of the string
+            if not fragment:
+                break
+
+            buffer += fragment
+            self.parser.feed(fragment)
+
+        return self.partial.rstrip('\x00')
+
+    def _read_whole(self) -> str:
+        cap_str = self.monitor._get_capabilities_string()
+        self._buffer = bytearray(cap_str.encode('latin-1'))
+        self.parser = CapabilitiesParser()
+        self.parser.feed(cap_str)
+        return cap_str
@@ -4,10 +4,15 @@
 import struct
 import string
 from collections import namedtuple, OrderedDict
+from typing import Any, Dict, List, Optional
 
 from app.util import Namespace, HierarchicalMixin
 
 
+# Sentinel for lazily parsed sections that were not parsed yet
+_UNPARSED = object()
+
+
 
 ###########
 # Extended Display Identification Data class
@@ -45,27 +50,50 @@ class Edid(Namespace, HierarchicalMixin):
 
     UnpackedEdid = namedtuple("UnpackedEdid", tuple(EDID_FORMAT.keys()))
 
+    EDID_HEADER = b'\x00\xFF\xFF\xFF\xFF\xFF\xFF\x00'
+
+    # Scalar fields between the header and the chromaticity coordinates (bytes 8-24)
+    EDID_SCALARS_STRUCT = struct.Struct('>HHIBBBBBBBBB')
+    EDID_SCALARS_OFFSET = 8
+
+    # Byte offsets of the variable sections of the base block
+    EDID_CHROMATICITY_OFFSET  = 25
+    EDID_ESTABLISHED_OFFSET   = 35
+    EDID_STANDARD_OFFSET      = 38
+    EDID_DESCRIPTORS_OFFSET   = 54
+    EDID_DESCRIPTOR_SIZE      = 18
+
+    # Extension block tags
+    EXTENSION_CTA       = 0x02
+    EXTENSION_DISPLAYID = 0x70
+
+    # Established timings, in bitmap order (byte 35 bit 7 first)
+    ESTABLISHED_TIMINGS = (
+        (720, 400, 70), (720, 400, 88), (640, 480, 60), (640, 480, 67), (640, 480, 72), (640, 480, 75), (800, 600, 56), (800, 600, 60),
+        (800, 600, 72), (800, 600, 75), (832, 624, 75), (1024, 768, 87), (1024, 768, 60), (1024, 768, 70), (1024, 768, 75), (1280, 1024, 75),
+        (1152, 870, 75),
+    )
+
+    # Standard timing aspect ratios (height / width), index by the top 2 bits of the second byte
+    STANDARD_ASPECT_RATIOS = ((10, 16), (3, 4), (4, 5), (9, 16))
+
+    DIGITAL_BIT_DEPTHS = (None, 6, 8, 10, 12, 14, 16, None)
+    DIGITAL_INTERFACES = {1: 'DVI', 2: 'HDMIa', 3: 'HDMIb', 4: 'MDDI', 5: 'DisplayPort'}
+
+    CTA_EOTFS        = ('sdr', 'hdr', 'pq', 'hlg')
+    CTA_COLORIMETRY  = ('xvYCC601', 'xvYCC709', 'sYCC601', 'opYCC601', 'opRGB', 'BT2020cYCC', 'BT2020YCC', 'BT2020RGB')
+
     def __init__(self, in_bytes, instance_parent=None):
         super().__init__(instance_parent=instance_parent)
 
         if in_bytes is not None:
             self.decode(in_bytes)
 
-    def _check_checksum(self):
+    def _check_checksum(self, block : memoryview):
         # Check checksum
-        if sum(map(int, self.raw)) % 256 != 0:
+        if sum(block) % 256 != 0:
             raise ValueError("Checksum mismatch.")
 
-    def _unpack(self):
-        # Unpack structure
-        tup = struct.unpack(self.__class__.EDID_STRUCT_FORMAT, self.raw)
-
-        unpacked = {}
-        for i, v in enumerate(tup):
-            unpacked[self.__class__.EDID_FORMAT_KEYS[i]] = v
-
-        self.unpacked = unpacked
-
     @staticmethod
     def parse_manufacture_id(id, swap=False):
         if swap:
@@ -89,29 +117,92 @@ class Edid(Namespace, HierarchicalMixin):
 
         return id
 
-    def _parse_type(self):
-        is_digital = int(self.unpacked['video_input']) & 0b1000_0000
-        # bitfield TODO
+
+    # Base block
+    def _parse_type(self, video_input : int):
+        is_digital = video_input & 0b1000_0000
         return "digital" if is_digital else "analog"
 
-    def _parse_size(self):
+    def _parse_video_input(self, video_input : int) -> Dict[str, Any]:
+        if not (video_input & 0b1000_0000):
+            return {
+                'digital'     : False,
+                'sync_on_green': bool(video_input & 0b0000_0010),
+            }
+
+        return {
+            'digital'  : True,
+            'bit_depth': self.__class__.DIGITAL_BIT_DEPTHS[(video_input >> 4) & 0b111],
+            'interface': self.__class__.DIGITAL_INTERFACES.get(video_input & 0b1111, None),
+        }
+
+    def _parse_size(self, horizontal : int, vertical : int):
         # TODO: These can also be aspect ratios
         return {
-            'width' : int(self.unpacked['horizontal']),
-            'height': int(self.unpacked['vertical'  ])
+            'width' : horizontal,
+            'height': vertical
+        }
+
+    def _parse_features(self, features : int, digital : bool) -> Dict[str, Any]:
+        display_type = (features >> 3) & 0b11
+        if digital:
+            color = ('RGB444', 'RGB444+YCrCb444', 'RGB444+YCrCb422', 'RGB444+YCrCb444+YCrCb422')[display_type]
+        else:
+            color = ('monochrome', 'RGB', 'non-RGB', None)[display_type]
+
+        return {
+            'standby'             : bool(features & 0b1000_0000),
+            'suspend'             : bool(features & 0b0100_0000),
+            'active_off'          : bool(features & 0b0010_0000),
+            'color'               : color,
+            'srgb'                : bool(features & 0b0000_0100),
+            'preferred_native'    : bool(features & 0b0000_0010),
+            'continuous_frequency': bool(features & 0b0000_0001),
+        }
+
+    def _parse_chromaticity(self, color : memoryview) -> Dict[str, tuple]:
+        # 10-bit coordinates: the 2 least significant bits of each are packed into the first 2 bytes
+        lsb = (color[0] << 8) | color[1]
+
+        def _coord(i):
+            return ((color[2 + i] << 2) | ((lsb >> (14 - 2*i)) & 0b11)) / 1024
+
+        return {
+            'red'  : (_coord(0), _coord(1)),
+            'green': (_coord(2), _coord(3)),
+            'blue' : (_coord(4), _coord(5)),
+            'white': (_coord(6), _coord(7)),
+        }
+
+    @staticmethod
+    def _parse_detailed_timing(descriptor : memoryview) -> Dict[str, Any]:
+        pixel_clock = (descriptor[0] | (descriptor[1] << 8)) * 10_000
+
+        width    = descriptor[2] | ((descriptor[4] & 0xF0) << 4)
+        h_blank  = descriptor[3] | ((descriptor[4] & 0x0F) << 8)
+        height   = descriptor[5] | ((descriptor[7] & 0xF0) << 4)
+        v_blank  = descriptor[6] | ((descriptor[7] & 0x0F) << 8)
+
+        total = (width + h_blank) * (height + v_blank)
+
+        return {
+            'width'      : width,
+            'height'     : height,
+            'refresh'    : round(pixel_clock / total, 3) if total else None,
+            'pixel_clock': pixel_clock,
+            'interlaced' : bool(descriptor[17] & 0b1000_0000),
         }
 
-    def _parse_descriptor(self, descriptor):
-        selector = int.from_bytes(descriptor[0:1], "big")
-        if selector != 0:
-            # Not a display descriptor
-            return descriptor
+    def _parse_descriptor(self, descriptor : memoryview):
+        # Detailed timing descriptor
+        if descriptor[0] != 0 or descriptor[1] != 0:
+            return self._parse_detailed_timing(descriptor)
 
         _type = descriptor[3]
-        _bytes = descriptor[5:17]
+        _bytes = descriptor[5:18]
 
         def _to_text():
-            return _bytes.decode('cp437').split('\n', 1)[0]
+            return str(_bytes, 'cp437').split('\n', 1)[0]
 
         # Display serial number
         if _type == 0xFF:
@@ -124,58 +215,310 @@ class Edid(Namespace, HierarchicalMixin):
             self.display_name = _to_text()
 
         return {
-            'type' : type,
-            'bytes': _bytes
+            'type' : _type,
+            'bytes': bytes(_bytes)
         }
 
     def decode(self, in_bytes):
-        self.length = len(in_bytes)
+        raw = memoryview(in_bytes)
+        if raw.ndim != 1 or raw.format != 'B':
+            raw = raw.cast('B')
+
+        # Extensions are parsed lazily from the buffer, so keep our own copy of mutable ones (e.g. a bytearray), which the
+        # caller may modify or resize afterwards
+        if not raw.readonly:
+            raw = memoryview(bytes(raw))
+
+        self.length = len(raw)
 
         # EDID must be at least 128 bytes long
         if self.length < self.__class__.EDID_STRUCT_SIZE:
             raise RuntimeError(fr"EDID is too small, got {self.length}, expected 128+ bytes.")
 
-        # If the EDID is longer than 128 bytes, we ignore everything past 128 bytes as those are the extension blocks
-        # which we don't care about
-        if self.length > self.__class__.EDID_STRUCT_SIZE:
-            in_bytes = in_bytes[0:self.__class__.EDID_STRUCT_SIZE]
-            self.length = self.__class__.EDID_STRUCT_SIZE
+        # Check header and checksum of the base block
+        base = raw[0:self.__class__.EDID_STRUCT_SIZE]
+        if base[0:8] != self.__class__.EDID_HEADER:
+            raise ValueError("Invalid EDID header.")
+        self._check_checksum(base)
 
-        # Check checksum and unpack
-        self.raw = in_bytes
-        self._check_checksum()
-        self._unpack()
+        # Unpack scalar values straight from the buffer
+        (manufacturer_id, product_id, serial_number, week, year, edid_version, edid_revision,
+         video_input, horizontal, vertical, gamma, features) = self.__class__.EDID_SCALARS_STRUCT.unpack_from(base, self.__class__.EDID_SCALARS_OFFSET)
 
         # Parse unpacked values
-        self.manufacturer_id = self.__class__.parse_manufacture_id(self.unpacked['manufacturer_id'])
-        self.product_id      = self.__class__.parse_product_id(self.unpacked['product_id'])
-        self.serial_number   = int(self.unpacked['serial_number'])
-        self.week            = int(self.unpacked['week'])
-        self.year            = int(self.unpacked['year'])
-        self.edid_version    = f"{self.unpacked['edid_version']}.{self.unpacked['edid_revision']}"
-        self.type            = self._parse_type()
-        self.size            = self._parse_size()
-        self.gamma           = float(self.unpacked['gamma'] + 100) / 100
-        self.features        = None  # TODO
-        self.chromacity      = None  # TODO
-        self.timings         = None  # TODO
-        self.num_extensions  = int(self.unpacked['extension'])
+        self.manufacturer_id = self.__class__.parse_manufacture_id(manufacturer_id)
+        self.product_id      = self.__class__.parse_product_id(product_id)
+        self.serial_number   = serial_number
+        self.week            = week
+        self.year            = year
+        self.manufacture_year = 1990 + year
+        self.edid_version    = f"{edid_version}.{edid_revision}"
+        self.type            = self._parse_type(video_input)
+        self.video_input     = self._parse_video_input(video_input)
+        self.size            = self._parse_size(horizontal, vertical)
+        self.gamma           = float(gamma + 100) / 100 if gamma != 0xFF else None
+        self.features        = self._parse_features(features, self.video_input['digital'])
+        self.chromacity      = self._parse_chromaticity(base[self.__class__.EDID_CHROMATICITY_OFFSET:self.__class__.EDID_ESTABLISHED_OFFSET])
+        self.num_extensions  = base[126]
 
         # Parse descriptors
         self.serial_string    = None
         self.unspecified_text = None
         self.display_name     = None
 
-        self.descriptors = [
-            self._parse_descriptor(self.unpacked['descriptor1']),
-            self._parse_descriptor(self.unpacked['descriptor2']),
-            self._parse_descriptor(self.unpacked['descriptor3']),
-            self._parse_descriptor(self.unpacked['descriptor4'])
-        ]
+        offset = self.__class__.EDID_DESCRIPTORS_OFFSET
+        size   = self.__class__.EDID_DESCRIPTOR_SIZE
+        self.descriptors = [self._parse_descriptor(base[offset + i*size:offset + (i+1)*size]) for i in range(4)]
 
-        # Clean up
-        del self.raw
-        del self.unpacked
+        # Everything else is only parsed when first accessed
+        self._raw        = raw
+        self._timings    = _UNPARSED
+        self._cta        = _UNPARSED
+        self._displayid  = _UNPARSED
 
         # self.log.debug(f"Decode complete: {self}")
         self.freeze_schema()
+
+
+    # Timings
+    @property
+    def timings(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Timings supported by the display, parsed on first access.
+
+        Returns:
+            dict: 'established', 'standard' and 'detailed' timing lists. Each timing is a dict with at least 'width',
+                'height' and 'refresh'.
+        """
+        if self._timings is _UNPARSED:
+            self._timings = self._parse_timings()
+        return self._timings
+
+    def _parse_timings(self) -> Dict[str, List[Dict[str, Any]]]:
+        raw = self._raw
+        cls = self.__class__
+
+        # Established timings bitmap
+        established = []
+        bitmap = int.from_bytes(raw[cls.EDID_ESTABLISHED_OFFSET:cls.EDID_STANDARD_OFFSET], 'big')
+        for i, (width, height, refresh) in enumerate(cls.ESTABLISHED_TIMINGS):
+            if bitmap & (1 << (23 - i)):
+                established.append({'width': width, 'height': height, 'refresh': refresh})
+
+        # Standard timings
+        standard = []
+        for i in range(cls.EDID_STANDARD_OFFSET, cls.EDID_DESCRIPTORS_OFFSET, 2):
+            b0, b1 = raw[i], raw[i + 1]
+            if b0 == 0x01 and b1 == 0x01 or b0 == 0x00:
+                continue
+
+            width = (b0 + 31) * 8
+            num, den = cls.STANDARD_ASPECT_RATIOS[b1 >> 6]
+            # Before EDID 1.3 the 16:10 aspect ratio was 1:1
+            if b1 >> 6 == 0 and self.edid_version < "1.3":
+                num, den = 1, 1
+            standard.append({'width': width, 'height': width * num // den, 'refresh': (b1 & 0x3F) + 60})
+
+        # Detailed timings
+        detailed = [d for d in self.descriptors if 'pixel_clock' in d]
+
+        return {
+            'established': established,
+            'standard'   : standard,
+            'detailed'   : detailed,
+        }
+
+
+    # Extensions
+    @property
+    def extension_blocks(self) -> List[memoryview]:
+        """
+        Returns:
+            list: Views over the extension blocks present in the buffer (no copies are made).
+        """
+        raw  = self._raw
+        size = self.__class__.EDID_STRUCT_SIZE
+        count = min(self.num_extensions, len(raw) // size - 1)
+        return [raw[(i+1)*size:(i+2)*size] for i in range(count)]
+
+    def _find_extension(self, tag : int) -> Optional[memoryview]:
+        for block in self.extension_blocks:
+            if block[0] == tag:
+                self._check_checksum(block)
+                return block
+        return None
+
+    @property
+    def cta(self) -> Optional[Dict[str, Any]]:
+        """
+        The CTA-861 extension block, parsed on first access.
+
+        Returns:
+            dict or None: The parsed CTA-861 extension, or None if not present.
+        """
+        if self._cta is _UNPARSED:
+            block = self._find_extension(self.__class__.EXTENSION_CTA)
+            self._cta = self._parse_cta(block) if block is not None else None
+        return self._cta
+
+    @property
+    def hdr(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            dict or None: The HDR static metadata from the CTA-861 extension, or None if not present.
+        """
+        cta = self.cta
+        return cta['hdr'] if cta is not None else None
+
+    @property
+    def displayid(self) -> Optional[Dict[str, Any]]:
+        """
+        The DisplayID extension block, parsed on first access.
+
+        Returns:
+            dict or None: The parsed DisplayID extension, or None if not present.
+        """
+        if self._displayid is _UNPARSED:
+            block = self._find_extension(self.__class__.EXTENSION_DISPLAYID)
+            self._displayid = self._parse_displayid(block) if block is not None else None
+        return self._displayid
+
+    def _parse_cta(self, block : memoryview) -> Dict[str, Any]:
+        dtd_offset = block[2]
+        flags      = block[3]
+
+        cta = {
+            'revision'        : block[1],
+            'underscan'       : bool(flags & 0b1000_0000),
+            'basic_audio'     : bool(flags & 0b0100_0000),
+            'ycbcr444'        : bool(flags & 0b0010_0000),
+            'ycbcr422'        : bool(flags & 0b0001_0000),
+            'vics'            : [],
+            'native_vics'     : [],
+            'hdmi'            : False,
+            'colorimetry'     : [],
+            'hdr'             : None,
+            'data_blocks'     : [],
+            'detailed_timings': [],
+        }
+
+        # Data block collection
+        end = dtd_offset if 4 <= dtd_offset <= 127 else 4
+        i = 4
+        while i < end:
+            tag    = block[i] >> 5
+            length = block[i] & 0x1F
+            payload = block[i+1:min(i+1+length, end)]
+            i += 1 + length
+
+            ext_tag = None
+            if tag == 7 and len(payload) > 0:
+                ext_tag = payload[0]
+                payload = payload[1:]
+
+            cta['data_blocks'].append((tag, ext_tag, bytes(payload)))
+
+            # Video data block
+            if tag == 2:
+                for svd in payload:
+                    vic = svd & 0x7F if 1 <= (svd & 0x7F) <= 64 else svd
+                    cta['vics'].append(vic)
+                    if svd & 0x80 and vic == svd & 0x7F:
+                        cta['native_vics'].append(vic)
+
+            # Vendor specific data block
+            elif tag == 3 and len(payload) >= 3:
+                oui = payload[0] | (payload[1] << 8) | (payload[2] << 16)
+                if oui in (0x000C03, 0xC45DD8):
+                    cta['hdmi'] = True
+
+            # Colorimetry data block
+            elif ext_tag == 5 and len(payload) >= 1:
+                cta['colorimetry'] = [nm for bit, nm in enumerate(self.__class__.CTA_COLORIMETRY) if payload[0] & (1 << bit)]
+
+            # HDR static metadata data block
+            elif ext_tag == 6 and len(payload) >= 2:
+                cta['hdr'] = self._parse_hdr_static_metadata(payload)
+
+        # Detailed timing descriptors
+        if dtd_offset >= 4:
+            size = self.__class__.EDID_DESCRIPTOR_SIZE
+            for offset in range(dtd_offset, 127 - size + 1, size):
+                descriptor = block[offset:offset + size]
+                if descriptor[0] == 0 and descriptor[1] == 0:
+                    break
+                cta['detailed_timings'].append(self._parse_detailed_timing(descriptor))
+
+        return cta
+
+    def _parse_hdr_static_metadata(self, payload : memoryview) -> Dict[str, Any]:
+        def _luminance(cv):
+            return round(50 * 2 ** (cv / 32), 3)
+
+        max_luminance = _luminance(payload[2]) if len(payload) >= 3 and payload[2] else None
+
+        min_luminance = None
+        if max_luminance is not None and len(payload) >= 5:
+            min_luminance = round(max_luminance * (payload[4] / 255) ** 2 / 100, 4)
+
+        return {
+            'eotfs'                : [nm for bit, nm in enumerate(self.__class__.CTA_EOTFS) if payload[0] & (1 << bit)],
+            'static_metadata_types': [bit + 1 for bit in range(8) if payload[1] & (1 << bit)],
+            'max_luminance'        : max_luminance,
+            'max_frame_avg_luminance': _luminance(payload[3]) if len(payload) >= 4 and payload[3] else None,
+            'min_luminance'        : min_luminance,
+        }
+
+    def _parse_displayid(self, block : memoryview) -> Dict[str, Any]:
+        # The DisplayID section follows the extension tag byte
+        section = block[1:]
+        version = section[0]
+        length  = section[1]
+
+        displayid = {
+            'version'         : f"{version >> 4}.{version & 0xF}",
+            'product_type'    : section[2],
+            'data_blocks'     : [],
+            'detailed_timings': [],
+        }
+
+        end = min(4 + length, len(section) - 1)
+        i = 4
+        while i + 3 <= end:
+            tag    = section[i]
+            length = section[i + 2]
+            payload = section[i+3:min(i+3+length, end)]
+            i += 3 + length
+
+            # Padding
+            if tag == 0 and length == 0:
+                break
+
+            displayid['data_blocks'].append((tag, bytes(payload)))
+
+            # Type I (DisplayID 1.x, 10 kHz units) and type VII (DisplayID 2.x, 1 kHz units) detailed timings
+            if tag in (0x03, 0x22):
+                unit = 10_000 if tag == 0x03 else 1_000
+                for offset in range(0, len(payload) - 19, 20):
+                    displayid['detailed_timings'].append(self._parse_displayid_timing(payload[offset:offset + 20], unit))
+
+        return displayid
+
+    @staticmethod
+    def _parse_displayid_timing(descriptor : memoryview, unit : int) -> Dict[str, Any]:
+        pixel_clock = (int.from_bytes(descriptor[0:3], 'little') + 1) * unit
+
+        width   = int.from_bytes(descriptor[4:6]  , 'little') + 1
+        h_blank = int.from_bytes(descriptor[6:8]  , 'little') + 1
+        height  = int.from_bytes(descriptor[12:14], 'little') + 1
+        v_blank = int.from_bytes(descriptor[14:16], 'little') + 1
+
+        total = (width + h_blank) * (height + v_blank)
+
+        return {
+            'width'      : width,
+            'height'     : height,
+            'refresh'    : round(pixel_clock / total, 3),
+            'pixel_clock': pixel_clock,
+            'interlaced' : bool(descriptor[3] & 0b0001_0000),
+        }
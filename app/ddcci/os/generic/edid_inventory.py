@@ -0,0 +1,186 @@
+# SPDX-License-Identifier: GPLv3-or-later
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import struct
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from .edid import Edid
+
+
+
+###########
+# Columnar decoder for many EDID base blocks
+class EdidInventory:
+    """
+    Bulk decoder for a concatenation of 128-byte EDID base blocks, e.g. an archive of EDIDs collected across a fleet.
+
+    Instead of creating one Edid object per record, all records are unpacked in one go with struct.iter_unpack using the
+    layout in Edid.EDID_FORMAT, and stored column by column. Numeric columns are stored as compact arrays.
+
+    Besides the raw EDID_FORMAT fields, the following derived columns are available:
+        - 'manufacturer': the decoded 3-letter manufacturer ID
+        - 'manufacture_year': the year of manufacture
+        - 'valid': whether the record has a valid header and checksum
+
+    Use record() to fully decode a single record into an Edid object.
+    """
+
+    RECORD_SIZE = Edid.EDID_STRUCT_SIZE
+
+    # Array typecodes for the numeric EDID_FORMAT fields
+    ARRAY_TYPECODES = {'B': 'B', 'H': 'H', 'I': 'I'}
+
+    def __init__(self, data : Union[bytes, bytearray, memoryview]):
+        """
+        Args:
+            data: Concatenated 128-byte EDID records. Trailing incomplete records are ignored.
+        """
+        view = memoryview(data)
+        if view.ndim != 1 or view.format != 'B':
+            view = view.cast('B')
+
+        size  = self.__class__.RECORD_SIZE
+        count = len(view) // size
+        self._view = view[:count * size]
+        self.count = count
+
+        self.columns : Dict[str, Union[array, List[Any]]] = {}
+        self._unpack()
+        self._derive()
+
+    @classmethod
+    def from_file(cls, path : str) -> 'EdidInventory':
+        """
+        Load an inventory from a file containing concatenated 128-byte EDID records.
+
+        Args:
+            path: Path to the file.
+
+        Returns:
+            EdidInventory: The decoded inventory.
+        """
+        with open(path, 'rb') as file:
+            return cls(file.read())
+
+
+    # Decoding
+    def _unpack(self) -> None:
+        keys = Edid.EDID_FORMAT_KEYS
+
+        if self.count == 0:
+            for k in keys:
+                self.columns[k] = []
+            return
+
+        # Transpose the unpacked records into columns
+        columns = zip(*struct.iter_unpack(Edid.EDID_STRUCT_FORMAT, self._view))
+
+        for k, column in zip(keys, columns):
+            typecode = self.__class__.ARRAY_TYPECODES.get(Edid.EDID_FORMAT[k], None)
+            self.columns[k] = array(typecode, column) if typecode is not None else list(column)
+
+    def _derive(self) -> None:
+        columns = self.columns
+
+        # Manufacturer IDs repeat a lot, so decode each distinct value only once
+        manufacturers = {}
+        for id in set(columns['manufacturer_id']):
+            try:
+                manufacturers[id] = Edid.parse_manufacture_id(id)
+            except (ValueError, IndexError):
+                manufacturers[id] = None
+        columns['manufacturer'] = [manufacturers[id] for id in columns['manufacturer_id']]
+
+        columns['manufacture_year'] = array('H', (1990 + year for year in columns['year']))
+
+        # Checksums are summed directly over the buffer, without copying each record
+        view   = self._view
+        size   = self.__class__.RECORD_SIZE
+        header = Edid.EDID_HEADER
+        columns['valid'] = [
+            h == header and sum(view[offset:offset + size]) & 0xFF == 0
+            for h, offset in zip(columns['header'], range(0, len(view), size))
+        ]
+
+
+    # Access
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, name : str) -> Union[array, List[Any]]:
+        """
+        Args:
+            name: The column name.
+
+        Returns:
+            array or list: The values of the given column, one per record.
+        """
+        return self.columns[name]
+
+    def row(self, i : int) -> Dict[str, Any]:
+        """
+        Args:
+            i: The record index.
+
+        Returns:
+            dict: The values of every column for the given record.
+        """
+        return {k: v[i] for k, v in self.columns.items()}
+
+    def record(self, i : int) -> Edid:
+        """
+        Fully decode a single record.
+
+        Args:
+            i: The record index.
+
+        Returns:
+            Edid: The decoded EDID.
+        """
+        size = self.__class__.RECORD_SIZE
+        return Edid(self._view[i * size:(i + 1) * size])
+
+
+    # Queries
+    def filter(self, **criteria : Any) -> List[int]:
+        """
+        Find the records matching all of the given column values, e.g. filter(manufacturer='DEL', valid=True).
+        A criterion can also be a callable, which is called with the column value.
+
+        Returns:
+            list: The indices of the matching records.
+        """
+        indices : Iterable[int] = range(self.count)
+
+        for k, expected in criteria.items():
+            column = self.columns[k]
+            if callable(expected):
+                indices = [i for i in indices if expected(column[i])]
+            else:
+                indices = [i for i in indices if column[i] == expected]
+
+        return list(indices)
+
+    def group_by(self, *names : str, indices : Iterable[int] | None = None) -> Dict[Tuple, List[int]]:
+        """
+        Group records by the values of the given columns, e.g. group_by('manufacturer', 'manufacture_year').
+
+        Args:
+            names: The column names to group by.
+            indices: Only group these records (e.g. the result of filter()). Defaults to all records.
+
+        Returns:
+            dict: Mapping of each tuple of column values to the indices of the records that have them.
+        """
+        if indices is None:
+            indices = range(self.count)
+
+        columns = [self.columns[k] for k in names]
+        groups : Dict[Tuple, List[int]] = {}
+
+        for i in indices:
+            key = tuple(column[i] for column in columns)
+            groups.setdefault(key, []).append(i)
+
+        return groups
@@ -53,14 +53,44 @@ class BaseOsMonitor(Namespace, LoggableHierarchicalNamedMixin, metaclass=ABCMeta
         self.instance_name = info.get_monitor_name(spaces=False)
 
 
+    # OS handles
+    def hold_handles(self) -> None:
+        """
+        Keep any OS handles needed for VCP access open (once opened) until release_handles() is called.
+        Called by BaseOsMonitorList.batch(). The default implementation does nothing.
+        """
+        pass
+
+    def release_handles(self) -> None:
+        """
+        Close any OS handles kept open by hold_handles(). The default implementation does nothing.
+        """
+        pass
+
+
     # Capabilities
     @abstractmethod
     def _get_capabilities_string(self) -> str:
         pass
 
+    def _get_capabilities_fragment(self, offset : int) -> bytes:
+        """
+        Read the capabilities string fragment starting at 'offset'.
+        Backends that can only read the whole capabilities string at once should not override this.
+
+        Args:
+            offset: Offset of the fragment within the capabilities string.
+
+        Returns:
+            bytes: The fragment. An empty fragment marks the end of the capabilities string.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support reading capabilities fragments")
+
     def query_capabilities(self):
-        cache = CFG.monitors.capabilities.cache
+        config = CFG.snapshot().monitors.capabilities
+        cache = config.cache
 
+        cfg = None
         cap_str = None
         if cache:
             from ..monitor_config import MONITOR_CONFIG
@@ -69,20 +99,39 @@ class BaseOsMonitor(Namespace, LoggableHierarchicalNamedMixin, metaclass=ABCMeta
                 cap_str = cfg.get('capabilities', None)
                 self.log.debug("Loaded monitor capabilities from cache")
 
+        parser = None
         if not cap_str:
             self.log.info("Querying monitor capabilities... (may take a few seconds)")
-            cap_str = self._get_capabilities_string()
+
+            from .generic.capabilities_reader import CapabilitiesReader
+            partial = cfg.get('capabilities_partial', None) if cfg is not None else None
+            if partial:
+                self.log.debug(f"Resuming capabilities query from offset {len(partial)}")
+
+            reader = CapabilitiesReader(self, partial=partial, retries=config.fragment_retries)
+            try:
+                cap_str = reader.read()
+            except VcpError:
+                # Keep what was read so far, so the next query can resume from there
+                if cache and reader.partial:
+                    from ..monitor_config import MONITOR_CONFIG
+                    with MONITOR_CONFIG.edit(self) as cfg:
+                        cfg['capabilities_partial'] = reader.partial
+                    self.log.debug(f"Saved partial monitor capabilities ({len(reader.partial)} bytes) to cache")
+                raise
+            parser = reader.parser
 
             if cache:
                 from ..monitor_config import MONITOR_CONFIG
-                cfg = MONITOR_CONFIG.get(self, add=True)
-                cfg['capabilities'] = cap_str
-                MONITOR_CONFIG.save()
+                with MONITOR_CONFIG.edit(self) as cfg:
+                    cfg['capabilities'] = cap_str
+                    if 'capabilities_partial' in cfg:
+                        del cfg['capabilities_partial']
                 self.log.debug("Saved monitor capabilities to cache")
 
 
         from .generic.capabilities import OsMonitorCapabilities
-        capabilities = OsMonitorCapabilities(cap_str, instance_parent=self)
+        capabilities = OsMonitorCapabilities(cap_str, instance_parent=self, parser=parser)
         self._capabilities = capabilities
 
     @property
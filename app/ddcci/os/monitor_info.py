@@ -3,7 +3,7 @@
 
 from abc import ABCMeta, abstractmethod
 
-from typing import Optional
+from typing import Any, Iterator, Optional, Sequence, Tuple
 from dataclasses import dataclass, fields
 from app.util import NamespaceMap, LoggableHierarchicalMixin
 
@@ -75,6 +75,8 @@ class BaseOsMonitorInfo(NamespaceMap, LoggableHierarchicalMixin, metaclass=ABCMe
         self.monitor = monitor
         self.monitor.instance_parent = self
 
+        self._searchable = None
+
         self._post_initialize(*args, **kwargs)
         self.freeze_schema()
 
@@ -120,11 +122,93 @@ class BaseOsMonitorInfo(NamespaceMap, LoggableHierarchicalMixin, metaclass=ABCMe
         return True
 
 
-    def update(self, other : 'BaseOsMonitorInfo'):
+    def update(self, other : 'BaseOsMonitorInfo') -> bool:
+        """
+        Replace this information with newer information about the same monitor, e.g. from a new enumeration.
+
+        Args:
+            other: The newer information.
+
+        Returns:
+            bool: Whether the information changed, e.g. because a value that was previously unknown is now known.
+        """
         assert(self.represents_same_monitor(other))
 
+        searchable = other.searchable
+        changed = self.searchable != searchable
+
         with self.unfreeze_schema(temporary=True):
-            self.__dict__ = dict(other.__dict__)
+            for key, value in other.items():
+                self[key] = value
+
+        self.adapter.instance_parent = self
+        self.monitor.instance_parent = self
+
+        # Snapshot of the information as of this update, so that the next update can tell whether it changed
+        self._searchable = searchable
+
+        return changed
+
+
+    # Searching
+    @property
+    def searchable(self) -> Tuple[str, ...]:
+        """
+        Flattened representation of this information for text searches (e.g. by RegexMonitorFilter): the string of every
+        value that is not None, except that a true 'primary' is represented by the string 'primary'.
+
+        Built on first access and replaced by update().
+
+        Returns:
+            tuple: The strings.
+        """
+        searchable = self._searchable
+        if searchable is None:
+            searchable = self._searchable = tuple(self._iter_searchable(self))
+        return searchable
+
+    @classmethod
+    def _iter_searchable(cls, info) -> Iterator[str]:
+        for key, value in info.items():
+            if value is None:
+                continue
+
+            if callable(getattr(value, 'items', None)):
+                yield from cls._iter_searchable(value)
+            elif key == 'primary':
+                if value:
+                    yield key
+            else:
+                yield str(value)
+
+    def get_field(self, path : Sequence[str]) -> Any:
+        """
+        Args:
+            path: The field path, e.g. ('monitor', 'serial').
+
+        Returns:
+            Any: The value of the field, or None if it (or any field along the path) is not known.
+        """
+        value = self
+        for part in path:
+            value = getattr(value, part, None)
+            if value is None:
+                break
+        return value
+
+    @staticmethod
+    def field_key(value : Any) -> str:
+        """
+        Normalize a field value for comparisons, so that values given as strings (e.g. on the command line) compare equal
+        to the actual values regardless of type and case.
+
+        Args:
+            value: The value.
+
+        Returns:
+            str: The normalized value.
+        """
+        return str(value).casefold()
 
 
     # Enumerate monitors
@@ -1,12 +1,16 @@
 # SPDX-License-Identifier: GPLv3-or-later
 # Copyright © 2020 pyddcci Rui Pinheiro
 
+import threading
+import contextlib
+
 from abc import ABCMeta
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from . import BaseOsMonitorInfo
 from . import BaseOsMonitor
 
-from app.util import NamespaceList, LoggableHierarchicalNamedMixin, CFG
+from app.util import NamespaceList, LoggableHierarchicalNamedMixin
 
 
 
@@ -21,34 +25,112 @@ class BaseOsMonitorList(NamespaceList, LoggableHierarchicalNamedMixin, metaclass
     OS_MONITOR_CLASS      = BaseOsMonitor
     OS_MONITOR_INFO_CLASS = BaseOsMonitorInfo
 
+    """ Fields of the monitor information that monitors can be looked up by, see lookup() """
+    INDEXED_FIELDS = ('monitor.serial', 'monitor.model', 'monitor.manufacturer_id', 'monitor.product_id', 'monitor.uid', 'adapter.primary')
+
     def __init__(self, name=None):
         super().__init__(instance_name=name)
 
+        # Nesting depth of batch(), and whether handles are held outside of batches, see hold_handles()
+        self._batch = 0
+        self._hold  = False
+        # Batches may be entered and exited from several threads (e.g. parallel CLI commands)
+        self._batch_lock = threading.RLock()
+
+        # Incremented whenever monitors are connected, disconnected or their information changes, see generation
+        self._generation = 0
+
+        # For every field in INDEXED_FIELDS, the monitors by field value (see lookup), and the values every monitor is
+        # indexed under. Updated by enumerate() for the monitors that changed.
+        self._indexes   : Dict[str, Dict[str, List[BaseOsMonitor]]] = {field: {} for field in self.__class__.INDEXED_FIELDS}
+        self._indexed   : Dict[BaseOsMonitor, Tuple[Optional[str], ...]] = {}
+        self._positions : Dict[BaseOsMonitor, int] = {}
+
         self.enumerate()
 
-        if CFG.app.cli.list_monitors:
-            self.list_monitors()
 
+    # Batching
+    @contextlib.contextmanager
+    def batch(self) -> Iterator['BaseOsMonitorList']:
+        """
+        Context manager for running many operations against the same monitors.
+
+        The monitors are enumerated once when entering the (outermost) batch, and enumerate() is a no-op until it exits,
+        so that all lookups resolve against the same snapshot. Monitors also keep their OS handles open for the duration
+        of the batch (see BaseOsMonitor.hold_handles), instead of reopening them for every VCP call.
+        """
+        with self._batch_lock:
+            if self._batch == 0:
+                self.enumerate()
+                for monitor in self:
+                    monitor.hold_handles()
+
+            self._batch += 1
+
+        try:
+            yield self
+        finally:
+            with self._batch_lock:
+                self._batch -= 1
+                if self._batch == 0 and not self._hold:
+                    for monitor in self:
+                        monitor.release_handles()
+
+    @property
+    def in_batch(self) -> bool:
+        return self._batch > 0
+
+    def hold_handles(self, hold : bool = True) -> None:
+        """
+        Keep the OS handles of all monitors (including ones connected later) open until called with hold=False, e.g. for
+        long-running processes. Unlike batch(), this does not prevent enumeration.
+        Args:
+            hold: Whether to hold or release the handles.
+        """
+        self._hold = hold
+
+        for monitor in self:
+            if hold:
+                monitor.hold_handles()
+            elif self._batch == 0:
+                monitor.release_handles()
+
+
+    # Enumeration
+    @property
+    def generation(self) -> int:
+        """
+        Returns:
+            int: Counter incremented by enumerate() whenever the set of monitors or their information changes.
+                Anything derived from which monitors are connected (e.g. which monitor a filter selects) is only valid
+                for the same generation.
+        """
+        return self._generation
 
     def enumerate(self):
+        if self._batch > 0:
+            return
+
         # Obtain list of current monitor information
         infos = self.__class__.OS_MONITOR_INFO_CLASS.enumerate()
 
-        # Match with existing monitors
-        new_monitors = set()
+        # Match with existing monitors (a dict, to keep the order the OS reports them in)
+        new_monitors = {}
+        updated = []
 
         for info in infos:
             # Find a matching monitor
             for monitor in self:
                 if monitor.info.represents_same_monitor(info):
-                    monitor.info.update(info)
+                    if monitor.info.update(info):
+                        updated.append(monitor)
                     break
 
             else:
                 # No matching monitor found. Create new monitor
                 monitor = self.__class__.OS_MONITOR_CLASS(info, instance_parent=self)
 
-            new_monitors.add(monitor)
+            new_monitors[monitor] = None
 
         assert(len(new_monitors) == len(infos))
 
@@ -56,17 +138,89 @@ class BaseOsMonitorList(NamespaceList, LoggableHierarchicalNamedMixin, metaclass
         old_monitors = self._list
         self.replace(list(new_monitors))
 
+        if updated or new_monitors.keys() != set(old_monitors):
+            self._generation += 1
+
+            # Update the indexes of monitors that changed
+            for monitor in old_monitors:
+                if monitor not in new_monitors:
+                    self._unindex(monitor)
+            for monitor in updated:
+                self._unindex(monitor)
+            for monitor in self:
+                if monitor not in self._indexed:
+                    self._index(monitor)
+
+        self._positions = {monitor: i for i, monitor in enumerate(self)}
+
         # Notify any monitor that got disconnected
         for monitor in old_monitors:
             if monitor not in new_monitors:
+                monitor.release_handles()
                 monitor.on_disconnect()
 
         # Notify any monitor that just got connected
         for monitor in self:
             if not monitor.connected:
+                if self._hold:
+                    monitor.hold_handles()
                 monitor.on_connect()
 
 
+    # Indexes
+    def _index(self, monitor : BaseOsMonitor) -> None:
+        info = monitor.info
+        # Snapshot the information, so that later changes are noticed by BaseOsMonitorInfo.update()
+        info.searchable
+
+        keys = []
+        for field, index in self._indexes.items():
+            value = info.get_field(field.split('.'))
+            key = None if value is None else info.field_key(value)
+            if key is not None:
+                index.setdefault(key, []).append(monitor)
+            keys.append(key)
+
+        self._indexed[monitor] = tuple(keys)
+
+    def _unindex(self, monitor : BaseOsMonitor) -> None:
+        keys = self._indexed.pop(monitor, None)
+        if keys is None:
+            return
+
+        for index, key in zip(self._indexes.values(), keys):
+            if key is None:
+                continue
+
+            bucket = index[key]
+            bucket.remove(monitor)
+            if not bucket:
+                del index[key]
+
+    def lookup(self, field : str, value) -> Optional[List[BaseOsMonitor]]:
+        """
+        Look up monitors by the value of a field of their information, without checking every monitor.
+
+        Args:
+            field: The field path, e.g. 'monitor.serial'. Must be one of INDEXED_FIELDS.
+            value: The value, compared as in BaseOsMonitorInfo.field_key.
+
+        Returns:
+            list or None: The monitors with that value, in list order, or None if the field is not indexed.
+        """
+        index = self._indexes.get(field, None)
+        if index is None:
+            return None
+
+        bucket = index.get(BaseOsMonitorInfo.field_key(value), None)
+        if not bucket:
+            return []
+
+        if len(bucket) == 1:
+            return list(bucket)
+        return sorted(bucket, key=self._positions.__getitem__)
+
+
     def list_monitors(self):
         import oyaml as yaml
 
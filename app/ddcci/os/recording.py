@@ -0,0 +1,234 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Recording OS monitor backend, used for dry runs ('--plan').
+
+While a RecordingBackend is active, VCP transactions of every OS monitor are recorded together with their estimated
+duration instead of reaching the monitors, and are answered from a simulated state.
+"""
+
+import threading
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from . import BaseOsMonitor
+from app.ddcci.vcp.reply import VcpReply
+from app.ddcci.vcp.enums import VcpCodeType
+
+from app.util import CFG, LoggableMixin
+
+
+##########
+# Recorded operation
+@dataclass()
+class RecordedOperation:
+    """
+    A DDC/CI transaction that would have been sent to a monitor.
+
+    Attributes:
+        index (int): Position of the operation in the recording, starting at 1.
+        monitor (BaseOsMonitor): The monitor the operation targets.
+        op (str): One of 'capabilities', 'read' (a VCP query), 'write', 'verify' (a read checking a write) or 'wait' (a
+            read waiting for a code to become readable after a write).
+        code (int): The VCP code, None for 'capabilities'.
+        value (int): The value written or simulated as read, None for 'capabilities'.
+        cost (float): The estimated duration in seconds.
+        label (str): What issued the operation (see RecordingBackend.label).
+        avoidable (str): Why the operation is avoidable, or None if it is not.
+    """
+    index     : int
+    monitor   : BaseOsMonitor
+    op        : str
+    code      : Optional[int]
+    value     : Optional[int]
+    cost      : float
+    label     : Optional[str] = None
+    avoidable : Optional[str] = None
+
+
+##########
+# Recording backend
+class RecordingBackend(LoggableMixin):
+    """
+    Context manager that replaces the VCP access of the OS monitor class with a recorder.
+
+    Reads return the last value written or read by the recording, or 0 for codes not accessed yet, and verifying a write
+    always succeeds at the first read. Capabilities are read from the cache as usual; monitors without cached capabilities
+    record a capabilities query and are assumed to support every MCCS code.
+
+    Operations that would not change anything are marked avoidable: writes of the value a code already has (and the read
+    verifying them), and reads of codes whose value is already known.
+
+    Recording replaces methods of the OS monitor class, and therefore affects every thread while active.
+    """
+
+    PATCHED_METHODS = ('query_capabilities', '_vcp_query', '_vcp_write', 'verify')
+
+    def __init__(self, costs : Optional[Mapping[str, float]] = None):
+        """
+        Args:
+            costs: Estimated duration in seconds of each kind of operation, with keys 'query', 'write', 'capabilities'
+                and 'verify' (expected time spent retrying a verify). Defaults to 'monitors.costs'.
+        """
+        super().__init__()
+
+        self.costs = dict(costs if costs is not None else CFG.monitors.costs.asdict())
+
+        # Describes what is currently issuing operations, e.g. a CLI command
+        self.label : Optional[str] = None
+
+        self.operations : List[RecordedOperation] = []
+
+        self._lock      = threading.RLock()
+        self._local     = threading.local()
+        # Simulated value of each code, with the operation it is known from, and the last write of each code
+        self._state     : Dict[Tuple[BaseOsMonitor, int], Tuple[int, RecordedOperation]] = {}
+        self._writes    : Dict[Tuple[BaseOsMonitor, int], RecordedOperation] = {}
+        self._simulated : List[BaseOsMonitor] = []
+        self._saved     : Dict[str, Any] = {}
+        self._cls       : Optional[type] = None
+
+    @property
+    def total(self) -> float:
+        """
+        Returns:
+            float: Estimated duration of all recorded operations, in seconds, if run sequentially.
+        """
+        return sum(op.cost for op in self.operations)
+
+    @property
+    def avoidable(self) -> float:
+        """
+        Returns:
+            float: Estimated duration of the avoidable operations, in seconds.
+        """
+        return sum(op.cost for op in self.operations if op.avoidable)
+
+
+    # Installation
+    def __enter__(self) -> 'RecordingBackend':
+        from . import OS_MONITORS
+
+        cls = OS_MONITORS.__class__.OS_MONITOR_CLASS
+        if getattr(cls._vcp_query, '_recording', False):
+            raise RuntimeError("A RecordingBackend is already active")
+
+        self._cls = cls
+        for name in self.PATCHED_METHODS:
+            self._saved[name] = cls.__dict__.get(name, None)
+            setattr(cls, name, self._wrap(getattr(self, f"_{name.lstrip('_')}"), getattr(cls, name)))
+
+        return self
+
+    def __exit__(self, *exc) -> None:
+        cls = self._cls
+        for name, method in self._saved.items():
+            if method is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, method)
+        self._saved = {}
+        self._cls = None
+
+        # Simulated capabilities must not outlive the recording
+        for monitor in self._simulated:
+            monitor._capabilities = None
+        self._simulated = []
+
+    @staticmethod
+    def _wrap(handler : Callable, original : Callable) -> Callable:
+        def method(monitor, *args, **kwargs):
+            return handler(monitor, original, *args, **kwargs)
+        method._recording = True
+        return method
+
+
+    # Recording
+    def _record(self, monitor : BaseOsMonitor, op : str, code : Optional[int] = None, value : Optional[int] = None,
+                cost : Optional[float] = None, avoidable : Optional[str] = None) -> RecordedOperation:
+        with self._lock:
+            operation = RecordedOperation(
+                index     = len(self.operations) + 1,
+                monitor   = monitor,
+                op        = op,
+                code      = code,
+                value     = value,
+                cost      = self.costs.get(op if op in ('capabilities', 'write') else 'query', 0.0) if cost is None else cost,
+                label     = self.label,
+                avoidable = avoidable,
+            )
+            self.operations.append(operation)
+            return operation
+
+    def _query_capabilities(self, monitor : BaseOsMonitor, original : Callable) -> None:
+        config = CFG.snapshot().monitors.capabilities
+        if config.cache:
+            from ..monitor_config import MONITOR_CONFIG
+            cfg = MONITOR_CONFIG.get(monitor, add=False)
+            if cfg is not None and cfg.get('capabilities', None):
+                # Cached, so does not touch the monitor
+                return original(monitor)
+
+        self._record(monitor, 'capabilities')
+
+        from .generic.capabilities import OsMonitorCapabilities
+        monitor._capabilities = OsMonitorCapabilities(self._spec_capabilities(), instance_parent=monitor)
+        self._simulated.append(monitor)
+
+    @staticmethod
+    def _spec_capabilities() -> str:
+        from app.ddcci.vcp.vcp_spec import VCP_SPEC
+
+        codes = []
+        for code in VCP_SPEC.values():
+            values = sorted(code.values.key_set())
+            codes.append(f"{code.code:02X}({' '.join(f'{v:02X}' for v in values)})" if values else f"{code.code:02X}")
+
+        return f"(vcp({' '.join(codes)}))"
+
+    def _vcp_query(self, monitor : BaseOsMonitor, original : Callable, code : int) -> VcpReply:
+        purpose = getattr(self._local, 'purpose', None) or 'read'
+
+        with self._lock:
+            value, previous = self._state.get((monitor, code), (0, None))
+
+            avoidable = None
+            if purpose == 'read' and previous is not None:
+                avoidable = f"value already known from #{previous.index}"
+            elif purpose != 'read':
+                write = self._writes.get((monitor, code), None)
+                if write is not None and write.avoidable:
+                    avoidable = f"follows no-op write #{write.index}"
+
+            cost = None
+            if purpose == 'verify' and avoidable is None:
+                # Time monitors typically need before a write can be verified
+                cost = self.costs.get('query', 0.0) + self.costs.get('verify', 0.0)
+
+            operation = self._record(monitor, purpose, code, value, cost=cost, avoidable=avoidable)
+            if previous is None:
+                self._state[(monitor, code)] = (value, operation)
+
+        return VcpReply(command=code, type=VcpCodeType.VCP_SET_PARAMETER, current=value, maximum=0xFFFF)
+
+    def _vcp_write(self, monitor : BaseOsMonitor, original : Callable, code : int, value : int) -> None:
+        with self._lock:
+            current, previous = self._state.get((monitor, code), (None, None))
+
+            avoidable = None
+            if previous is not None and current == value:
+                avoidable = f"value already 0x{value:X} since #{previous.index}"
+
+            operation = self._record(monitor, 'write', code, value, avoidable=avoidable)
+            self._writes[(monitor, code)] = operation
+            if avoidable is None:
+                self._state[(monitor, code)] = (value, operation)
+
+    def _verify(self, monitor : BaseOsMonitor, original : Callable, code : int, value : Optional[int], timeout : int) -> None:
+        self._local.purpose = 'wait' if value is None else 'verify'
+        try:
+            original(monitor, code, value, timeout)
+        finally:
+            self._local.purpose = None
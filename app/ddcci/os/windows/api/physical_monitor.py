@@ -34,10 +34,11 @@ class _PHYSICAL_MONITOR(Structure):
 ############
 # Classes that abstract away OS-specific Monitor behaviour/calls
 class OsMonitorPhysicalHandle(object):
-    def __init__(self, os_monitor):
-        self.monitor = os_monitor
-        self.handle  = None
-        self.is_open = False  # self.handle may be None and still be valid
+    def __init__(self, os_monitor, keep_open=False):
+        self.monitor   = os_monitor
+        self.handle    = None
+        self.is_open   = False  # self.handle may be None and still be valid
+        self.keep_open = keep_open  # If True, leaving a 'with' block does not close the handle
 
     # Opening/Closing
     def open(self):
@@ -117,7 +118,8 @@ class OsMonitorPhysicalHandle(object):
         return self
 
     def __exit__(self, typ, value, traceback):
-        self.close()
+        if not self.keep_open:
+            self.close()
 
     def __del__(self):
         self.close()
@@ -15,9 +15,31 @@ class WindowsOsMonitor(BaseOsMonitor):
     Provides physical monitor handle access and VCP command support for Windows.
     """
 
+    def _post_initialize(self):
+        # Shared physical handle, see hold_handles()
+        self._hold     = False
+        self._physical = None
+
+
     # Physical Monitor Handle
     def get_physical_handle(self) -> OsMonitorPhysicalHandle:
-        return OsMonitorPhysicalHandle(self)
+        if not self._hold:
+            return OsMonitorPhysicalHandle(self)
+
+        if self._physical is None:
+            self._physical = OsMonitorPhysicalHandle(self, keep_open=True)
+        return self._physical
+
+    def hold_handles(self) -> None:
+        self._hold = True
+
+    def release_handles(self) -> None:
+        self._hold = False
+
+        if self._physical is not None:
+            self._physical.keep_open = False
+            self._physical.close()
+            self._physical = None
 
     # Capabilities
     def _get_capabilities_string(self) -> str:
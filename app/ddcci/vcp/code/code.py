@@ -70,15 +70,30 @@ class VcpCode(VcpStorageStorable, HierarchicalMixin, NamedMixin):
 
 
 
+    @property
+    def continuous(self) -> bool:
+        """
+        Whether this is a continuous control, i.e. any value from zero to a maximum is valid.
+        Returns:
+            bool: True if continuous, False otherwise.
+        """
+        return self.type == VcpControlType.VCP_CONTINUOUS
+
+
     # Magic methods (wrap Value Storage)
     def __getitem__(self, identifier : T_VcpStorageIdentifier):
         """
         Get a value by alias or integer using dictionary syntax.
+
+        Continuous codes only store named values. Any other integer value returns an ephemeral VcpValue
+        that is not added to the value storage, so that reads do not grow it.
         Args:
             identifier: Alias or integer value.
         Returns:
             VcpValue: The value object.
         """
+        if self.continuous:
+            return self._values.get_ephemeral(identifier)
         return self._values.get(identifier)
 
     def __setitem__(self, identifier : T_VcpStorageIdentifier, value : T_VcpStorageKey):
@@ -161,6 +176,21 @@ class VcpCode(VcpStorageStorable, HierarchicalMixin, NamedMixin):
         Returns:
             dict or str: The serialized representation.
         """
+        # Nothing changed since the last call, so reuse the previous result
+        res = self._get_serialize_cache(diff)
+        if res is not None:
+            return res
+
+        return self._set_serialize_cache(diff, self._serialize(diff))
+
+    def _serialize(self, diff : 'VcpCode|None' = None) -> Union[Dict[str, Any], str]:
+        """
+        Uncached implementation of serialize().
+        Args:
+            diff: Another VcpCode to diff against.
+        Returns:
+            dict or str: The serialized representation.
+        """
         if diff is None:
             return self.asdict()
 
@@ -103,32 +103,28 @@ class VcpCodeStorage(VcpStorage[VcpCode]):
         """
         cap_codes = capabilities.get_vcp_codes()
 
+        # Normalise capability codes into a set once, so reconciliation is linear in the number of codes/values
+        cap_keys = set(cap_codes.keys())
+
         # Remove codes that do not exist
-        for key in list(self.keys()):
-            if key not in cap_codes:
-                self.remove(key)
+        self.remove_keys(self.key_set() - cap_keys)
 
         # Process codes
         for code_i, cap_values in cap_codes.items():
             # Add codes that are in the capabilities but not already added
-            code = None
-            if code_i not in self:
-                code = self.add(code_i)
-                # code.add_name(f'Unknown Code 0x{code_i:X}')
+            code = self.add(code_i)
 
             # Process values
-            if cap_values is not None:
-                if code is None:
-                    code = self.get(code_i)
-
-                for value_i in list(code.values.keys()):
-                    if value_i not in cap_values:
-                        code.values.remove(value_i)
-
-                for value_i in cap_values:
-                    if value_i not in code.values:
-                        value = code.values.add(value_i)
-                        # value.add_name(f'Unknown Value 0x{value_i:X}')
+            if cap_values is None:
+                continue
+
+            value_keys = code.values.key_set()
+            code.values.remove_keys(value_keys - set(cap_values))
+
+            for value_i in cap_values:
+                if value_i not in value_keys:
+                    code.values.add(value_i)
+                    value_keys.add(value_i)
 
 
     @classmethod
@@ -10,7 +10,48 @@ from ordered_set import OrderedSet
 
 from app.util import HierarchicalMixin
 
-class VcpStorageStorable[Storable : VcpStorageStorable](metaclass=ABCMeta):
+class VcpSerializeCacheMixin:
+    """
+    Caches the result of serialize(diff) for objects that keep a '_revision' counter, i.e. VCP storables and storages.
+    """
+    __slots__ = ()
+
+    def _get_serialize_cache(self, diff : Any) -> Union[Dict[str, Any], str, None]:
+        """
+        Get the cached result of serialize(diff), if neither this object nor 'diff' changed since it was cached.
+
+        Args:
+            diff: The object the cached result was diffed against.
+
+        Returns:
+            dict or str or None: The cached serialized representation, or None if not cached.
+        """
+        cache = getattr(self, '_serialize_cache', None)
+        if cache is None:
+            return None
+
+        revision, cache_diff, diff_revision, result = cache
+        if revision != self._revision or cache_diff is not diff or diff_revision != (diff._revision if diff is not None else None):
+            return None
+
+        return result
+
+    def _set_serialize_cache(self, diff : Any, result : Union[Dict[str, Any], str]) -> Union[Dict[str, Any], str]:
+        """
+        Cache the result of serialize(diff).
+
+        Args:
+            diff: The object the result was diffed against.
+            result: The serialized representation.
+
+        Returns:
+            dict or str: The serialized representation.
+        """
+        self._serialize_cache = (self._revision, diff, diff._revision if diff is not None else None, result)
+        return result
+
+
+class VcpStorageStorable[Storable : VcpStorageStorable](VcpSerializeCacheMixin, metaclass=ABCMeta):
     """
     Abstract base for objects that can be stored in a VcpStorage.
 
@@ -21,6 +62,9 @@ class VcpStorageStorable[Storable : VcpStorageStorable](metaclass=ABCMeta):
     """ Methods that modify the instance. This list is used to generate wrapper methods automatically in the FallbackVcpStorageStorable classes """
     WRITE_METHODS = ('add_name', 'add_names', 'remove_name', 'remove_names', 'clear_names')
 
+    """ Incremented every time this object (or anything stored inside it) is modified """
+    _revision : int = 0
+
 
     def __init__(self, *args, **kwargs):
         """
@@ -45,6 +89,28 @@ class VcpStorageStorable[Storable : VcpStorageStorable](metaclass=ABCMeta):
         Internal initialization method for setting up names.
         """
         self._names = OrderedSet({})
+        self._serialize_cache = None
+
+
+    # Modification tracking
+    def __setattr__(self, name : str, value : Any) -> None:
+        """
+        Set an attribute, marking this object as modified if the attribute is public.
+        """
+        super().__setattr__(name, value)
+        if name[0] != '_':
+            self._touch()
+
+    def _touch(self) -> None:
+        """
+        Mark this object as modified, propagating to the storage that contains it.
+        """
+        self._revision += 1
+
+        from .storage import VcpStorage
+        parent = getattr(self, 'instance_parent', None)
+        if isinstance(parent, VcpStorage):
+            parent._touch()
 
     @abstractmethod
     def vcp_storage_key(self) -> T_VcpStorageKey:
@@ -111,6 +177,7 @@ class VcpStorageStorable[Storable : VcpStorageStorable](metaclass=ABCMeta):
             raise ValueError(f"new_name={new_name} cannot be a Key type")
 
         self._names.add(new_name)
+        self._touch()
 
         from .storage import VcpStorage
         if isinstance(self.instance_parent, VcpStorage):
@@ -140,6 +207,7 @@ class VcpStorageStorable[Storable : VcpStorageStorable](metaclass=ABCMeta):
             return
 
         self._names.remove(name)
+        self._touch()
 
         from .storage import VcpStorage
         if isinstance(self.instance_parent, VcpStorage):
@@ -174,7 +242,8 @@ class VcpStorageStorable[Storable : VcpStorageStorable](metaclass=ABCMeta):
             bool: True if equal, False otherwise.
         """
         if isinstance(other, self.__class__):
-            return other is self
+            # Ephemeral objects are not stored, so compare by key within the same storage rather than by identity
+            return other is self or (other.instance_parent is self.instance_parent and other.vcp_storage_key() == self.vcp_storage_key())
 
         if isinstance(other, T_VcpStorageKey):
             return other == self.vcp_storage_key()
@@ -8,17 +8,19 @@ from . import VcpStorageStorable, T_VcpStorageName, T_VcpStorageKey, T_VcpStorag
 
 from abc import ABCMeta, abstractmethod
 
+from .storable import VcpSerializeCacheMixin
+
 from app.util import LoggableMixin, HierarchicalMixin, NamedMixin
 
 
-class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin, NamedMixin, metaclass=ABCMeta):
+class VcpStorage[Storable : VcpStorageStorable](VcpSerializeCacheMixin, LoggableMixin, HierarchicalMixin, NamedMixin, metaclass=ABCMeta):
     """
     Abstract base for a collection of VCP storable objects (codes or values).
 
     Provides dictionary/set-like access, identifier normalization, and serialization for VCP codes/values.
     Used as a base for VcpCodeStorage and VcpValueStorage.
     """
-    __slots__ = {"_dict", "_set"}
+    __slots__ = {"_dict", "_set", "_revision", "_serialize_cache"}
 
     def __init__(self, instance_parent=None, instance_name=None):
         super().__init__(instance_parent=instance_parent, instance_name=instance_name)
@@ -27,6 +29,20 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
     def _initialize(self):
         self._dict : Dict[T_VcpStorageKey, Storable] = {}
         self._set  : Set [Storable]           = set()
+        self._revision = 0
+        self._serialize_cache = None
+
+
+    # Modification tracking
+    def _touch(self) -> None:
+        """
+        Mark this storage as modified, propagating to the storable object that contains it (if any).
+        """
+        self._revision += 1
+
+        parent = self.instance_parent
+        if isinstance(parent, VcpStorageStorable):
+            parent._touch()
 
 
     # Utility methods
@@ -112,6 +128,7 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
         obj = self._create_value(key)
         self._dict[key] = obj
         self._set.add(obj)
+        self._touch()
         return obj
 
 
@@ -128,6 +145,7 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
             return
 
         del self._dict[key]
+        self._touch()
 
         if isinstance(key, T_VcpStorageKey):
             obj.clear_names()
@@ -136,6 +154,28 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
             obj.remove_name(key)
 
 
+    def remove_keys(self, keys : Iterable[T_VcpStorageKey]) -> None:
+        """
+        Remove multiple storable objects by key in a single pass.
+        Unlike calling remove() for each key, aliases are dropped together with their objects instead of one by one.
+        Args:
+            keys: The storage keys (int) to remove.
+        """
+        keys = set(keys)
+        removed = [obj for obj in self._set if obj.vcp_storage_key() in keys]
+        if not removed:
+            return
+
+        removed_ids = {id(obj) for obj in removed}
+        self._dict = {k: v for k, v in self._dict.items() if id(v) not in removed_ids}
+
+        for obj in removed:
+            obj._names.clear()
+            self._set.remove(obj)
+
+        self._touch()
+
+
     def set(self, name : T_VcpStorageName, value : Optional[T_VcpStorageKey]) -> Optional[VcpStorageStorable]:
         """
         Set an alias for a value, or remove if value is None.
@@ -171,6 +211,7 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
         obj = self.add(value)
 
         self._dict[identifier] = obj
+        self._touch()
         obj.add_name(name)
 
         return obj
@@ -245,6 +286,14 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
         for v in self._set:
             yield v.vcp_storage_key()
 
+    def key_set(self) -> Set[T_VcpStorageKey]:
+        """
+        Get all storage keys (integers) as a set.
+        Returns:
+            Set[int]: All keys.
+        """
+        return {v.vcp_storage_key() for v in self._set}
+
     def items(self) -> ItemsView[T_VcpStorageIdentifier, Storable]:
         """
         Get all (key, storable) pairs.
@@ -335,6 +384,21 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
         Returns:
             dict or str: The serialized representation.
         """
+        # Nothing changed since the last call, so reuse the previous result
+        res = self._get_serialize_cache(diff)
+        if res is not None:
+            return res
+
+        return self._set_serialize_cache(diff, self._serialize(diff))
+
+    def _serialize(self, diff : 'VcpStorage | None' = None) -> Union[Dict, str]:
+        """
+        Uncached implementation of serialize().
+        Args:
+            diff: Another storage to diff against.
+        Returns:
+            dict or str: The serialized representation.
+        """
         if diff is None:
             return self.asdict()
 
@@ -383,6 +447,8 @@ class VcpStorage[Storable : VcpStorageStorable](LoggableMixin, HierarchicalMixin
 
         # Parse defaults
         if 'default' in data:
+            # Copy before popping, the caller may still be holding on to (or caching) 'data'
+            data = dict(data)
             defaults = data.pop('default')
             defaults_split = defaults.split(',')
 
@@ -4,7 +4,7 @@
 from typing import Any, Dict, Union, Optional
 
 from .value import VcpValue
-from ..storage import VcpStorage
+from ..storage import VcpStorage, T_VcpStorageIdentifier, T_VcpStorageKey
 
 
 class VcpValueStorage(VcpStorage[VcpValue]):
@@ -20,4 +20,26 @@ class VcpValueStorage(VcpStorage[VcpValue]):
         Returns:
             VcpValue: The created VcpValue instance.
         """
-        return VcpValue(key, instance_parent=self)
\ No newline at end of file
+        return VcpValue(key, instance_parent=self)
+
+    def get_ephemeral(self, identifier : T_VcpStorageIdentifier) -> VcpValue:
+        """
+        Get a value by identifier without adding it to the storage.
+        Stored values are returned as-is, while unknown integer values return a new VcpValue that is not stored.
+        Args:
+            identifier: The identifier (int or str).
+        Returns:
+            VcpValue: The stored or ephemeral value.
+        Raises:
+            KeyError: If the identifier is an unknown name.
+        """
+        identifier = self.standardise_identifier(identifier)
+
+        obj = self._dict.get(identifier, None)
+        if obj is not None:
+            return obj
+
+        if isinstance(identifier, T_VcpStorageKey):
+            return self._create_value(identifier)
+
+        raise KeyError(identifier)
@@ -8,17 +8,16 @@ Defines the VCP code aliases, types, and descriptions as per the MCCS specificat
 
 from .code import VcpCodeStorage
 from app.util import CFG
+from app.util.lazy import LazyGlobals
 
 ########################
 # Codes from the MCCS specification
 
-VCP_SPEC = VcpCodeStorage()
-
 _manufacturer_vcps = {}
 for i in range(0xE0, 0xFF):
     _manufacturer_vcps[i] = {"name": f"Manufacturer Specific 0x{i:X}"}
 
-VCP_SPEC.add_dictionary({
+MCCS_CODES = {
     # Preset Operations
     "Preset": {
         0x00: {
@@ -735,9 +734,19 @@ VCP_SPEC.add_dictionary({
 
     # Manufacturer Specific
     "Manufacturer": _manufacturer_vcps
-})
+}
+
+
+########################
+# Global VCP specification, built on first access
+def _create_vcp_spec() -> VcpCodeStorage:
+    spec = VcpCodeStorage()
+    spec.add_dictionary(MCCS_CODES)
+
+    custom_codes = CFG.vcp.custom_codes
+    if custom_codes is not None:
+        spec.deserialize(custom_codes)
 
+    return spec
 
-custom_codes = CFG.vcp.custom_codes
-if custom_codes is not None:
-    VCP_SPEC.deserialize(custom_codes)
\ No newline at end of file
+__getattr__ = LazyGlobals(globals(), VCP_SPEC=_create_vcp_spec)
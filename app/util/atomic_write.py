@@ -0,0 +1,41 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import os
+import stat
+import tempfile
+
+
+def atomic_write(file_path : str, data : str | bytes, encoding : str = 'utf-8') -> None:
+    """
+    Write a file atomically.
+
+    The data is written to a temporary file in the same directory, flushed to disk, and then renamed over 'file_path'.
+    Readers (and crashes) therefore only ever see either the old or the new file contents, never a partial write.
+
+    Args:
+        file_path: Path of the file to write.
+        data: The file contents. Bytes are written as-is.
+        encoding: Text encoding to use for str contents.
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix='.tmp', dir=directory)
+    try:
+        binary = isinstance(data, (bytes, bytearray, memoryview))
+        with os.fdopen(fd, 'wb' if binary else 'w', encoding=None if binary else encoding) as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+        # Keep the permissions of the file being replaced, mkstemp creates files only readable by the owner
+        if os.path.exists(file_path):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,64 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import os
+import time
+import contextlib
+
+from typing import Iterator
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+# Suffix of the lock file created next to the locked file
+LOCK_SUFFIX = '.lock'
+
+
+def _acquire(fd : int, shared : bool) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        return
+
+    # msvcrt has no shared locks, and its blocking mode gives up after ~10 seconds, so poll instead
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(0.05)
+
+
+def _release(fd : int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def file_lock(file_path : str, shared : bool = False) -> Iterator[None]:
+    """
+    Advisory inter-process lock for a file.
+
+    The lock is taken on a separate '<file_path>.lock' file rather than on 'file_path' itself, so that 'file_path' can be
+    replaced atomically (see atomic_write) while the lock is held. Only processes that also use file_lock are excluded.
+
+    Args:
+        file_path: Path of the file to lock.
+        shared: If True, take a shared (read) lock instead of an exclusive one. On Windows, locks are always exclusive.
+    """
+    fd = os.open(file_path + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        _acquire(fd, shared)
+        try:
+            yield
+        finally:
+            _release(fd)
+    finally:
+        os.close(fd)
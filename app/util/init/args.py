@@ -74,6 +74,10 @@ def add_arg(name, *args, default=None, **kwargs):
 add_arg('logging.levels.file', '-lv', '--log-verbosity', action='store', help='Logfile verbosity. Can be numeric or one of the default logging levels (CRITICAL=50, ERROR=40, WARNING=30, INFO=20, DEBUG=10)')
 add_arg('logging.levels.tty' , '-v', '--verbosity', action='store', help='Console verbosity. Can be numeric or one of the default logging levels (CRITICAL=50, ERROR=40, WARNING=30, INFO=20, DEBUG=10)')
 
+add_arg('cli.jobs', '-j', '--jobs', action='store', type=int, metavar='N', help='Maximum number of monitors CLI commands run on in parallel. 1 runs all commands sequentially')
+
+add_arg('monitors.watch.interval', '-wi', '--interval', action='store', type=float, metavar='SECONDS', help="Seconds between reads of watched codes that change ('--watch'). Codes that do not change are read less and less often")
+
 add_arg('app.cli.list_monitors', '-l', '--list', '--list-monitors', action='store_const', const=True, default=False)
 
 
@@ -146,11 +150,53 @@ class CommandAction(argparse.Action):
             'others': unknown
         })
 
-_PARSER.add_argument('-s' , '--set'      , dest='app.cli.commands', nargs='+', action=CommandAction)
-_PARSER.add_argument('-ms', '--multi-set', dest='app.cli.commands', nargs='+', action=CommandAction)
-_PARSER.add_argument('-g' , '--get'      , dest='app.cli.commands', nargs='+', action=CommandAction)
-_PARSER.add_argument('-t' , '--toggle'   , dest='app.cli.commands', nargs='+', action=CommandAction)
+class CommandParser(argparse.ArgumentParser):
+    """
+    Argument parser for command lines in batch files (see '--batch'), which only accepts CLI commands.
+    Raises ValueError on invalid input, rather than exiting.
+    """
+    def __init__(self):
+        super().__init__(add_help=False, exit_on_error=False)
+
+    @override
+    def error(self, message):
+        raise ValueError(message)
+
+_COMMAND_PARSER = CommandParser()
+
+for parser in (_PARSER, _COMMAND_PARSER):
+    parser.add_argument('-s' , '--set'      , dest='app.cli.commands', nargs='+', action=CommandAction)
+    parser.add_argument('-ms', '--multi-set', dest='app.cli.commands', nargs='+', action=CommandAction)
+    parser.add_argument('-g' , '--get'      , dest='app.cli.commands', nargs='+', action=CommandAction)
+    parser.add_argument('-t' , '--toggle'   , dest='app.cli.commands', nargs='+', action=CommandAction)
+del parser
+
+def parse_commands(argv : list[str]) -> list[dict]:
+    """
+    Parse a list of CLI command arguments, e.g. ['-g', 'primary', 'input', '-s', 'primary', 'input', 'hdmi1'].
+
+    Args:
+        argv: The arguments.
+
+    Returns:
+        list: The parsed commands, in the same format as 'app.cli.commands'.
+
+    Raises:
+        ValueError: If the arguments are invalid.
+    """
+    try:
+        parsed = _COMMAND_PARSER.parse_args(argv)
+    except argparse.ArgumentError as e:
+        raise ValueError(str(e)) from e
+    return getattr(parsed, 'app.cli.commands', None) or []
+
 _PARSER.add_argument('-ie', '--ignore-errors', dest='app.cli.ignore_errors', action='store_const', const=True, default=False)
+_PARSER.add_argument('-d' , '--daemon', dest='app.cli.daemon', action='store_const', const=True, default=False, help="Run as a resident daemon, which other pyddcci invocations forward their commands to")
+_PARSER.add_argument('-nd', '--no-daemon', dest='app.cli.no_daemon', action='store_const', const=True, default=False, help="Do not forward commands to a running daemon")
+_PARSER.add_argument('-du', '--dump', dest='app.cli.dump', nargs='+', metavar='FILTER', default=None, help="Read every VCP code advertised by the monitors matching each FILTER, printing results as JSON lines")
+_PARSER.add_argument('-w' , '--watch', dest='app.cli.watch', nargs='+', action='append', metavar='FILTER CODE', default=None, help="Watch CODEs of the monitor matching FILTER, printing changes as JSON lines until interrupted. Can be given multiple times")
+_PARSER.add_argument('-p' , '--plan', dest='app.cli.plan', action='store_const', const=True, default=False, help="Dry run: print the DDC/CI operations the commands would issue and their estimated duration, without running them")
+_PARSER.add_argument('-b' , '--batch', dest='app.cli.batch', action='store', metavar='FILE', default=None, help="Run newline-delimited commands from FILE ('-' for stdin), printing results as JSON lines")
 
 
 ###################
@@ -2,11 +2,91 @@
 # Copyright © 2020 pyddcci Rui Pinheiro
 
 import os
-import oyaml as yaml
-from typing import Any, Iterable, ValuesView, override, Self
+import logging
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, ValuesView, override, Self
 
 from . import version, args
 from .. import NamespaceMap, LoggableHierarchicalNamedMixin
+from ..yaml_cache import load_yaml
+
+
+##########
+# MARK: Config Snapshot Class
+class ConfigSnapshot:
+    """
+    Immutable, flattened view of a ConfigMap, see ConfigMap.snapshot().
+
+    Values can be read either by dotted key (snapshot['monitors.capabilities.cache']), which is a single lookup in a flat
+    dictionary, or through attributes (snapshot.monitors.capabilities.cache), which are plain instance attributes of
+    pre-built snapshot nodes. Neither goes through the ConfigMap sticky namespace and default fallback machinery.
+    """
+
+    def __init__(self, config : 'ConfigMap', prefix : str = '', flat : dict | None = None):
+        """
+        Args:
+            config (ConfigMap): The config map to snapshot.
+            prefix (str): Dotted key prefix of 'config' within the root snapshot.
+            flat (dict): The root snapshot's flat dictionary, None when creating a root snapshot.
+        """
+        root = flat is None
+        if root:
+            flat = {}
+
+        attrs = self.__dict__
+        for k, v in config.items():
+            key = f"{prefix}{k}"
+            if isinstance(v, ConfigMap):
+                v = ConfigSnapshot(v, prefix=f"{key}.", flat=flat)
+            else:
+                flat[key] = v
+            attrs[k] = v
+
+        attrs['_prefix'] = prefix
+        attrs['_flat'] = MappingProxyType(flat) if root else flat
+
+    @property
+    def flat(self) -> Mapping[str, Any]:
+        """
+        Returns:
+            Mapping: Read-only mapping of dotted key to value, for every value in this snapshot.
+        """
+        prefix = self._prefix
+        if not prefix:
+            return self._flat
+        return MappingProxyType({k[len(prefix):]: v for k, v in self._flat.items() if k.startswith(prefix)})
+
+    def __getitem__(self, key : str) -> Any:
+        try:
+            return self._flat[self._prefix + key]
+        except KeyError:
+            pass
+
+        # Not a value, so it may be a sub-hierarchy
+        node = self
+        for k in key.split('.'):
+            node = node.__dict__.get(k, None) if isinstance(node, ConfigSnapshot) and k[:1] != '_' else None
+            if node is None:
+                raise KeyError(key)
+        return node
+
+    def get(self, key : str, default : Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key : str) -> bool:
+        return self.get(key, self) is not self
+
+    def __setattr__(self, key : str, value : Any) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is read-only")
+
+    def __delattr__(self, key : str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is read-only")
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} '{self._prefix.rstrip('.')}' {dict(self.flat)}>"
 
 
 ##########
@@ -27,6 +107,9 @@ class ConfigMap(NamespaceMap, LoggableHierarchicalNamedMixin):
     # These hierarchies will be stored raw
     RAW_HIERARCHIES = ('vcp.custom_codes',)
 
+    # Incremented whenever any ConfigMap is modified, invalidates all snapshots
+    _revision = 0
+
     def __init__(self, instance_name, *args, **kwargs):
         """
         Initialize the ConfigMap with an instance name and optional arguments.
@@ -39,6 +122,48 @@ class ConfigMap(NamespaceMap, LoggableHierarchicalNamedMixin):
         super().__init__(*args, instance_name=instance_name, **kwargs)
 
         self._default = NamespaceMap()
+        self._snapshot : tuple[int, ConfigSnapshot] | None = None
+
+
+    # MARK: Snapshot
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        if key[:1] != '_':
+            ConfigMap._revision += 1
+
+    def __delitem__(self, key) -> None:
+        super().__delitem__(key)
+        if key[:1] != '_':
+            ConfigMap._revision += 1
+
+    def __setattr__(self, key, value) -> None:
+        super().__setattr__(key, value)
+        if key[:1] != '_':
+            ConfigMap._revision += 1
+
+    def __delattr__(self, key) -> None:
+        super().__delattr__(key)
+        if key[:1] != '_':
+            ConfigMap._revision += 1
+
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        Get an immutable, flattened snapshot of this config map, for fast reads in hot paths, e.g.
+        CFG.snapshot().monitors.capabilities.cache
+
+        The snapshot is cached, and only rebuilt after the configuration is modified.
+
+        Returns:
+            ConfigSnapshot: The snapshot.
+        """
+        cached = self._snapshot
+        revision = ConfigMap._revision
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+
+        snapshot = ConfigSnapshot(self)
+        self._snapshot = (revision, snapshot)
+        return snapshot
 
     @override
     def _get_write_target(self, key) -> NamespaceMap:
@@ -259,6 +384,9 @@ class MasterConfigMap(ConfigMap):
     USER_CONFIG_FILE = os.path.join(args.HOME, 'data', 'config.yaml')
     DEFAULT_CONFIG_FILE = os.path.join(args.HOME, 'data', 'config.default.yaml')
 
+    # Whether to write sidecar caches of the parsed config files (never during unit tests)
+    WRITE_YAML_CACHE = not args.UNIT_TEST
+
     def yaml_str(self, user=True, default=True):
         """
         Get the YAML string representation of the config.
@@ -270,6 +398,8 @@ class MasterConfigMap(ConfigMap):
         Returns:
             str: The YAML string.
         """
+        import oyaml as yaml
+
         dump = self.asdict(recursive=True, user=user, default=default)
         return yaml.dump(dump)
 
@@ -281,6 +411,10 @@ class MasterConfigMap(ConfigMap):
             user (bool): Include user values.
             default (bool): Include default values.
         """
+        # Dumping needs (o)yaml, which is comparatively slow to import, so skip it unless the message would be logged
+        if not self.log.isEnabledFor(logging.DEBUG):
+            return
+
         dump = self.yaml_str(user=user, default=default)
         typ = 'All'  if user and default else \
               'User' if user else \
@@ -297,8 +431,7 @@ class MasterConfigMap(ConfigMap):
         if not os.path.exists(file_path):
             return
 
-        with open(file_path, 'r') as file:
-            yaml_d = yaml.load(file, Loader=yaml.FullLoader)
+        yaml_d = load_yaml(file_path, write_cache=self.__class__.WRITE_YAML_CACHE)
 
         if yaml_d is not None:
             self.merge(yaml_d)
@@ -342,6 +475,16 @@ class MasterConfigMap(ConfigMap):
         if os.path.isfile(user_path):
             self.load_path(user_path)
 
+        self._loaded_revision = ConfigMap._revision
+
+    @property
+    def modified(self) -> bool:
+        """
+        Returns:
+            bool: Whether any configuration value may have been modified since the configuration was loaded.
+        """
+        return ConfigMap._revision != self._loaded_revision
+
     def save(self):
         """
         Save the user configuration to the user configuration file.
@@ -128,7 +128,8 @@ class CustomHandler(logging.Handler):
         success = True if self.num_error == 0 and self.num_critical == 0 else False
 
         # Make sure to save configuration when we exit, as long as we didn't fail due to a critical error (and this isn't a unit test)
-        if self.num_critical == 0 and not CFG.app.test:
+        # Unmodified configurations are not saved, which also avoids importing (o)yaml
+        if self.num_critical == 0 and not CFG.app.test and CFG.modified:
             print()  # Line break
             CFG.save()
 
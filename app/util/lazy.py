@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import threading
+import importlib
+
+from typing import Any, Callable, Dict
+
+
+class LazyGlobals:
+    """
+    Thread-safe provider of lazily constructed module globals, meant to be used as a module-level __getattr__ (PEP 562).
+
+    Each global is constructed by its factory on first access, and then stored in the module namespace so that subsequent
+    accesses are plain global lookups that never reach __getattr__ again. Assigning the global directly (e.g. from unit
+    tests) replaces it as usual.
+
+    Example:
+        __getattr__ = LazyGlobals(globals(), OS_MONITORS=lambda: OsMonitorList('Monitors'))
+    """
+
+    def __init__(self, module_globals : Dict[str, Any], **factories : Callable[[], Any]):
+        """
+        Args:
+            module_globals: The module's globals() dictionary.
+            factories: Mapping of global name to a callable that constructs its value.
+        """
+        self._globals   = module_globals
+        self._factories = factories
+        # Reentrant, as a factory may access other lazy globals of the same module
+        self._lock      = threading.RLock()
+
+    def __call__(self, name : str) -> Any:
+        factory = self._factories.get(name, None)
+        if factory is None:
+            raise AttributeError(f"module '{self._globals['__name__']}' has no attribute '{name}'")
+
+        with self._lock:
+            # Another thread may have constructed the value while we waited for the lock
+            if name in self._globals:
+                return self._globals[name]
+
+            value = factory()
+            self._globals[name] = value
+            return value
+
+    def constructed(self, name : str) -> bool:
+        """
+        Args:
+            name: The global name.
+
+        Returns:
+            bool: Whether the given global has already been constructed (or assigned).
+        """
+        return name in self._globals
+
+
+def lazy_import(module : str, attribute : str, package : str | None = None) -> Callable[[], Any]:
+    """
+    Create a LazyGlobals factory that imports an attribute from a module, to defer importing that module until first use.
+
+    Args:
+        module: The module name, which may be relative to 'package'.
+        attribute: The attribute to import from the module.
+        package: The package relative module names are resolved against, usually __name__ of the calling package.
+
+    Returns:
+        Callable: The factory.
+    """
+    return lambda: getattr(importlib.import_module(module, package), attribute)
@@ -0,0 +1,75 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+import os
+import sys
+import marshal
+import hashlib
+
+from typing import Any
+
+from .atomic_write import atomic_write
+
+
+# Sidecar cache file suffix
+CACHE_SUFFIX = '.cache'
+
+# Cache header, invalidates caches written by a different cache layout or Python version (the marshal format is not stable)
+CACHE_MAGIC = ('pyddcci-yaml-cache', 1, marshal.version, sys.version_info[:2])
+
+
+def _digest(data : bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _parse_yaml(data : bytes) -> Any:
+    # Importing (o)yaml is comparatively slow, so only do it when the cache cannot be used
+    import oyaml as yaml
+
+    # Prefer the libyaml-based C loader when available
+    loader = getattr(yaml, 'CFullLoader', yaml.FullLoader)
+    return yaml.load(data, Loader=loader)
+
+
+def load_yaml(file_path : str, write_cache : bool = True) -> Any:
+    """
+    Load a YAML file, using a sidecar cache of the parsed result when possible.
+
+    The parsed document is stored next to the YAML file (as '<file_path>.cache') in marshal format. The cache is only used
+    if the YAML file's modification time, size and content hash all match those recorded when the cache was written,
+    otherwise the YAML file is parsed again (and the cache refreshed).
+
+    Args:
+        file_path: Path to the YAML file.
+        write_cache: If False, the cache is read but never written.
+
+    Returns:
+        The parsed YAML document.
+    """
+    with open(file_path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        data = file.read()
+
+    key = (stat.st_mtime_ns, stat.st_size, _digest(data))
+    cache_path = file_path + CACHE_SUFFIX
+
+    # Try the cache first
+    try:
+        with open(cache_path, 'rb') as file:
+            magic, cache_key, parsed = marshal.load(file)
+        if magic == CACHE_MAGIC and cache_key == key:
+            return parsed
+    except Exception:
+        # Missing, corrupt or stale caches are simply ignored
+        pass
+
+    parsed = _parse_yaml(data)
+
+    if write_cache:
+        try:
+            atomic_write(cache_path, marshal.dumps((CACHE_MAGIC, key, parsed)))
+        except (ValueError, OSError):
+            # Documents containing types marshal does not support (e.g. dates), or read-only directories, are not cached
+            pass
+
+    return parsed
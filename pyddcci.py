@@ -14,7 +14,42 @@ if __name__ == "__main__":
     log.debug('Cmdline= %s', ' '.join(sys.argv))
     CFG.debug()
 
+    # Forward commands to a running daemon, if there is one
+    from app.daemon.client import forward_cli
+    forwarded = forward_cli()
+    if forwarded is not None:
+        sys.exit(0 if forwarded else 1)
+
+    # Monitors are only enumerated when something needs them, e.g. not for '--help'
+    if CFG.app.cli.list_monitors:
+        from app.ddcci.os import OS_MONITORS
+        OS_MONITORS.list_monitors()
+
+    # Dry run, only the commands are planned
+    if CFG.app.cli.plan:
+        from app.cli.cli_plan import CliPlan
+        sys.exit(0 if CliPlan().execute(CFG.app.cli.commands) else 1)
+
     from app.cli.cli_commands import CliCommands
     cli_commands = CliCommands()
     cli_commands.from_argparse(CFG.app.cli.commands)
-    cli_commands.execute()
\ No newline at end of file
+    cli_commands.execute()
+
+    if CFG.app.cli.dump is not None:
+        from app.cli.cli_dump import CliDump
+        if not CliDump().execute(CFG.app.cli.dump):
+            sys.exit(1)
+
+    if CFG.app.cli.watch is not None:
+        from app.cli.cli_watch import CliWatch
+        if not CliWatch().execute(CFG.app.cli.watch):
+            sys.exit(1)
+
+    if CFG.app.cli.batch is not None:
+        from app.cli.cli_batch import CliBatch
+        if not CliBatch().execute_file(CFG.app.cli.batch):
+            sys.exit(1)
+
+    if CFG.app.cli.daemon:
+        from app.daemon.server import DaemonServer
+        DaemonServer().serve_forever()
\ No newline at end of file
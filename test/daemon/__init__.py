@@ -0,0 +1,6 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Test subpackage for daemon unit tests in pyddcci.
+"""
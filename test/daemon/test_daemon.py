@@ -0,0 +1,148 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the pyddcci daemon and its client.
+Runs a daemon in a background thread, and tests forwarding commands and batches to it over each socket family.
+"""
+
+import os
+import json
+import socket
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from test import TestCase
+
+from app.util.init import args
+from app.daemon import endpoint
+from app.daemon.server import DaemonServer
+from app.daemon.client import DaemonClient, forward_cli
+from app.ddcci.os import OS_MONITORS
+from test.ddcci.os.mock import monitor_info
+
+
+class DaemonTest(TestCase):
+    def _test_family(self, family):
+        # Use a seed other tests do not use, as this test changes the monitors' state
+        monitor_info.generate_mock_monitors(2, 3)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(DaemonClient.connect(directory))
+
+            server = DaemonServer(directory=directory, family=family, port=0)
+            server.start()
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+
+            try:
+                with DaemonClient.connect(directory, timeout=10) as client:
+                    self.assertTrue(client.ping())
+
+                    # Handles stay open between requests
+                    self.assertTrue(all(os_monitor.holding_handles for os_monitor in OS_MONITORS))
+
+                    # CLI commands print the same output as when run locally
+                    commands = args.parse_commands('-s primary input hdmi1 -g primary input -g primary input +raw'.split(' '))
+                    with mock.patch('builtins.print') as print_mock:
+                        self.assertTrue(client.execute_commands(json.loads(json.dumps(commands))))
+                    self.assertEqual([c.args[0] for c in print_mock.call_args_list], ['HDMI 1', '17'])
+
+                    # Batches stream JSON records
+                    out = StringIO()
+                    self.assertFalse(client.execute_batch(['-g primary input', '-g primary bla', '-g primary input'], out=out, ignore_errors=True))
+                    records = [json.loads(line) for line in out.getvalue().splitlines()]
+                    self.assertEqual([r['ok'] for r in records], [True, False, True])
+                    self.assertEqual(records[0]['result']['name'], 'HDMI 1')
+
+                # Requests with the wrong token are rejected
+                with DaemonClient.connect(directory) as client:
+                    client.token = 'wrong'
+                    self.assertFalse(client.ping())
+
+                with DaemonClient.connect(directory) as client:
+                    self.assertTrue(client.shutdown())
+            finally:
+                thread.join(10)
+
+            self.assertFalse(thread.is_alive())
+            self.assertIsNone(endpoint.read_endpoint(directory))
+            self.assertFalse(any(os_monitor.holding_handles for os_monitor in OS_MONITORS))
+
+    def test_tcp(self):
+        self._test_family('tcp')
+
+    def test_unix(self):
+        if not endpoint.HAS_UNIX_SOCKETS:
+            self.skipTest("Unix domain sockets are not supported")
+        self._test_family('unix')
+
+    def test_idle_client(self):
+        monitor_info.generate_mock_monitors(2, 3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            server = DaemonServer(directory=directory, family='tcp', port=0, idle_timeout=0.2)
+            server.start()
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+
+            try:
+                # A client that connects and never sends a request does not block other clients
+                with endpoint.connect(endpoint.read_endpoint(directory), timeout=10) as idle:
+                    with DaemonClient.connect(directory, timeout=10) as client:
+                        self.assertTrue(client.ping())
+
+                    # Its connection was closed by the daemon
+                    self.assertEqual(idle.recv(1), b'')
+
+                with DaemonClient.connect(directory) as client:
+                    self.assertTrue(client.shutdown())
+            finally:
+                thread.join(10)
+
+            self.assertFalse(thread.is_alive())
+
+    def test_unresponsive_daemon(self):
+        with tempfile.TemporaryDirectory() as directory, socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            # A stale endpoint, whose port is now used by something that accepts connections and never replies
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            endpoint.write_endpoint({'family': 'tcp', 'address': list(listener.getsockname()), 'token': 'x', 'pid': 0}, directory)
+
+            connections = []
+            def accept(replies):
+                sock, _ = listener.accept()
+                connections.append(sock)
+                sock.sendall(replies)
+            connect = DaemonClient.connect
+            commands = args.parse_commands('-g primary input'.split(' '))
+
+            # The command line, as parsed into the config
+            cfg = mock.MagicMock()
+            cfg.daemon.forward = True
+            cfg.app.cli.ignore_errors = False
+            cfg.app.cli.get.side_effect = {'commands': json.loads(json.dumps(commands))}.get
+
+            try:
+                with mock.patch('app.daemon.client.CFG', cfg), \
+                        mock.patch.object(DaemonClient, 'connect', side_effect=lambda: connect(directory, timeout=0.2)):
+                    # Without a reply, the commands run locally
+                    for replies in (b'', b'garbage\n'):
+                        thread = threading.Thread(target=accept, args=(replies,))
+                        thread.start()
+                        self.assertIsNone(forward_cli())
+                        thread.join()
+
+                    # Once replies were received, the commands are not run again
+                    thread = threading.Thread(target=accept, args=(b'{"ok": true, "text": "HDMI 1"}\n',))
+                    thread.start()
+                    with mock.patch('builtins.print') as print_mock:
+                        self.assertFalse(forward_cli())
+                    thread.join()
+                    self.assertEqual([c.args[0] for c in print_mock.call_args_list], ['HDMI 1'])
+            finally:
+                for sock in connections:
+                    sock.close()
@@ -0,0 +1,63 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for CLI batch mode in pyddcci.
+Tests that batches share one enumeration and monitor, keep handles open, and stream JSON lines.
+"""
+
+import json
+from io import StringIO
+from unittest import mock
+
+from test import TestCase
+
+from app.cli.cli_batch import CliBatch
+from app.ddcci.os import OS_MONITORS
+from app.ddcci.monitor import Monitor
+from test.ddcci.os.mock import monitor_info
+
+class CliBatchTest(TestCase):
+    def test_batch(self):
+        # Generate 3 mock monitors and set the first as primary (using a seed other tests do not use, as this test changes
+        # the monitors' state)
+        monitor_info.generate_mock_monitors(3, 2)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+
+        lines = [
+            '# Switch inputs',
+            '-g primary input',
+            '-s primary input hdmi1 -g primary input',
+            '',
+            '-g primary contrast +raw',
+            '-g primary nonexistent',
+            '-g primary input',
+        ]
+
+        out = StringIO()
+        info_class = OS_MONITORS.__class__.OS_MONITOR_INFO_CLASS
+        with mock.patch.object(info_class, 'enumerate', wraps=info_class.enumerate) as enumerate_mock, \
+             mock.patch('app.ddcci.monitor_registry.Monitor', wraps=Monitor) as monitor_mock:
+            def check_held(line):
+                for os_monitor in OS_MONITORS:
+                    self.assertTrue(os_monitor.holding_handles)
+                return line
+
+            with self.assertRaises(RuntimeError):
+                CliBatch(out=out).execute(map(check_held, lines))
+
+            # One enumeration and one Monitor for the whole batch
+            self.assertEqual(enumerate_mock.call_count, 1)
+            self.assertEqual(monitor_mock.call_count, 1)
+
+        # Handles are released afterwards
+        for os_monitor in OS_MONITORS:
+            self.assertFalse(os_monitor.holding_handles)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(r['line'], r['ok']) for r in records], [(2, True), (3, True), (3, True), (5, True), (6, False)])
+        self.assertEqual(records[0]['result'], {'value': 0, 'name': None})
+        self.assertEqual(records[2]['result']['name'], 'HDMI 1')
+        self.assertIsNone(records[1]['result'])
+        self.assertIn('nonexistent', records[4]['error'])
@@ -3,15 +3,20 @@
 
 """
 Unit tests for CLI command handling in pyddcci.
-Tests command execution and output using mock monitors and redirected stdout.
+Tests command execution and output using mock monitors and redirected stdout, sequentially and in parallel.
 """
 
 import sys
+import time
 from io import StringIO
+from unittest import mock
 
 from test import TestCase
 
+from app.util import CFG
 from app.util.init import args
+from app.ddcci.os import OS_MONITORS
+from app.ddcci.monitor import Monitor
 from app.cli.cli_commands import CliCommands
 from test.ddcci.os.mock import monitor_info
 
@@ -56,6 +61,68 @@ class MonitorConfigTest(TestCase):
         cli_commands.execute()
         self.assertStdoutEqual('50\n0')
 
+    def test_parallel(self):
+        # Generate 3 mock monitors with 0.1s of DDC/CI latency (using a seed other tests do not use, as this test changes
+        # the monitors' state)
+        monitor_info.generate_mock_monitors(3, 4)
+        OS_MONITORS.enumerate()
+        for os_monitor in OS_MONITORS:
+            os_monitor.latency = 0.1
+        models = [mock_monitor.monitor_model for mock_monitor in monitor_info.MOCK_MONITORS]
+        second = Monitor(models[1]).get_os_monitor()
+
+        def execute(cmdline):
+            cli_commands = CliCommands()
+            parsed = args._PARSER.parse_args(cmdline.format(*models).split(' '))
+            cli_commands.from_argparse(getattr(parsed, 'app.cli.commands'))
+
+            # Create (and load) the monitors beforehand, so that only the commands themselves are timed
+            for cmd in cli_commands:
+                cmd.monitor.codes
+
+            start = time.perf_counter()
+            cli_commands.execute()
+            return time.perf_counter() - start
+
+        def set_jobs(jobs):
+            CFG.merge({'cli': {'jobs': jobs}})
+
+        jobs = CFG.cli.jobs
+        try:
+            # Commands for the same monitor keep their order, and results are printed in command line order
+            set_jobs(3)
+            elapsed = execute('-s {0} contrast 10 -s {1} contrast 20 -s {2} contrast 30 -g {0} contrast +raw -g {1} contrast +raw -g {2} contrast +raw')
+            self.assertStdoutEqual('10\n20\n30')
+
+            # Each monitor needs a write, a verification read, and another read: about 0.3s in parallel, 0.9s sequentially
+            self.assertLess(elapsed, 0.6)
+
+            set_jobs(1)
+            elapsed = execute('-g {0} contrast +raw -g {1} contrast +raw -g {2} contrast +raw')
+            self.assertStdoutEqual('10\n20\n30')
+            self.assertGreaterEqual(elapsed, 0.3)
+
+            # Errors are reported in order, and stop the remaining commands unless ignored
+            set_jobs(3)
+            original_query = type(second)._vcp_query
+            def failing_query(os_monitor, code):
+                if os_monitor is second:
+                    raise OSError("MOCK: query failed")
+                return original_query(os_monitor, code)
+
+            with mock.patch.object(type(second), '_vcp_query', failing_query):
+                with self.assertRaises(RuntimeError):
+                    execute('-g {0} contrast +raw -g {1} contrast +raw -s {1} contrast 0 -g {2} contrast +raw')
+                self.assertStdoutEqual('10')
+                self.assertEqual(second.codes[0x12], 20)
+
+                with mock.patch.object(CliCommands, '_ignore_errors', return_value=True), self.assertLogs(level='ERROR') as logs:
+                    execute('-g {0} contrast +raw -g {1} contrast +raw -g {2} contrast +raw')
+                self.assertStdoutEqual('10\n30')
+                self.assertEqual(len(logs.records), 1)
+        finally:
+            set_jobs(jobs)
+
     def tearDown(self):
         self.assertStdoutEqual("")
 
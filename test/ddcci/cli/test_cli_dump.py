@@ -0,0 +1,78 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for CLI dump mode in pyddcci.
+Tests that every advertised code is streamed as a JSON line, and that monitors are read in parallel.
+"""
+
+import json
+import threading
+from io import StringIO
+from unittest import mock
+
+from test import TestCase
+
+from app.cli.cli_dump import CliDump
+from app.ddcci.os import OS_MONITORS
+from app.ddcci.monitor_registry import MONITOR_REGISTRY
+from test.ddcci.os.mock import monitor_info
+from test.ddcci.os.mock.monitor import MockOsMonitor
+
+class CliDumpTest(TestCase):
+    def test_dump(self):
+        # Generate 3 mock monitors and set the first as primary (using a seed other tests do not use, as this test changes
+        # the monitors' state)
+        monitor_info.generate_mock_monitors(3, 5)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+
+        primary = MONITOR_REGISTRY.get('primary')
+        primary_model = monitor_info.MOCK_MONITORS[0].monitor_model
+        other_model = monitor_info.MOCK_MONITORS[1].monitor_model
+
+        primary.get_os_monitor().codes[0x12] = 42
+        codes = sorted(primary.get_os_monitor().capabilities.get_vcp_codes().keys())
+
+        # The first read of each monitor waits for the other monitor's, which only completes if they are read in parallel
+        barrier = threading.Barrier(2, timeout=10)
+        threads = {}
+        original = MockOsMonitor._vcp_query
+        def vcp_query(os_monitor, code):
+            if os_monitor not in threads:
+                threads[os_monitor] = threading.current_thread().name
+                barrier.wait()
+            return original(os_monitor, code)
+
+        # 'PRIMARY' and the primary monitor's model select the same monitor as 'primary', so it is not dumped twice
+        out = StringIO()
+        with mock.patch.object(MockOsMonitor, '_vcp_query', autospec=True, side_effect=vcp_query):
+            self.assertTrue(CliDump(out=out, jobs=2).execute(['primary', other_model, 'PRIMARY', primary_model]))
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        by_monitor = {}
+        for record in records:
+            by_monitor.setdefault(record['monitor'], []).append(record)
+
+        self.assertEqual(set(by_monitor.keys()), {'primary', other_model})
+        for filter in by_monitor:
+            self.assertEqual([record['code'] for record in by_monitor[filter]], codes)
+
+        contrast = next(record for record in by_monitor['primary'] if record['code'] == 0x12)
+        self.assertEqual(contrast['current'], 42)
+        self.assertEqual(contrast['maximum'], 255)
+        self.assertEqual(contrast['type'], 'VCP_SET_PARAMETER')
+        self.assertIn('Contrast', contrast['names'])
+        self.assertIsNone(contrast['error'])
+
+        # Both monitors were read in parallel, from different threads
+        self.assertFalse(barrier.broken)
+        self.assertEqual(len(threads), 2)
+        self.assertEqual(len(set(threads.values())), 2)
+
+        # Monitors that cannot be found are reported
+        out = StringIO()
+        self.assertFalse(CliDump(out=out).execute(['nonexistent-monitor']))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertIn('error', records[0])
@@ -0,0 +1,75 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for CLI plan mode in pyddcci.
+Tests that commands are planned without reaching the monitors, and that avoidable operations and estimates are reported.
+"""
+
+from io import StringIO
+
+from test import TestCase
+
+from app.util.init import args
+from app.cli.cli_plan import CliPlan
+from app.ddcci.os import OS_MONITORS
+from test.ddcci.os.mock import monitor_info
+from test.ddcci.os.mock.monitor import MockOsMonitor
+
+class CliPlanTest(TestCase):
+    def test_plan(self):
+        # Generate 2 mock monitors and set the first as primary (using a seed other tests do not use, so that their
+        # capabilities are not cached)
+        monitor_info.generate_mock_monitors(2, 7)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+
+        primary, other = OS_MONITORS[0], OS_MONITORS[1]
+        other_model = monitor_info.MOCK_MONITORS[1].monitor_model
+        vcp_query = MockOsMonitor.__dict__['_vcp_query']
+
+        parsed = args._PARSER.parse_args((
+            '-g primary input -s primary input hdmi1 -s primary input hdmi1 -g primary input '
+            f'-t {other_model} contrast 0 100 +nv -g nonexistent-monitor input'
+        ).split(' '))
+
+        out = StringIO()
+        plan = CliPlan(out=out, jobs=2, costs={'query': 0.1, 'write': 0.05, 'capabilities': 2.0, 'verify': 0.5})
+        self.assertFalse(plan.execute(getattr(parsed, 'app.cli.commands')))
+
+        # Nothing reached the monitors, and recording was uninstalled
+        for os_monitor in (primary, other):
+            self.assertEqual(os_monitor.codes, {})
+            self.assertEqual(os_monitor.fragment_reads, [])
+            self.assertIsNone(os_monitor._capabilities)
+        self.assertIs(MockOsMonitor.__dict__['_vcp_query'], vcp_query)
+        self.assertNotIn('verify', MockOsMonitor.__dict__)
+
+        operations = [(op.monitor, op.op, op.code, op.value, op.avoidable is not None) for op in plan.recording.operations]
+        self.assertEqual(operations, [
+            (primary, 'capabilities', None, None, False),
+            (primary, 'read'        , 0x60, 0x00, False),
+            (primary, 'write'       , 0x60, 0x11, False),
+            (primary, 'verify'      , 0x60, 0x11, False),
+            # Setting the same value again, and reading it back, is avoidable
+            (primary, 'write'       , 0x60, 0x11, True ),
+            (primary, 'verify'      , 0x60, 0x11, True ),
+            (primary, 'read'        , 0x60, 0x11, True ),
+            (other  , 'capabilities', None, None, False),
+            (other  , 'read'        , 0x12, 0x00, False),
+            (other  , 'write'       , 0x12, 100 , False),
+            (other  , 'wait'        , 0x12, 100 , False),
+        ])
+
+        # Estimates
+        primary_cost = 2.0 + 0.1 + 0.05 + (0.1 + 0.5) + 0.05 + 0.1 + 0.1
+        other_cost   = 2.0 + 0.1 + 0.05 + 0.1
+        self.assertAlmostEqual(plan.recording.total, primary_cost + other_cost)
+        self.assertAlmostEqual(plan.recording.avoidable, 0.05 + 0.1 + 0.1)
+        self.assertAlmostEqual(plan.estimate(), primary_cost)
+        self.assertAlmostEqual(plan.estimate(jobs=1), primary_cost + other_cost)
+
+        text = out.getvalue()
+        self.assertIn("11 operation(s) on 2 monitor(s)", text)
+        self.assertIn("3 avoidable operation(s)", text)
+        self.assertIn("Error planning command 'get nonexistent-monitor input'", text)
@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for CLI watch mode in pyddcci.
+Tests that several monitors are watched at once, streaming their values as JSON lines until stopped, and that watches of
+the same monitor share a schedule.
+"""
+
+import json
+import threading
+from io import StringIO
+from unittest import mock
+
+from test import TestCase
+
+from app.cli.cli_watch import CliWatch
+from app.ddcci.monitor import Monitor
+from test.ddcci.os.mock import monitor_info
+
+class CliWatchTest(TestCase):
+    def test_watch(self):
+        monitor_info.generate_mock_monitors(3, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        other_model = monitor_info.MOCK_MONITORS[1].monitor_model
+
+        # Invalid codes are rejected before watching anything
+        with self.assertRaises(ValueError):
+            CliWatch(out=StringIO()).execute([['primary', 'nonexistent']])
+        with self.assertRaises(ValueError):
+            CliWatch(out=StringIO()).execute([['primary']])
+
+        # Stop once the initial value of every watched code was written
+        stop = threading.Event()
+        class Output(StringIO):
+            def write(self, text):
+                super().write(text)
+                if self.getvalue().count('\n') >= 4:
+                    stop.set()
+
+        # 'PRIMARY' selects the same monitor as 'primary', so both are watched on a single schedule
+        out = Output()
+        # Only a safeguard against hanging if records are missing, which the assertions below report
+        timeout = threading.Timer(30, stop.set)
+        timeout.start()
+        self.addCleanup(timeout.cancel)
+        with mock.patch.object(Monitor, 'watch', autospec=True, side_effect=Monitor.watch) as watch:
+            self.assertTrue(CliWatch(out=out, stop=stop).execute([['primary', 'contrast', 'luminance'], [other_model, 'contrast'], ['PRIMARY', 'contrast']]))
+        self.assertEqual(watch.call_count, 2)
+
+        # Initial values of every watched code
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sorted((record['monitor'], record['code']) for record in records), sorted([('primary', 0x10), ('primary', 0x12), (other_model, 0x12), ('PRIMARY', 0x12)]))
+        for record in records:
+            self.assertIsInstance(record['value'], int)
@@ -6,6 +6,8 @@ Mock implementation of BaseOsMonitor for use in OS-related unit tests in pyddcci
 Implements VCP query and write methods for testing.
 """
 
+import time
+
 from app.ddcci.os.monitor import BaseOsMonitor
 from app.ddcci.vcp.reply import VcpReply
 
@@ -24,6 +26,23 @@ class MockOsMonitor(BaseOsMonitor):
 
         self.codes = {}
 
+        # Capabilities fragment reads, and how many times reading the fragment at a given offset should fail
+        self.fragment_reads = []
+        self.fragment_failures = {}
+
+        # Whether handles are being held open, see hold_handles()
+        self.holding_handles = False
+
+        # Seconds each VCP query or write takes, to simulate DDC/CI latency
+        self.latency = 0.0
+
+    # OS handles
+    def hold_handles(self) -> None:
+        self.holding_handles = True
+
+    def release_handles(self) -> None:
+        self.holding_handles = False
+
     # Capabilities
     def _get_capabilities_string(self) -> str:
         return \
@@ -67,9 +86,20 @@ class MockOsMonitor(BaseOsMonitor):
                 "mccs_ver(2.2)" \
             ")"
 
+    def _get_capabilities_fragment(self, offset : int) -> bytes:
+        self.fragment_reads.append(offset)
+
+        failures = self.fragment_failures.get(offset, 0)
+        if failures > 0:
+            self.fragment_failures[offset] = failures - 1
+            raise OSError(f"MOCK: failed reading capabilities fragment at offset {offset}")
+
+        return self._get_capabilities_string().encode('ascii')[offset:offset+32]
+
     # VCP Query
     def _vcp_query(self, code: int) -> VcpReply:
         self.log.debug(f"MOCK: _vcp_query(0x{code:X})")
+        time.sleep(self.latency)
         reply = VcpReply(
             command = code,
             type    = VcpCodeType.VCP_SET_PARAMETER,
@@ -81,6 +111,7 @@ class MockOsMonitor(BaseOsMonitor):
     # VCP Write
     def _vcp_write(self, code: int, value: int) -> None:
         self.log.debug(f"MOCK: _vcp_write(0x{code:X}, 0x{value:X})")
+        time.sleep(self.latency)
         self.codes[code] = value
         return
 
@@ -0,0 +1,106 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the MCCS capability string parser in pyddcci.
+Tests chunked parsing, the different input types, tolerance to malformed strings and fragment-based reading.
+"""
+
+from unittest import mock
+
+from test import TestCase
+
+from app.ddcci.os import OS_MONITORS
+from app.ddcci.os.monitor import VcpError
+from app.ddcci.os.generic.capabilities import CapabilitiesParser
+from app.ddcci.os.generic.capabilities_reader import CapabilitiesReader
+from test.ddcci.os.mock import monitor_info
+from test.ddcci.os.mock.monitor import MockOsMonitor
+
+
+CAPABILITIES = "(prot(monitor)type(LCD)model(U2720Q)cmds(01 02 03 07 0C E3 F3)vcp(02 04 05 08 10 12 14(05 08 0B 0C) 16 18 1A 52 60(0F 11 1B) AA(01 02 04) AC AE B2 B6 C6 C8 C9 D6(01 04 05) DC(00 03 05) DF E0 E1 E2(00 1D 02) F0(00 0C) F1 F2 FD)mswhql(1)asset_eep(40)mccs_ver(2.1))"
+
+
+class CapabilitiesTest(TestCase):
+    def test_parse(self):
+        caps = CapabilitiesParser().parse(CAPABILITIES)
+
+        self.assertEqual(caps['prot'], 'monitor')
+        self.assertEqual(caps['model'], 'U2720Q')
+        self.assertEqual(caps['cmds'], ['01', '02', '03', '07', '0C', 'E3', 'F3'])
+        self.assertEqual(caps['mccs_ver'], '2.1')
+
+        vcp = caps['vcp']
+        self.assertIsNone(vcp[0x10])
+        self.assertEqual(vcp[0x14], [0x05, 0x08, 0x0B, 0x0C])
+        self.assertEqual(vcp[0x60], [0x0F, 0x11, 0x1B])
+        self.assertEqual(len(vcp), 30)
+
+    def test_chunks(self):
+        expected = CapabilitiesParser().parse(CAPABILITIES)
+
+        # Any chunk size, and any input type, must produce the same result
+        data = CAPABILITIES.encode('ascii')
+        for size in (1, 2, 3, 7, 32):
+            parser = CapabilitiesParser()
+            view = memoryview(data)
+            for i in range(0, len(data), size):
+                parser.feed(view[i:i+size])
+            self.assertEqual(parser.close(), expected)
+
+        self.assertEqual(CapabilitiesParser().parse(data), expected)
+
+    def test_malformed(self):
+        # Missing outer parentheses, NUL terminator
+        caps = CapabilitiesParser().parse("prot(monitor) vcp(10 12 60(0F 11))\x00")
+        self.assertEqual(caps['prot'], 'monitor')
+        self.assertEqual(caps['vcp'], {0x10: None, 0x12: None, 0x60: [0x0F, 0x11]})
+
+        # Glued hex, whitespace before '(', invalid hex, unbalanced parentheses
+        caps = CapabilitiesParser().parse("(vcp(10 14 (0508) ZZ 60(0F11 ZZ))) model(X")
+        self.assertEqual(caps['vcp'], {0x10: None, 0x14: [0x05, 0x08], 0x60: [0x0F, 0x11]})
+        self.assertEqual(caps['model'], 'X')
+
+        # Odd-length hex tokens longer than a byte are ignored, rather than read as codes or values above 0xFF
+        caps = CapabilitiesParser().parse("(vcp(10 123 60(0F 11 123) 0AB))")
+        self.assertEqual(caps['vcp'], {0x10: None, 0x60: [0x0F, 0x11]})
+
+        # Values of invalid codes are dropped, rather than read as codes
+        for code in ('ZZ', '123'):
+            caps = CapabilitiesParser().parse(f"(vcp(10 {code}(01 02) 60(0F 11)))")
+            self.assertEqual(caps['vcp'], {0x10: None, 0x60: [0x0F, 0x11]})
+
+    def test_reader(self):
+        monitor_info.generate_mock_monitors(1, 0)
+        OS_MONITORS.enumerate()
+        monitor = next(iter(OS_MONITORS))
+        cap_str = monitor._get_capabilities_string()
+
+        # Only the failed fragment is retried
+        monitor.fragment_failures[64] = 2
+        reader = CapabilitiesReader(monitor, retries=2)
+        self.assertEqual(reader.read(), cap_str)
+        self.assertEqual(reader.parser.close(), CapabilitiesParser().parse(cap_str))
+        self.assertEqual(monitor.fragment_reads.count(64), 3)
+        self.assertEqual(monitor.fragment_reads.count(0), 1)
+
+        # Running out of retries keeps the partial string, which can then be resumed
+        monitor.fragment_reads.clear()
+        monitor.fragment_failures[64] = 3
+        reader = CapabilitiesReader(monitor, retries=2)
+        with self.assertRaises(VcpError):
+            reader.read()
+        self.assertEqual(reader.partial, cap_str[:64])
+
+        monitor.fragment_reads.clear()
+        reader = CapabilitiesReader(monitor, partial=reader.partial, retries=2)
+        self.assertEqual(reader.read(), cap_str)
+        self.assertEqual(reader.parser.close(), CapabilitiesParser().parse(cap_str))
+        self.assertEqual(monitor.fragment_reads[0], 64)
+
+        # Backends without fragment support read the whole string instead, even when resuming
+        with mock.patch.object(MockOsMonitor, '_get_capabilities_fragment', autospec=True, side_effect=NotImplementedError):
+            reader = CapabilitiesReader(monitor, partial=cap_str[:10] + 'garbage', retries=2)
+            self.assertEqual(reader.read(), cap_str)
+            self.assertEqual(reader.partial, cap_str)
+            self.assertEqual(reader.parser.close(), CapabilitiesParser().parse(cap_str))
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the EDID decoder in pyddcci.
+Tests base block decoding, the lazily parsed CTA-861 and DisplayID extension blocks and bulk decoding using synthetic EDIDs.
+"""
+
+import struct
+
+from test import TestCase
+
+from app.ddcci.os.generic.edid import Edid
+from app.ddcci.os.generic.edid_inventory import EdidInventory
+
+
+def _checksum(block : bytearray) -> bytearray:
+    block[-1] = (-sum(block[:-1])) % 256
+    return block
+
+
+def _text_descriptor(typ : int, text : str) -> bytes:
+    return bytes([0, 0, 0, typ, 0]) + (text + '\n').encode('cp437').ljust(13, b' ')[:13]
+
+
+def _detailed_timing(pixel_clock : int, width : int, h_blank : int, height : int, v_blank : int) -> bytes:
+    d = bytearray(18)
+    struct.pack_into('<H', d, 0, pixel_clock // 10_000)
+    d[2] = width & 0xFF
+    d[3] = h_blank & 0xFF
+    d[4] = ((width >> 8) << 4) | (h_blank >> 8)
+    d[5] = height & 0xFF
+    d[6] = v_blank & 0xFF
+    d[7] = ((height >> 8) << 4) | (v_blank >> 8)
+    return bytes(d)
+
+
+def make_edid(extensions=True) -> bytes:
+    base = bytearray(128)
+    base[0:8] = Edid.EDID_HEADER
+    # 'DEL' manufacturer, product 0x4321, serial 1234, week 10 of 2020, EDID 1.4
+    struct.pack_into('>HHIBBBBBBBBB', base, 8, 0x10AC, 0x4321, 1234, 10, 30, 1, 4, 0b1011_0101, 60, 34, 120, 0b0010_1010)
+    # sRGB-like chromaticity
+    base[25:35] = bytes([0xEE, 0x91, 0xA3, 0x54, 0x4C, 0x99, 0x26, 0x0F, 0x50, 0x54])
+    # 640x480@60 and 800x600@60 established timings
+    base[35:38] = bytes([0b0010_0001, 0, 0])
+    # 1920x1080@60 standard timing, rest unused
+    base[38:54] = bytes([0xD1, 0xC0]) + bytes([0x01, 0x01] * 7)
+    # 3840x2160@60 detailed timing, name, serial
+    base[54:72]  = _detailed_timing(533_250_000, 3840, 160, 2160, 62)
+    base[72:90]  = _text_descriptor(0xFC, 'DELL U2720Q')
+    base[90:108] = _text_descriptor(0xFF, 'ABC123')
+    base[108:126] = _text_descriptor(0x10, '')
+    base[126] = 2 if extensions else 0
+    blocks = [_checksum(base)]
+
+    if extensions:
+        cta = bytearray(128)
+        cta[0:4] = bytes([0x02, 0x03, 0, 0b1111_0001])
+        data_blocks = bytes([
+            (2 << 5) | 3, 0x80 | 16, 4, 97,                         # video: VIC 16 (native), 4, 97
+            (3 << 5) | 5, 0x03, 0x0C, 0x00, 0x10, 0x00,             # HDMI vendor specific
+            (7 << 5) | 3, 5, 0b1110_0000, 0,                        # colorimetry: BT2020
+            (7 << 5) | 6, 6, 0b0000_0101, 0x01, 0x60, 0x50, 0x20,   # HDR: SDR + PQ
+        ])
+        cta[4:4+len(data_blocks)] = data_blocks
+        cta[2] = 4 + len(data_blocks)
+        cta[cta[2]:cta[2]+18] = _detailed_timing(148_500_000, 1920, 280, 1080, 45)
+        blocks.append(_checksum(cta))
+
+        displayid = bytearray(128)
+        timing = bytearray(20)
+        timing[0:3] = (594_000 - 1).to_bytes(3, 'little')
+        timing[4:6] = (3840 - 1).to_bytes(2, 'little')
+        timing[6:8] = (560 - 1).to_bytes(2, 'little')
+        timing[12:14] = (2160 - 1).to_bytes(2, 'little')
+        timing[14:16] = (90 - 1).to_bytes(2, 'little')
+        section = bytes([0x22, 0, 20]) + bytes(timing)
+        displayid[0:5] = bytes([0x70, 0x20, len(section), 0x03, 0])
+        displayid[5:5+len(section)] = section
+        blocks.append(_checksum(displayid))
+
+    return b''.join(blocks)
+
+
+class EdidTest(TestCase):
+    def test_base_block(self):
+        edid = Edid(make_edid(extensions=False))
+
+        self.assertEqual(edid.manufacturer_id, 'DEL')
+        self.assertEqual(edid.product_id, 0x4321)
+        self.assertEqual(edid.manufacture_year, 2020)
+        self.assertEqual(edid.edid_version, '1.4')
+        self.assertEqual(edid.video_input, {'digital': True, 'bit_depth': 10, 'interface': 'DisplayPort'})
+        self.assertEqual(edid.gamma, 2.2)
+        self.assertEqual(edid.display_name, 'DELL U2720Q')
+        self.assertEqual(edid.serial_string, 'ABC123')
+        self.assertTrue(edid.features['active_off'])
+        self.assertTrue(edid.features['preferred_native'])
+        self.assertAlmostEqual(edid.chromacity['white'][0], 0.3125, places=3)
+        self.assertEqual(edid.descriptors[1]['type'], 0xFC)
+
+        timings = edid.timings
+        self.assertEqual([(t['width'], t['height']) for t in timings['established']], [(640, 480), (800, 600)])
+        self.assertEqual(timings['standard'], [{'width': 1920, 'height': 1080, 'refresh': 60}])
+        self.assertEqual((timings['detailed'][0]['width'], timings['detailed'][0]['height']), (3840, 2160))
+        self.assertAlmostEqual(timings['detailed'][0]['refresh'], 60.0, places=0)
+
+        self.assertIsNone(edid.cta)
+        self.assertIsNone(edid.hdr)
+        self.assertIsNone(edid.displayid)
+
+    def test_extensions(self):
+        # Accepts (views over) mutable buffers, and does not alias them
+        buffer = bytearray(make_edid())
+        edid = Edid(memoryview(buffer))
+        buffer[128:] = b''
+
+        self.assertEqual(len(edid.extension_blocks), 2)
+
+        cta = edid.cta
+        self.assertEqual(cta['vics'], [16, 4, 97])
+        self.assertEqual(cta['native_vics'], [16])
+        self.assertTrue(cta['hdmi'])
+        self.assertEqual(cta['colorimetry'], ['BT2020cYCC', 'BT2020YCC', 'BT2020RGB'])
+        self.assertEqual(cta['detailed_timings'][0]['width'], 1920)
+        self.assertTrue(all(isinstance(payload, bytes) for _, _, payload in cta['data_blocks']))
+
+        hdr = edid.hdr
+        self.assertEqual(hdr['eotfs'], ['sdr', 'pq'])
+        self.assertEqual(hdr['static_metadata_types'], [1])
+        self.assertAlmostEqual(hdr['max_luminance'], 50 * 2 ** 3, places=0)
+
+        displayid = edid.displayid
+        self.assertEqual(displayid['version'], '2.0')
+        self.assertEqual(displayid['detailed_timings'][0]['width'], 3840)
+        self.assertAlmostEqual(displayid['detailed_timings'][0]['refresh'], 60.0, places=0)
+
+    def test_invalid(self):
+        data = bytearray(make_edid(extensions=False))
+
+        with self.assertRaises(RuntimeError):
+            Edid(data[:100])
+
+        data[10] ^= 0xFF
+        with self.assertRaises(ValueError):
+            Edid(data)
+
+    def test_inventory(self):
+        base = make_edid(extensions=False)
+
+        # Same panel made in a different year, and a corrupted record
+        other = bytearray(base)
+        other[17] = 31
+        other = bytes(_checksum(other))
+        corrupt = bytearray(base)
+        corrupt[20] ^= 0xFF
+
+        inventory = EdidInventory(base * 3 + other + bytes(corrupt) + bytes(10))
+        self.assertEqual(len(inventory), 5)
+        self.assertEqual(inventory.column('manufacturer'), ['DEL'] * 5)
+        self.assertEqual(inventory.column('valid'), [True, True, True, True, False])
+
+        valid = inventory.filter(valid=True)
+        self.assertEqual(inventory.group_by('manufacturer', 'manufacture_year', indices=valid), {('DEL', 2020): [0, 1, 2], ('DEL', 2021): [3]})
+        self.assertEqual(inventory.filter(manufacture_year=lambda year: year > 2020), [3])
+
+        self.assertEqual(inventory.row(3)['product_id'], 0x4321)
+        self.assertEqual(inventory.record(3).display_name, 'DELL U2720Q')
@@ -3,12 +3,16 @@
 
 """
 Unit tests for OsMonitorList in pyddcci.
-Tests monitor enumeration and list behaviors using mock monitors.
+Tests monitor enumeration and list behaviors using mock monitors, including the per-field indexes used by monitor filters.
 """
 
+from unittest import mock
+
 from test import TestCase
 
 from app.ddcci.os import OsMonitorList
+from app.ddcci.os.monitor_list import BaseOsMonitorList
+from app.ddcci.monitor_filter import FieldMonitorFilter, PrimaryMonitorFilter, MonitorInfoMonitorFilter, create_monitor_filter_from
 from test.ddcci.os.mock import monitor_info
 
 
@@ -49,4 +53,55 @@ class MonitorListTest(TestCase):
         # The other old monitors should be disconnected and not present
         for i in range(1, 3):
             self.assertFalse(old_monitors[i].connected)
-            self.assertNotIn(old_monitors[i], monitors)
\ No newline at end of file
+            self.assertNotIn(old_monitors[i], monitors)
+
+    def test_lookup(self):
+        # Generate 3 mock monitors, and set the first as primary
+        monitor_info.generate_mock_monitors(3, 9)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        mocks = list(monitor_info.MOCK_MONITORS)
+
+        monitors = OsMonitorList('Monitors')
+        by_model = {monitor.info.monitor.model: monitor for monitor in monitors}
+        os_monitors = [by_model[x.monitor_model] for x in mocks]
+
+        # Monitors are kept in the order the OS reports them in
+        self.assertEqual(monitors.aslist(recursive=False), os_monitors)
+
+        # Indexed fields are compared as case-insensitive strings
+        for mock_monitor, os_monitor in zip(mocks, os_monitors):
+            self.assertEqual(monitors.lookup('monitor.serial', mock_monitor.monitor.serial.lower()), [os_monitor])
+            self.assertEqual(monitors.lookup('monitor.product_id', str(mock_monitor.monitor.product_id)), [os_monitor])
+        self.assertEqual(monitors.lookup('adapter.primary', True), [os_monitors[0]])
+        self.assertEqual(monitors.lookup('adapter.primary', False), os_monitors[1:])
+        self.assertEqual(monitors.lookup('monitor.serial', 'nonexistent'), [])
+        self.assertIsNone(monitors.lookup('monitor.name', mocks[0].monitor.name))
+
+        # Filters look monitors up instead of matching every monitor
+        for cls, filter in (
+            (FieldMonitorFilter      , create_monitor_filter_from(f"serial={mocks[1].monitor.serial}")),
+            (PrimaryMonitorFilter    , create_monitor_filter_from('primary')),
+            (MonitorInfoMonitorFilter, MonitorInfoMonitorFilter(*(getattr(mocks[2].monitor, x) for x in MonitorInfoMonitorFilter.IDENTITY_FIELDS))),
+        ):
+            with mock.patch.object(cls, 'match', autospec=True, side_effect=cls.match) as match:
+                self.assertEqual(len(filter.find(monitors)), 1)
+                self.assertEqual(match.call_count, 1)
+
+        # Indexes are only updated for monitors that are connected, disconnected or changed
+        with mock.patch.object(BaseOsMonitorList, '_index', autospec=True, side_effect=BaseOsMonitorList._index) as index:
+            monitors.enumerate()
+            self.assertEqual(index.call_count, 0)
+
+            monitor_info.MOCK_MONITORS.pop()
+            monitors.enumerate()
+            self.assertEqual(index.call_count, 0)
+            self.assertEqual(monitors.lookup('monitor.serial', mocks[2].monitor.serial), [])
+
+            serial = mocks[1].monitor.serial
+            mocks[1].monitor.serial = None
+            monitor_info.MOCK_MONITORS.append(mocks[2])
+            monitors.enumerate()
+            self.assertEqual(index.call_count, 2)
+            self.assertEqual(monitors.lookup('monitor.serial', serial), [])
+            reconnected = monitors.lookup('monitor.serial', mocks[2].monitor.serial)
+            self.assertEqual([x.info.monitor.model for x in reconnected], [mocks[2].monitor_model])
@@ -5,8 +5,13 @@ Tests monitor input changes and related monitor functionality using mock data.
 # SPDX-License-Identifier: GPLv3
 # Copyright © 2020 pyddcci Rui Pinheiro
 
+import copy
+import threading
+from unittest import mock
+
 from test import TestCase
 
+from app.ddcci import monitor_config
 from app.ddcci.monitor import Monitor
 from test.ddcci.os.mock import monitor_info
 
@@ -123,4 +128,101 @@ class MonitorTest(TestCase):
         self.assertIn('apple', monitor1.codes)
         self.assertIn('input', monitor1.codes)
         self.assertIn('hdmi1', monitor1.codes['input'])
-        self.assertIn('banana', monitor1.codes['input'])
\ No newline at end of file
+        self.assertIn('banana', monitor1.codes['input'])
+
+    def test_continuous_reads(self):
+        # Generate a single mock monitor and set as primary
+        monitor_info.generate_mock_monitors(1, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+
+        monitor1 = Monitor('Primary')
+        luminance = monitor1.codes['luminance']
+        num_values = len(luminance.values)
+        exported = monitor1._export_codes()
+
+        # Reading many distinct values of a continuous code must not grow its value storage
+        for i in range(0, 1000):
+            monitor1['luminance'] = i
+            self.assertEqual(monitor1['luminance'], i)
+
+        self.assertEqual(num_values, len(luminance.values))
+        self.assertEqual(exported, monitor1._export_codes())
+
+        # Named values are still stored and resolved
+        luminance['half'] = 50
+        monitor1['luminance'] = 'half'
+        self.assertEqual(monitor1['luminance'], 'half')
+        self.assertEqual(num_values + 1, len(luminance.values))
+
+    def test_export_codes_cached(self):
+        # Generate a single mock monitor and set as primary
+        monitor_info.generate_mock_monitors(1, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+
+        monitor1 = Monitor('Primary')
+        exported = monitor1._export_codes()
+
+        # Nothing changed, so the previous result is reused
+        self.assertIs(exported, monitor1._export_codes())
+
+        # Changing a single value invalidates the cache up the chain
+        monitor1.codes['input']['banana'] = 0x11
+        exported2 = monitor1._export_codes()
+        self.assertIsNot(exported, exported2)
+        self.assertNotEqual(exported, exported2)
+        self.assertIs(exported2, monitor1._export_codes())
+
+        # Deserializing does not modify the exported data
+        snapshot = copy.deepcopy(exported2)
+        monitor2 = Monitor('Primary')
+        monitor2._import_codes(exported2)
+        self.assertEqual(snapshot, exported2)
+        self.assertIn('banana', monitor2.codes['input'])
+
+        # The config stores a copy, so changing it in place does not change the cache, and is undone by the next export
+        monitor1.export_codes()
+        cfg = monitor_config.MONITOR_CONFIG.get(monitor1.filter, add=False)
+        self.assertEqual(cfg['codes'], exported2)
+        self.assertIsNot(cfg['codes'], exported2)
+
+        cfg['codes'].clear()
+        self.assertNotEqual(monitor1._export_codes(), {})
+        monitor1.export_codes()
+        self.assertEqual(cfg['codes'], exported2)
+
+    def test_watch(self):
+        # Generate 3 mock monitors and set the first as primary (using a seed other tests do not use, as this test changes
+        # the monitors' state)
+        monitor_info.generate_mock_monitors(3, 6)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+
+        monitor = Monitor('primary')
+        os_monitor = monitor.get_os_monitor()
+        os_monitor.codes[0x12] = 10
+        os_monitor.codes[0x10] = 20
+
+        # Count bus reads
+        reads = []
+        original_query = type(os_monitor)._vcp_query
+        def counting_query(self, code):
+            reads.append(code)
+            return original_query(self, code)
+
+        # Change the contrast half way through
+        stop = threading.Event()
+        change = threading.Timer(0.3, os_monitor.codes.__setitem__, (0x12, 30))
+        timeout = threading.Timer(0.6, stop.set)
+        change.start()
+        timeout.start()
+
+        with mock.patch.object(type(os_monitor), '_vcp_query', counting_query):
+            changes = [(code.code, value.value) for code, value in monitor.watch(['contrast', 'luminance'], interval=0.01, backoff=2, max_interval=0.08, bus_gap=0, stop=stop)]
+
+        change.join()
+        timeout.join()
+
+        # Only initial values and changes are reported
+        self.assertEqual(changes, [(0x12, 10), (0x10, 20), (0x12, 30)])
+
+        # Polling both codes every 10ms would have taken about 120 reads
+        self.assertLess(len(reads), 40)
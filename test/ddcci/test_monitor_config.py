@@ -6,12 +6,17 @@ Unit tests for the MonitorConfig class and monitor filter functionality in pyddc
 Verifies configuration and filtering logic using mock monitors.
 """
 
+import os
+import tempfile
+import threading
+import oyaml as yaml
+
 from test import TestCase
 
 from .os.mock import monitor_info
 from app.ddcci.os import OS_MONITORS
 from app.ddcci.monitor_config import MonitorConfig
-from app.ddcci.monitor_filter import MonitorInfoMonitorFilter, OsMonitorMonitorFilter
+from app.ddcci.monitor_filter import MonitorInfoMonitorFilter, OsMonitorMonitorFilter, create_monitor_filter_from
 
 class MonitorConfigTest(TestCase):
     def test_config(self):
@@ -58,3 +63,116 @@ class MonitorConfigTest(TestCase):
         entry4 = cfg2.get(filter1)
         self.assertEqual(entry4, entry1)
         self.assertEqual('bla', entry4['bla'])
+
+    def test_index(self):
+        # Generate 3 mock monitors
+        monitor_info.generate_mock_monitors(3, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+
+        cfg = MonitorConfig(file_path=None)
+
+        # Each monitor gets its own entry
+        entries = [cfg.get(os_monitor) for os_monitor in OS_MONITORS]
+        self.assertEqual(len(cfg), 3)
+        self.assertEqual(len(set(map(id, entries))), 3)
+
+        # Lookups through any filter identifying the same monitor find the same entry
+        for os_monitor, entry in zip(OS_MONITORS, entries):
+            self.assertIs(cfg.get(OsMonitorMonitorFilter(os_monitor), add=False), entry)
+            self.assertIs(cfg.get(OsMonitorMonitorFilter(os_monitor).to_monitor_info_filter(), add=False), entry)
+
+        # Filters that do not identify a single monitor are still supported
+        primary = cfg.get(create_monitor_filter_from('Primary'))
+        self.assertIs(cfg.get(create_monitor_filter_from('Primary'), add=False), primary)
+        self.assertEqual(len(cfg), 4)
+
+        # Removed entries are no longer found
+        cfg.discard(entries[1])
+        self.assertIsNone(cfg.get(OS_MONITORS[1], add=False))
+        self.assertIs(cfg.get(OS_MONITORS[2], add=False), entries[2])
+
+    def test_yaml_fragments(self):
+        # Generate 3 mock monitors
+        monitor_info.generate_mock_monitors(3, 0)
+        OS_MONITORS.enumerate()
+
+        cfg = MonitorConfig(file_path=None)
+        entries = [cfg.get(os_monitor) for os_monitor in OS_MONITORS]
+        entries[0]['capabilities'] = '(vcp(10 12))'
+
+        # Concatenating per-entry fragments produces the same document as dumping everything at once
+        self.assertEqual(cfg.yaml_str(), yaml.dump(cfg.serialize()))
+
+        # Unmodified entries are not re-serialized
+        fragments = [entry.yaml_str() for entry in entries]
+        entries[1]['codes'] = {0x10: 'brightness'}
+        self.assertIs(entries[0].yaml_str(), fragments[0])
+        self.assertIsNot(entries[1].yaml_str(), fragments[1])
+        self.assertIs(entries[2].yaml_str(), fragments[2])
+        self.assertEqual(cfg.yaml_str(), yaml.dump(cfg.serialize()))
+
+    def test_edit(self):
+        # Generate 3 mock monitors
+        monitor_info.generate_mock_monitors(3, 0)
+        OS_MONITORS.enumerate()
+
+        cfg = MonitorConfig(file_path=None)
+
+        # Pending saves cannot be written (e.g. by the write-behind timer) while an entry is being modified
+        flushed = threading.Event()
+        def flush():
+            cfg.flush()
+            flushed.set()
+
+        with cfg.edit(OS_MONITORS[0]) as entry:
+            self.assertIs(entry, cfg.get(OS_MONITORS[0], add=False))
+            entry['capabilities'] = '(vcp(10))'
+
+            thread = threading.Thread(target=flush)
+            thread.start()
+            self.assertFalse(flushed.wait(0.1))
+            entry['codes'] = {0x10: 'brightness'}
+
+        thread.join()
+        self.assertTrue(flushed.is_set())
+        self.assertEqual(cfg.get(OS_MONITORS[0], add=False)['codes'], {0x10: 'brightness'})
+
+    def test_merge_on_write(self):
+        # Generate 3 mock monitors
+        monitor_info.generate_mock_monitors(3, 0)
+        OS_MONITORS.enumerate()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'monitors.yaml')
+
+            cfg0 = MonitorConfig(file_path=path)
+            for os_monitor in OS_MONITORS:
+                cfg0.get(os_monitor)['bla'] = os_monitor.instance_name
+            cfg0.write()
+
+            # Two processes load the same file, and modify different things
+            cfg1 = MonitorConfig(file_path=path)
+            cfg2 = MonitorConfig(file_path=path)
+
+            cfg1.get(OS_MONITORS[0])['capabilities'] = '(vcp(10))'
+            cfg2.get(OS_MONITORS[1])['codes'] = {0x10: 'brightness'}
+            del cfg2.get(OS_MONITORS[0])['bla']
+            cfg2.discard(cfg2.get(OS_MONITORS[2]))
+
+            cfg1.write()
+            cfg2.write()
+
+            # Neither process lost the other's changes
+            cfg3 = MonitorConfig(file_path=path)
+            for cfg in (cfg2, cfg3):
+                self.assertEqual(len(cfg), 2)
+                self.assertEqual(cfg.get(OS_MONITORS[0], add=False)['capabilities'], '(vcp(10))')
+                self.assertNotIn('bla', cfg.get(OS_MONITORS[0], add=False))
+                self.assertEqual(cfg.get(OS_MONITORS[1], add=False)['codes'], {0x10: 'brightness'})
+                self.assertEqual(cfg.get(OS_MONITORS[1], add=False)['bla'], OS_MONITORS[1].instance_name)
+                self.assertIsNone(cfg.get(OS_MONITORS[2], add=False))
+
+            # The other process picks up the removal on its next write
+            cfg1.write()
+            self.assertEqual(len(cfg1), 2)
@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for monitor filters in pyddcci.
+Tests which monitors filters (and filter expressions) select, that monitor information is searched without walking it on
+every match, and that results are cached until the monitors change.
+"""
+
+from unittest import mock
+
+from test import TestCase
+
+from .os.mock import monitor_info
+from app.ddcci.os import OS_MONITORS
+from app.ddcci.monitor_filter import BaseMonitorFilter, RegexMonitorFilter, FieldMonitorFilter, AndMonitorFilter, OrMonitorFilter, NotMonitorFilter, create_monitor_filter_from
+
+class MonitorFilterTest(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        # Generate 3 mock monitors and set the first as primary (using a seed other tests do not use, as these tests
+        # change the monitors' information)
+        monitor_info.generate_mock_monitors(3, 8)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+
+    @staticmethod
+    def os_monitor(i : int):
+        model = monitor_info.MOCK_MONITORS[i].monitor_model
+        return next(os_monitor for os_monitor in OS_MONITORS if os_monitor.info.monitor.model == model)
+
+    def test_regex(self):
+        mock = monitor_info.MOCK_MONITORS[1]
+        os_monitor = self.os_monitor(1)
+
+        # Any value of the monitor information can be matched, and every pattern must match
+        self.assertEqual(RegexMonitorFilter(mock.monitor_model).find(OS_MONITORS), [os_monitor])
+        self.assertEqual(RegexMonitorFilter(mock.monitor.serial.lower()).find(OS_MONITORS), [os_monitor])
+        self.assertEqual(RegexMonitorFilter([mock.monitor.manufacturer_id, f"DISPLAY{mock.adapter_number}$"]).find(OS_MONITORS), [os_monitor])
+        self.assertEqual(RegexMonitorFilter([mock.monitor_model, 'primary']).find(OS_MONITORS), [])
+        self.assertEqual(RegexMonitorFilter('^primary$').find(OS_MONITORS), [self.os_monitor(0)])
+
+        # The searchable representation is cached, and match results are memoized by it
+        searchable = os_monitor.info.searchable
+        self.assertIs(os_monitor.info.searchable, searchable)
+        self.assertIn(mock.monitor.serial, searchable)
+
+        filter = RegexMonitorFilter(mock.monitor_model)
+        for _ in range(10):
+            filter.find(OS_MONITORS)
+        self.assertEqual(len(filter._matches), 3)
+        self.assertTrue(filter._matches[searchable])
+
+    def test_update(self):
+        # Information that was unknown on enumeration is picked up by the next one, and searched from then on
+        serial = monitor_info.MOCK_MONITORS[1].monitor.serial
+        monitor_info.MOCK_MONITORS[1].monitor.serial = None
+        OS_MONITORS.enumerate()
+
+        os_monitor = self.os_monitor(1)
+        self.assertEqual(RegexMonitorFilter(serial).find(OS_MONITORS), [])
+
+        monitor_info.generate_mock_monitors(3, 8)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+
+        self.assertIs(self.os_monitor(1), os_monitor)
+        self.assertEqual(os_monitor.info.monitor.serial, serial)
+        self.assertEqual(RegexMonitorFilter(serial).find(OS_MONITORS), [os_monitor])
+
+    def test_find_cache(self):
+        os_monitor = self.os_monitor(1)
+        filter = RegexMonitorFilter(monitor_info.MOCK_MONITORS[1].monitor_model)
+
+        with mock.patch.object(RegexMonitorFilter, 'match', autospec=True, side_effect=RegexMonitorFilter.match) as match:
+            # Every monitor is matched once, after which the result is cached
+            for _ in range(10):
+                self.assertIs(filter.find_one(OS_MONITORS), os_monitor)
+            self.assertEqual(match.call_count, 3)
+
+            # Enumerating the same monitors keeps the cached result
+            OS_MONITORS.enumerate()
+            self.assertEqual(filter.find(OS_MONITORS), [os_monitor])
+            self.assertEqual(match.call_count, 3)
+
+            # Connecting a monitor invalidates it
+            monitor_info.generate_mock_monitors(4, 8)
+            monitor_info.MOCK_MONITORS[0].adapter.primary = True
+            OS_MONITORS.enumerate()
+            self.assertIs(filter.find_one(OS_MONITORS), os_monitor)
+            self.assertEqual(match.call_count, 7)
+
+    def test_expressions(self):
+        mocks = monitor_info.MOCK_MONITORS
+        os_monitors = [self.os_monitor(i) for i in range(3)]
+
+        def find(filter):
+            return sorted(OS_MONITORS.index(x) for x in create_monitor_filter_from(filter).find(OS_MONITORS))
+        expected = lambda *i: sorted(OS_MONITORS.index(os_monitors[x]) for x in i)
+
+        # Field predicates
+        self.assertIsInstance(create_monitor_filter_from(f"serial={mocks[1].monitor.serial}"), FieldMonitorFilter)
+        self.assertEqual(find(f"serial={mocks[1].monitor.serial}"), expected(1))
+        self.assertEqual(find(f"adapter.device.number = {mocks[2].adapter_number}"), expected(2))
+        self.assertEqual(find(f"manufacturer_id~^{mocks[0].monitor.manufacturer_id.lower()}"), expected(0))
+        self.assertEqual(find(FieldMonitorFilter('adapter.device.number', mocks[1].adapter_number)), expected(1))
+        with self.assertRaises(ValueError):
+            FieldMonitorFilter('monitor.device', 'x')
+
+        # Operators, with the usual precedence
+        self.assertIsInstance(create_monitor_filter_from(f"!primary & model={mocks[1].monitor_model}"), AndMonitorFilter)
+        self.assertEqual(find("!primary & adapter.device.number~."), expected(1, 2))
+        self.assertEqual(find(f"primary | serial={mocks[2].monitor.serial} & !primary"), expected(0, 2))
+        self.assertEqual(find(f"(primary | serial={mocks[2].monitor.serial}) & !primary"), expected(2))
+        self.assertEqual(find(f"{mocks[1].monitor_model} | serial={mocks[2].monitor.serial}"), expected(1, 2))
+        with self.assertRaises(ValueError):
+            create_monitor_filter_from("(primary | serial=X")
+
+        # Strings without field predicates are still regexes
+        self.assertIsInstance(create_monitor_filter_from(f"{mocks[0].monitor_model}|{mocks[1].monitor_model}"), RegexMonitorFilter)
+        self.assertEqual(find(f"{mocks[0].monitor_model}|{mocks[1].monitor_model}"), expected(0, 1))
+
+        # Cheap filters are matched first, and decide the result without matching the regex where possible
+        filter = AndMonitorFilter([mocks[1].monitor_model, NotMonitorFilter('primary')])
+        with mock.patch.object(RegexMonitorFilter, 'match', autospec=True, side_effect=RegexMonitorFilter.match) as match:
+            self.assertEqual(filter.find(OS_MONITORS), [os_monitors[1]])
+            self.assertEqual(match.call_count, 2)
+
+        # Serialization
+        for text in (f"!primary & (serial={mocks[1].monitor.serial} | {mocks[2].monitor_model})", "primary | adapter.device.number~[12]"):
+            filter = create_monitor_filter_from(text)
+            data = filter.serialize()
+            self.assertIn(data['type'], ('and', 'or'))
+
+            deserialized = BaseMonitorFilter.deserialize(data)
+            self.assertIsInstance(deserialized, (AndMonitorFilter, OrMonitorFilter))
+            self.assertEqual(deserialized.key(), filter.key())
+            self.assertEqual(deserialized.find(OS_MONITORS), filter.find(OS_MONITORS))
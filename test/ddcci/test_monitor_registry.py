@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the MonitorRegistry class in pyddcci.
+Verifies that equivalent filters share a Monitor instance, and that monitors are dropped when the connected monitors change.
+"""
+
+from unittest import mock
+
+from test import TestCase
+
+from .os.mock import monitor_info
+from app.util.init import args
+from app.cli.cli_commands import CliCommands
+from app.ddcci.os import OS_MONITORS
+from app.ddcci.monitor import Monitor
+from app.ddcci.monitor_filter import OsMonitorMonitorFilter
+from app.ddcci.monitor_registry import MonitorRegistry
+
+class MonitorRegistryTest(TestCase):
+    def test_registry(self):
+        # Generate 3 mock monitors and set the first as primary
+        monitor_info.generate_mock_monitors(3, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        OS_MONITORS.enumerate()
+        generation = OS_MONITORS.generation
+
+        registry = MonitorRegistry()
+        model = monitor_info.MOCK_MONITORS[1].monitor_model
+
+        # Equivalent filters share a Monitor, others do not
+        primary = registry.get('primary')
+        self.assertIs(registry.get(' PRIMARY'), primary)
+        self.assertIs(registry.get(model), registry.get(model))
+        self.assertIsNot(registry.get(model), primary)
+        os_monitor = primary.get_os_monitor()
+        self.assertIs(registry.get(os_monitor), registry.get(OsMonitorMonitorFilter(os_monitor).to_monitor_info_filter()))
+        self.assertEqual(len(registry), 3)
+
+        # Enumerating the same monitors keeps the registered Monitors
+        OS_MONITORS.enumerate()
+        self.assertEqual(OS_MONITORS.generation, generation)
+        self.assertIs(registry.get('primary'), primary)
+
+        # Connecting a monitor drops them, as 'primary' (or a regex) may now select a different monitor
+        monitor_info.generate_mock_monitors(4, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+        try:
+            other = registry.get('primary')
+            self.assertGreater(OS_MONITORS.generation, generation)
+            self.assertIsNot(other, primary)
+            self.assertEqual(len(registry), 1)
+        finally:
+            monitor_info.generate_mock_monitors(3, 0)
+            monitor_info.MOCK_MONITORS[0].adapter.primary = True
+            OS_MONITORS.enumerate()
+
+    def test_cli_commands(self):
+        monitor_info.generate_mock_monitors(3, 0)
+        monitor_info.MOCK_MONITORS[0].adapter.primary = True
+
+        # Ten commands against the primary monitor build a single Monitor, and thus a single code table
+        with mock.patch('app.ddcci.monitor_registry.Monitor', wraps=Monitor) as monitor_mock:
+            cli_commands = CliCommands()
+            parsed = args._PARSER.parse_args(' '.join(['-g primary contrast +raw'] * 10).split(' '))
+            cli_commands.from_argparse(getattr(parsed, 'app.cli.commands'))
+
+            self.assertEqual(len(cli_commands), 10)
+            self.assertLessEqual(monitor_mock.call_count, 1)
+            self.assertEqual(len({id(cmd.monitor) for cmd in cli_commands}), 1)
+            self.assertEqual(len({id(cmd.monitor.codes) for cmd in cli_commands}), 1)
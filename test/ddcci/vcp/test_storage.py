@@ -62,6 +62,24 @@ class VcpStorageTest(unittest.TestCase):
         self.assertIn('appl', first)
         self.assertNotIn('appl', second)
 
+    def test_remove_keys(self):
+        # Create a storage with a few aliased codes
+        storage = VcpCodeStorage(instance_name='storage')
+        storage['apple'] = 0x12
+        storage['orange'] = 0x21
+        storage['banana'] = 0x30
+        storage[0x21].add_name('citrus')
+        self.assertEqual({0x12, 0x21, 0x30}, storage.key_set())
+
+        # Bulk-remove codes and check their aliases are gone while others remain
+        storage.remove_keys([0x21, 0x30, 0x99])
+        self.assertEqual({0x12}, storage.key_set())
+        self.assertIn('apple', storage)
+        self.assertNotIn('orange', storage)
+        self.assertNotIn('citrus', storage)
+        self.assertNotIn('banana', storage)
+        self.assertEqual(['apple'], list(storage.names()))
+
 
 
 if __name__ == '__main__':
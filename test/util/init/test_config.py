@@ -0,0 +1,57 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the configuration snapshot in pyddcci.
+Tests snapshot contents, invalidation and immutability. Comparing its read speed against the ConfigMap is a benchmark, only
+run when the PYDDCCI_BENCHMARK environment variable is set.
+"""
+
+import os
+import timeit
+import unittest
+
+from test import TestCase
+
+from app.util import CFG
+
+
+class ConfigSnapshotTest(TestCase):
+    def test_snapshot(self):
+        snapshot = CFG.snapshot()
+
+        # Both access styles agree with the config
+        self.assertEqual(snapshot.monitors.capabilities.cache, CFG.monitors.capabilities.cache)
+        self.assertEqual(snapshot['monitors.capabilities.fragment_retries'], CFG.monitors.capabilities.fragment_retries)
+        self.assertEqual(snapshot['monitors'].capabilities['automatic'], CFG.monitors.capabilities.automatic)
+        self.assertEqual(snapshot.flat['app.test'], CFG.app.test)
+        self.assertIn('vcp.custom_codes', snapshot)
+        self.assertNotIn('monitors.nonexistent', snapshot)
+
+        # Cached until the config is modified
+        self.assertIs(CFG.snapshot(), snapshot)
+
+        delay = CFG.monitors.save_delay
+        try:
+            CFG.merge({'monitors': {'save_delay': delay + 1}})
+            self.assertIsNot(CFG.snapshot(), snapshot)
+            self.assertEqual(CFG.snapshot().monitors.save_delay, delay + 1)
+        finally:
+            CFG.merge({'monitors': {'save_delay': delay}})
+
+        # Snapshots are read-only
+        with self.assertRaises(AttributeError):
+            snapshot.monitors.save_delay = 0
+        with self.assertRaises(TypeError):
+            snapshot.flat['monitors.save_delay'] = 0
+
+    @unittest.skipUnless(os.environ.get('PYDDCCI_BENCHMARK'), "benchmarks only run with PYDDCCI_BENCHMARK set")
+    def test_benchmark(self):
+        number = 2000
+        config_time   = timeit.timeit(lambda: CFG.monitors.capabilities.cache, number=number)
+        snapshot_time = timeit.timeit(lambda: CFG.snapshot().monitors.capabilities.cache, number=number)
+        flat_time     = timeit.timeit(lambda: CFG.snapshot()['monitors.capabilities.cache'], number=number)
+
+        timings = f"CFG: {config_time:.4f}s, snapshot attributes: {snapshot_time:.4f}s, snapshot dotted key: {flat_time:.4f}s ({number} reads)"
+        self.assertLess(snapshot_time, config_time, timings)
+        self.assertLess(flat_time, config_time, timings)
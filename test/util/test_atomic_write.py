@@ -0,0 +1,37 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the atomic file writing helper in pyddcci.
+"""
+
+import os
+import tempfile
+
+from test import TestCase
+
+from app.util.atomic_write import atomic_write
+
+
+class AtomicWriteTest(TestCase):
+    def test_atomic_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'monitors.yaml')
+
+            atomic_write(path, 'a: 1\n')
+            with open(path) as file:
+                self.assertEqual(file.read(), 'a: 1\n')
+
+            # Replacing keeps the file's permissions
+            os.chmod(path, 0o644)
+            atomic_write(path, 'a: 2\n')
+            with open(path) as file:
+                self.assertEqual(file.read(), 'a: 2\n')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+            # A failed write leaves the old file (and no temporary files) behind
+            with self.assertRaises(TypeError):
+                atomic_write(path, None)
+            with open(path) as file:
+                self.assertEqual(file.read(), 'a: 2\n')
+            self.assertEqual(os.listdir(directory), ['monitors.yaml'])
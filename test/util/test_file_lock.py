@@ -0,0 +1,34 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the advisory file lock in pyddcci.
+Tests that an exclusive lock blocks other lockers until it is released.
+"""
+
+import os
+import tempfile
+import threading
+
+from test import TestCase
+
+from app.util.file_lock import file_lock
+
+
+class FileLockTest(TestCase):
+    def test_exclusive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'monitors.yaml')
+            acquired = threading.Event()
+
+            def worker():
+                with file_lock(path):
+                    acquired.set()
+
+            with file_lock(path):
+                thread = threading.Thread(target=worker)
+                thread.start()
+                self.assertFalse(acquired.wait(0.2))
+
+            thread.join()
+            self.assertTrue(acquired.is_set())
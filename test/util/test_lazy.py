@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the lazily constructed globals in pyddcci.
+Tests that globals are constructed exactly once, that importing the application does not construct them, and that
+the CLI entry point's imports do not load subsystems the command line may not need.
+"""
+
+import os
+import sys
+import threading
+import subprocess
+
+from test import TestCase
+
+from app.util.lazy import LazyGlobals
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LazyGlobalsTest(TestCase):
+    def test_construct_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        module_globals = {'__name__': 'fake'}
+        getter = LazyGlobals(module_globals, VALUE=factory)
+
+        self.assertFalse(getter.constructed('VALUE'))
+
+        results = []
+        def worker():
+            barrier.wait()
+            results.append(getter('VALUE'))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is module_globals['VALUE'] for result in results))
+        self.assertTrue(getter.constructed('VALUE'))
+
+        with self.assertRaises(AttributeError):
+            getter('OTHER')
+
+    def test_import_globals(self):
+        # Run in a fresh interpreter, as other tests will already have constructed the globals
+        code = (
+            "import test\n"
+            "import app.cli.cli_commands, app.ddcci.monitor, app.ddcci.os.generic.edid\n"
+            "import app.ddcci.os as os_, app.ddcci.monitor_config as config, app.ddcci.vcp.vcp_spec as spec\n"
+            "constructed = [name for module, name in ((os_, 'OS_MONITORS'), (config, 'MONITOR_CONFIG'), (spec, 'VCP_SPEC')) if name in vars(module)]\n"
+            "assert not constructed, constructed\n"
+            "assert config.MONITOR_CONFIG is config.MONITOR_CONFIG\n"
+            "assert os_.OS_MONITORS is vars(os_)['OS_MONITORS']\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_cli_imports(self):
+        # Cold start of the CLI entry point (as in pyddcci.py) in a fresh interpreter, without the test mocks
+        code = (
+            "import sys\n"
+            "import app.util\n"
+            "before = set(sys.modules)\n"
+            "import app.cli.cli_commands\n"
+            "print(' '.join(sorted(set(sys.modules) - before)))\n"
+        )
+        env = dict(os.environ, UNIT_TEST='1')
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        # The OS backend, monitor, filter and VCP code, and (o)yaml are only loaded once a command needs them
+        loaded = result.stdout.splitlines()[0].split()
+        self.assertIn('app.cli.cli_commands', loaded)
+        unexpected = [name for name in loaded if name.split('.')[0] in ('oyaml', 'yaml', 'faker') or name.startswith('app.ddcci.')]
+        self.assertEqual(unexpected, [])
@@ -0,0 +1,45 @@
+# SPDX-License-Identifier: GPLv3
+# Copyright © 2020 pyddcci Rui Pinheiro
+
+"""
+Unit tests for the sidecar YAML cache in pyddcci.
+Tests that cached results are reused, and invalidated when the YAML file changes.
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+from test import TestCase
+
+from app.util import yaml_cache
+
+
+class YamlCacheTest(TestCase):
+    def test_load_yaml(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'monitors.yaml')
+            with open(path, 'w') as file:
+                file.write("- filter: {type: info, model: ABC}\n  codes: {16: brightness}\n")
+
+            # First load parses the YAML file and writes the cache
+            data = yaml_cache.load_yaml(path)
+            self.assertEqual(data, [{'filter': {'type': 'info', 'model': 'ABC'}, 'codes': {16: 'brightness'}}])
+            self.assertTrue(os.path.exists(path + yaml_cache.CACHE_SUFFIX))
+
+            # Second load comes from the cache, without parsing YAML
+            with mock.patch.object(yaml_cache, '_parse_yaml', side_effect=AssertionError("YAML was parsed")):
+                self.assertEqual(yaml_cache.load_yaml(path), data)
+
+            # Modifying the file invalidates the cache, even if the size and modification time do not change
+            stat = os.stat(path)
+            with open(path, 'w') as file:
+                file.write("- filter: {type: info, model: XYZ}\n  codes: {16: brightness}\n")
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+            self.assertEqual(yaml_cache.load_yaml(path)[0]['filter']['model'], 'XYZ')
+
+            # Corrupt caches are ignored
+            with open(path + yaml_cache.CACHE_SUFFIX, 'wb') as file:
+                file.write(b'garbage')
+            self.assertEqual(yaml_cache.load_yaml(path, write_cache=False)[0]['filter']['model'], 'XYZ')